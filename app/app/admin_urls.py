@@ -0,0 +1,9 @@
+# Admin site URLs, imported on first use (see app/urls.py)
+
+from django.contrib import admin
+from django.urls import path
+
+# Already done at startup unless settings.LAZY_ADMIN
+admin.autodiscover()
+
+urlpatterns = [path("", admin.site.urls)]
@@ -0,0 +1,13 @@
+# Sales analytics URLs, imported on first use (see app/urls.py)
+
+from django.urls import path
+
+from sales.analytics import salesAnalyticsView
+
+urlpatterns = [
+    path(
+        "<str:report>/",
+        salesAnalyticsView.as_view(),
+        name="sales-analytics",
+    ),
+]
@@ -5,6 +5,17 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+
+Sync views share one thread under ASGI, so the user and catalog APIs are
+served by async views instead (app/asgi_urls.py). They run ORM work in the
+ASYNC_DB_WORKERS pool (core/asyncviews.py) and await password hashing in
+the LOGIN_WORKERS pool (user/login.py).
+
+Each sync middleware hook also hops to that one thread and back, which
+cost the async APIs two thirds of their throughput. Their requests go
+through a handler running only ASYNC_API_MIDDLEWARE, async-native
+middleware from core/middleware.py and core/metrics.py; they
+authenticate with tokens and need no sessions, CSRF or messages.
 """
 
 import os
@@ -12,5 +23,32 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+os.environ.setdefault('DJANGO_ROOT_URLCONF', 'app.asgi_urls')
+
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+from django.core.handlers.asgi import ASGIHandler  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+from app.asgi_urls import ASYNC_APIS  # noqa: E402
+
+
+class AsyncAPIHandler(ASGIHandler):
+    # ASGI handler using ASYNC_API_MIDDLEWARE instead of MIDDLEWARE. Django
+    # builds the chain from settings.MIDDLEWARE, so it is overridden while
+    # the chain is loaded (once, at startup) and restored right after.
+
+    def load_middleware(self, is_async=False):
+        with override_settings(MIDDLEWARE=settings.ASYNC_API_MIDDLEWARE):
+            super().load_middleware(is_async)
+
+
+api_application = AsyncAPIHandler()
+api_prefixes = tuple(f"/{prefix}" for prefix in ASYNC_APIS)
+
 
-application = get_asgi_application()
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["path"].startswith(api_prefixes):
+        return await api_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,21 @@
+# URL configuration served by app.asgi
+#
+# The same routes as app.urls, with the user and catalog APIs swapped for
+# their async views. Everything else runs as sync views.
+
+from django.urls import include, path
+
+from app import urls
+
+ASYNC_APIS = {
+    "api/user/": "user.async_urls",
+    "api/catalog/": "catalog.async_urls",
+}
+
+urlpatterns = [
+    path(prefix, include(module)) for prefix, module in ASYNC_APIS.items()
+] + [
+    pattern
+    for pattern in urls.urlpatterns
+    if str(pattern.pattern) not in ASYNC_APIS
+]
@@ -0,0 +1,21 @@
+# OpenAPI schema and docs URLs, imported on first use (see app/urls.py)
+
+from django.urls import path
+from drf_spectacular.views import SpectacularSwaggerView
+
+from core.openapi import cachedSchemaView
+
+urlpatterns = [
+    # Documents these (DRF) views under ASGI too, app.asgi_urls serves
+    # async views with the same contract
+    path(
+        "schema/",
+        cachedSchemaView.as_view(urlconf="app.urls"),
+        name="api-schema",
+    ),
+    path(
+        "docs/",
+        SpectacularSwaggerView.as_view(url_name="api-schema"),
+        name="api-docs",
+    ),
+]
@@ -31,8 +31,17 @@ ALLOWED_HOSTS = []
 
 # Application definition
 
+# Workers that never serve the admin can skip loading it at startup, it
+# is then loaded by the first /admin/ request instead (see app/urls.py).
+# Admin system checks only cover what is loaded.
+LAZY_ADMIN = os.environ.get("DJANGO_LAZY_ADMIN") == "1"
+
 INSTALLED_APPS = [
-    "django.contrib.admin",
+    (
+        "django.contrib.admin.apps.SimpleAdminConfig"
+        if LAZY_ADMIN
+        else "django.contrib.admin"
+    ),
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "django.contrib.sessions",
@@ -43,9 +52,13 @@ INSTALLED_APPS = [
     "rest_framework.authtoken",
     "drf_spectacular",
     "user",
+    "sales",
+    "catalog",
 ]
 
 MIDDLEWARE = [
+    # First, so its latency covers the rest of the stack
+    "core.metrics.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -55,7 +68,15 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-ROOT_URLCONF = "app.urls"
+# The async user and catalog APIs run only these under ASGI, see app/asgi.py
+ASYNC_API_MIDDLEWARE = [
+    "core.metrics.RequestMetricsMiddleware",
+    "core.middleware.AsyncSecurityMiddleware",
+    "core.middleware.AsyncCommonMiddleware",
+]
+
+# app/asgi.py switches to app.asgi_urls
+ROOT_URLCONF = os.environ.get("DJANGO_ROOT_URLCONF", "app.urls")
 
 TEMPLATES = [
     {
@@ -81,16 +102,211 @@ WSGI_APPLICATION = "app.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Connections are kept for DB_CONN_MAX_AGE seconds and health checked
+# before reuse. DB_POOL_MAX_SIZE > 0 switches to the in-process pool of
+# core/dbpool instead: connections then go back to it after each request.
+
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 0))
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "core.dbpool",
         "HOST": os.environ.get("DB_HOST"),
         "NAME": os.environ.get("DB_NAME"),
         "USER": os.environ.get("DB_USER"),
         "PASSWORD": os.environ.get("DB_PASS"),
+        "CONN_MAX_AGE": (
+            0
+            if DB_POOL_MAX_SIZE
+            else int(os.environ.get("DB_CONN_MAX_AGE", 60))
+        ),
+        "CONN_HEALTH_CHECKS": True,
+        "POOL": DB_POOL_MAX_SIZE
+        and {
+            "MAX_SIZE": DB_POOL_MAX_SIZE,
+            "MAX_OVERFLOW": int(os.environ.get("DB_POOL_MAX_OVERFLOW", 10)),
+            "TIMEOUT": float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+        },
+    }
+}
+
+# Read replicas as comma separated "host" or "host:port" entries, sharing
+# the primary's name and credentials. Reporting reads go to them through
+# core.routers.ReplicaRouter, tests use the primary.
+
+DB_REPLICAS = []
+for index, replica in enumerate(
+    filter(None, os.environ.get("DB_REPLICA_HOSTS", "").split(",")), 1
+):
+    host, _, port = replica.strip().rpartition(":")
+    if not host or not port.isdigit():
+        host, port = replica.strip(), ""
+    DATABASES[f"replica{index}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port,
+        "TEST": {"MIRROR": "default"},
+    }
+    DB_REPLICAS.append(f"replica{index}")
+
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+
+REPLICA_ROUTING = {
+    "REPLICAS": DB_REPLICAS,
+    "MODELS": [
+        "core.order",
+        "core.transaction",
+        "core.itemsold",
+        "core.category",
+        "core.product",
+        "core.variation",
+        "core.dailysalesrollup",
+        "core.weeklysalesrollup",
+        "core.monthlysalesrollup",
+        "core.customervalue",
+        "core.customersegment",
+    ],
+    "MAX_LAG": float(os.environ.get("DB_REPLICA_MAX_LAG", 5)),
+    "LAG_CHECK_INTERVAL": 1,
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Any Redis-compatible backend (e.g. django_redis.cache.RedisCache) can be
+# plugged in through the environment; locmem is used otherwise.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
     }
 }
 
+# Two tier catalog cache, see catalog/cache.py
+CATALOG_CACHE = {
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": int(os.environ.get("CATALOG_CACHE_TIMEOUT", 300)),
+    "LOCAL_MAX_ENTRIES": 1024,
+    "LOCAL_TIMEOUT": int(os.environ.get("CATALOG_LOCAL_CACHE_TIMEOUT", 5)),
+    "LOCK_TIMEOUT": 10,
+}
+
+# Vectorized sales analytics, see core/analytics.py
+ANALYTICS = {
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": int(os.environ.get("ANALYTICS_CACHE_TIMEOUT", 300)),
+    "CHUNK_SIZE": 50000,
+}
+
+# Per route query, DB time and latency histograms, see core/metrics.py
+# BUDGETS caps the SQL queries one request of a route (its URL name) may
+# run; the API tests assert them, see core/tests/budgets.py
+REQUEST_METRICS = {
+    "LATENCY_BUCKETS": [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000],
+    "QUERY_BUCKETS": [0, 1, 2, 3, 5, 10, 20, 50, 100],
+    "BUDGETS": {
+        "user:create": 5,
+        "user:token": 8,
+        "user:me": 4,
+        "catalog:category-list": 2,
+        "catalog:product-list": 3,
+        "catalog:product-detail": 3,
+        "catalog:product-search": 5,
+        "sales:order-list": 3,
+        "sales:transaction-list": 3,
+        "sales:report": 3,
+        "sales:line-item-report": 2,
+        "sales:customer-segments": 3,
+        "sales:customer-value": 3,
+    },
+}
+
+# Estimated, cached counts for large table pagination, see
+# core/pagination.py. Lists of fewer than THRESHOLD rows are counted exactly.
+ESTIMATED_COUNT = {
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": int(os.environ.get("ESTIMATED_COUNT_TIMEOUT", 60)),
+    "THRESHOLD": int(os.environ.get("ESTIMATED_COUNT_THRESHOLD", 100000)),
+}
+
+# Change events relayed from the outbox, see core/outbox.py. Events go to
+# OUTBOX_SOCKET ("host:port" or a Unix socket path) if set, otherwise they
+# are appended to OUTBOX_FILE. purge_outbox deletes delivered events older
+# than RETENTION_DAYS.
+OUTBOX_SOCKET = os.environ.get("OUTBOX_SOCKET")
+OUTBOX = {
+    "SINK": (
+        "core.outbox.SocketSink" if OUTBOX_SOCKET else "core.outbox.FileSink"
+    ),
+    "SINK_OPTIONS": (
+        {"address": OUTBOX_SOCKET}
+        if OUTBOX_SOCKET
+        else {"path": os.environ.get("OUTBOX_FILE", "outbox.ndjson")}
+    ),
+    "BATCH_SIZE": 500,
+    "POLL_INTERVAL": 1.0,
+    "RETENTION_DAYS": int(os.environ.get("OUTBOX_RETENTION_DAYS", 7)),
+    "PURGE_BATCH_SIZE": 10000,
+}
+
+# Idempotent transaction ingestion, see core/idempotency.py. Responses to
+# uploads with an Idempotency-Key header are replayed for RESPONSE_TIMEOUT
+# seconds, transaction keys are kept KEY_RETENTION_DAYS.
+IDEMPOTENCY = {
+    "CACHE_ALIAS": "default",
+    "RESPONSE_TIMEOUT": int(
+        os.environ.get("IDEMPOTENCY_RESPONSE_TIMEOUT", 600)
+    ),
+    "KEY_RETENTION_DAYS": int(
+        os.environ.get("IDEMPOTENCY_KEY_RETENTION_DAYS", 30)
+    ),
+    "PURGE_BATCH_SIZE": 10000,
+}
+
+# Cached token authentication, see user/authentication.py
+TOKEN_AUTH_CACHE = {
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": int(os.environ.get("TOKEN_AUTH_CACHE_TIMEOUT", 60)),
+}
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/3.2/topics/auth/passwords/
+# The preferred hasher can be swapped through the environment; the others
+# stay listed so existing hashes verify and are upgraded on login. Argon2
+# and bcrypt need argon2-cffi and bcrypt, which requirements.txt does not
+# install, so they are not listed.
+
+PASSWORD_HASH_ITERATIONS = int(
+    os.environ.get("PASSWORD_HASH_ITERATIONS", 260000)
+)
+
+PASSWORD_HASHERS = [
+    os.environ.get(
+        "PASSWORD_HASHER", "user.hashers.ConfigurablePBKDF2PasswordHasher"
+    ),
+]
+PASSWORD_HASHERS += [
+    hasher
+    for hasher in [
+        "user.hashers.ConfigurablePBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    ]
+    if hasher not in PASSWORD_HASHERS
+]
+
+# Token logins hash passwords in a pool of this many threads, see
+# user/login.py
+LOGIN_WORKERS = int(os.environ.get("LOGIN_WORKERS", os.cpu_count() or 1))
+LOGIN_QUEUE_SIZE = int(os.environ.get("LOGIN_QUEUE_SIZE", 64))
+
+# Async views run ORM work in a pool of this many threads, each holding a
+# database connection, see core/asyncviews.py
+ASYNC_DB_WORKERS = int(os.environ.get("ASYNC_DB_WORKERS", 20))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -138,9 +354,14 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "core.User"
 
 REST_FRAMEWORK = {
-    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_SCHEMA_CLASS": "core.schema.AutoSchema",
 }
 
+# Precomputed OpenAPI schema artifacts, see core/openapi.py
+OPENAPI_SCHEMA_DIR = os.environ.get(
+    "OPENAPI_SCHEMA_DIR", os.path.join(BASE_DIR, "openapi")
+)
+
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "static"),
@@ -13,17 +13,36 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
-from django.contrib import admin
-from django.urls import path, include
+from django.urls import URLResolver, include, path
+from django.urls.resolvers import RoutePattern
+
+from core.views import (
+    dbPoolStatsView,
+    outboxEventsView,
+    requestMetricsView,
+)
+
+
+def lazy_include(route, urlconf):
+    # path(route, include(urlconf)) that imports urlconf only once a
+    # request path starts with route (or a URL is reversed), so workers
+    # never serving the admin or the docs skip importing them
+    return URLResolver(RoutePattern(route, is_endpoint=False), urlconf)
+
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
-    path("api/schema/", SpectacularAPIView.as_view(), name="api-schema"),
+    lazy_include("admin/", "app.admin_urls"),
+    path("api/user/", include("user.urls")),
+    path("api/sales/", include("sales.urls")),
+    lazy_include("api/sales/analytics/", "app.analytics_urls"),
+    path("api/catalog/", include("catalog.urls")),
+    path("api/db-pool/", dbPoolStatsView.as_view(), name="db-pool-stats"),
     path(
-        "api/docs/",
-        SpectacularSwaggerView.as_view(url_name="api-schema"),
-        name="api-docs",
+        "api/metrics/",
+        requestMetricsView.as_view(),
+        name="request-metrics",
     ),
-    path("api/user/", include("user.urls")),
+    path("api/events/", outboxEventsView.as_view(), name="outbox-events"),
+    # After the other api/ routes, which would otherwise load it
+    lazy_include("api/", "app.docs_urls"),
 ]
@@ -0,0 +1,52 @@
+# Benchmarks, run from the app directory:
+#   python -m benchmarks.<name> [options]
+# They run against the configured database inside transactions that are
+# rolled back, so they leave no data behind.
+
+import os
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup():
+    # Configure Django for a standalone benchmark script
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+    django.setup()
+
+
+class Rollback(Exception):
+    # Raised to unwind a benchmark transaction
+    pass
+
+
+@contextmanager
+def rolled_back():
+    # Run the block in a transaction that is always discarded
+    from django.db import transaction
+
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+@contextmanager
+def timer(results, name):
+    # Store the wall time spent in the block under results[name]
+    start = time.perf_counter()
+    yield
+    results[name] = time.perf_counter() - start
+
+
+def report(title, rows, results, baseline=None):
+    # Print one line per result with throughput and speedup
+    print(title)
+    for name, seconds in results.items():
+        line = f"  {name:<24} {seconds:8.3f}s {rows / seconds:12.0f} rows/s"
+        if baseline and name != baseline:
+            line += f"  x{results[baseline] / seconds:.1f}"
+        print(line)
@@ -0,0 +1,97 @@
+# Low stock alert runs against a large catalog
+#   python -m benchmarks.alerts --variations 1000000 --touched 1000
+# Every variation has a stock row, one in a hundred under its threshold.
+# Times a first full run (opening every alert), a repeat full run (nothing
+# new, deduplicated) and an incremental run after --touched rows changed.
+
+import argparse
+import datetime
+from decimal import Decimal
+
+from benchmarks import rolled_back, setup, timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--variations", type=int, default=100000)
+    parser.add_argument("--touched", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection
+    from django.utils import timezone
+
+    from core import alerts, inventory
+    from core.models import InventoryStock, StockAlert, Variation
+    from core.tests.factories import create_location, create_product
+
+    with rolled_back():
+        product = create_product()
+        location = create_location()
+        for start in range(0, args.variations, 50000):
+            count = min(50000, args.variations - start)
+            created = Variation.objects.bulk_create(
+                [
+                    Variation(
+                        name=f"Bench {start + i}",
+                        product=product,
+                        sku=f"BENCH-{start + i}",
+                        upc="",
+                        cost_money=Decimal("1.00"),
+                        price_money=Decimal("3.00"),
+                        pricing_type="FIXED_PRICING",
+                        track_inventory=True,
+                        inventory_alert_type="LOW_QUANTITY",
+                        inventory_alert_threshold=5,
+                        item_option_values=[],
+                    )
+                    for i in range(count)
+                ],
+                batch_size=5000,
+            )
+            InventoryStock.objects.bulk_create(
+                [
+                    InventoryStock(
+                        variation=variation,
+                        location=location,
+                        quantity=1 if (start + i) % 100 == 0 else 100,
+                    )
+                    for i, variation in enumerate(created)
+                ],
+                batch_size=5000,
+            )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        results = {}
+        with timer(results, "first full run"):
+            opened, _ = alerts.evaluate(full=True)
+        print(f"{args.variations} variations, {len(opened)} alerts")
+        with timer(results, "repeat full run"):
+            alerts.evaluate(full=True)
+
+        # Age every row past the watermark, then sell some low
+        InventoryStock.objects.update(
+            updated_at=timezone.now() - datetime.timedelta(days=1)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        touched = InventoryStock.objects.filter(quantity=100).values_list(
+            "variation_id", flat=True
+        )[: args.touched]
+        for variation_id in touched:
+            inventory.move(variation_id, location.pk, -96, "SALE")
+        with timer(results, f"incremental ({args.touched} touched)"):
+            opened, _ = alerts.evaluate()
+        assert len(opened) == args.touched, len(opened)
+        assert StockAlert.objects.count() == args.variations // 100 + len(
+            opened
+        )
+
+    print("Low stock alert runs")
+    for name, seconds in results.items():
+        print(f"  {name:<28} {seconds * 1000:9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# Vectorized analytics vs the equivalent ORM loops over transactions
+#   python -m benchmarks.analytics --rows 10000000
+# Rows are generated in SQL (bulk_create is too slow for tens of millions)
+# over the past year, 50 employees and 20 locations. Each report runs once
+# as a loop over model instances and once through core.analytics, then
+# from its cache.
+
+import argparse
+import time
+from collections import defaultdict
+
+from benchmarks import rolled_back, setup, timer
+
+
+def orm_revenue(queryset):
+    totals = defaultdict(lambda: [0, 0, 0])
+    for transaction in queryset.iterator(chunk_size=2000):
+        row = totals[
+            transaction.created_at.replace(minute=0, second=0, microsecond=0)
+        ]
+        row[0] += 1
+        row[1] += transaction.amount_money
+        row[2] += transaction.tip_money
+    return totals
+
+
+def orm_tips_by_employee(queryset):
+    totals = defaultdict(lambda: [0, 0])
+    for transaction in queryset.iterator(chunk_size=2000):
+        row = totals[transaction.employee_id]
+        row[0] += transaction.amount_money
+        row[1] += transaction.tip_money
+    return {key: tip * 100 / amount for key, (amount, tip) in totals.items()}
+
+
+def orm_fees_by_location(queryset):
+    totals = defaultdict(lambda: [0, 0])
+    for transaction in queryset.iterator(chunk_size=2000):
+        row = totals[transaction.location_id]
+        row[0] += transaction.amount_money
+        row[1] += transaction.processing_fee_money
+    return {key: fee / amount for key, (amount, fee) in totals.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    setup()
+    from django.core.cache import caches
+    from django.db import connection
+
+    from core import analytics
+    from core.models import Transaction
+    from core.tests.factories import (
+        create_customer,
+        create_employee,
+        create_location,
+        create_order,
+    )
+
+    reports = {
+        "revenue": (orm_revenue, {"bucket": "hour"}),
+        "tips_by_employee": (orm_tips_by_employee, {}),
+        "fees_by_location": (orm_fees_by_location, {}),
+    }
+
+    with rolled_back():
+        order = create_order()
+        customer = create_customer()
+        employees = [create_employee().pk for _ in range(50)]
+        locations = [create_location().pk for _ in range(20)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO core_transaction (order_id, location_id, "
+                "created_at, tender, amount_money, tip_money, "
+                "processing_fee_money, client_id, customer_id, employee_id, "
+                "refunds, reference_id, product) "
+                "SELECT %s, (%s::int[])[1 + n %% 20], "
+                "now() - (n %% 525600) * interval '1 minute', '[]', "
+                "(1 + n %% 9999) / 100.0, (n %% 500) / 100.0, "
+                "(3 + n %% 290) / 100.0, '', %s, (%s::int[])[1 + n %% 50], "
+                "'[]', '', '{}' FROM generate_series(1, %s) n",
+                [order.pk, locations, customer.pk, employees, args.rows],
+            )
+            cursor.execute("ANALYZE core_transaction")
+        # Only the benchmarked reports' analytics: keys are deleted, the
+        # rest of the cache (which may be shared) is left alone
+        cache = caches[analytics.config()["CACHE_ALIAS"]]
+        keys = [
+            analytics.signature(name, params)
+            for name, (_, params) in reports.items()
+        ]
+        cache.delete_many(keys)
+
+        print(f"{args.rows} transactions")
+        for name, (orm_loop, params) in reports.items():
+            results = {}
+            with timer(results, "orm loop"):
+                orm_loop(Transaction.objects.all())
+            with timer(results, "vectorized"):
+                analytics.run(name, **params)
+            start = time.perf_counter()
+            analytics.run(name, **params)
+            cached = time.perf_counter() - start
+
+            print(
+                f"  {name:<18} orm loop {results['orm loop']:7.1f}s"
+                f"  vectorized {results['vectorized']:6.1f}s"
+                f"  x{results['orm loop'] / results['vectorized']:.1f}"
+                f"  cached {cached * 1000:.2f}ms"
+            )
+        cache.delete_many(keys)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# WSGI vs ASGI throughput and latency of the catalog API under uvicorn
+#   python -m benchmarks.asgi --connections 1000 --duration 10
+# Starts uvicorn twice, serving app.wsgi (uvicorn's threaded WSGI adapter)
+# and app.asgi (the async views), and drives each with keep-alive
+# connections each sending one request after another. Unlike the other
+# benchmarks the servers need committed data, which is deleted afterwards.
+
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks import setup
+
+# Requests without a response by then count as errors
+RESPONSE_TIMEOUT = 30
+
+SERVERS = {
+    "wsgi": ["app.wsgi:application", "--interface", "wsgi"],
+    "asgi": ["app.asgi:application"],
+}
+
+
+async def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+        else:
+            writer.close()
+            return
+
+
+async def exchange(reader, writer, request):
+    # Send one request and read its response, returns the status line
+    writer.write(request)
+    status = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.partition(b":")
+        if name.lower() == b"content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def connection(port, request, deadline, latencies, errors):
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection("127.0.0.1", port), RESPONSE_TIMEOUT
+        )
+    except (OSError, asyncio.TimeoutError) as exc:
+        errors.append(type(exc).__name__)
+        return
+    try:
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            status = await asyncio.wait_for(
+                exchange(reader, writer, request), RESPONSE_TIMEOUT
+            )
+            if not status.startswith(b"HTTP/1.1 200"):
+                errors.append(status)
+                break
+            latencies.append(time.perf_counter() - start)
+    except (OSError, EOFError, asyncio.TimeoutError) as exc:
+        errors.append(type(exc).__name__)
+    finally:
+        writer.close()
+
+
+async def load(port, path, token, connections, duration):
+    await wait_for_port(port)
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Authorization: Token {token}\r\n\r\n"
+    ).encode()
+    latencies, errors = [], []
+    # Warm the caches and connections before measuring
+    await connection(port, request, time.monotonic() + 1, [], [])
+    start = time.monotonic()
+    await asyncio.gather(
+        *[
+            connection(port, request, start + duration, latencies, errors)
+            for _ in range(connections)
+        ]
+    )
+    return latencies, errors, time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--path", default="/api/catalog/products/")
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    # One descriptor per connection on each side, plus headroom
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = min(hard, max(soft, args.connections * 2 + 256))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from rest_framework.authtoken.models import Token
+
+    from core.tests.factories import create_product, create_variation
+
+    user = get_user_model().objects.create_user(
+        email="bench-asgi@example.com", password="benchpass"
+    )
+    token = Token.objects.create(user=user)
+    product = create_product(name="Bench coffee")
+    create_variation(product=product)
+
+    print(
+        f"GET {args.path}, {args.connections} connections,"
+        f" {args.duration:.0f}s per server"
+    )
+    try:
+        for offset, (name, target) in enumerate(SERVERS.items()):
+            port = args.port + offset
+            server = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", *target]
+                + ["--port", str(port), "--log-level", "warning"]
+                + ["--backlog", str(args.connections * 2)],
+                env=os.environ,
+            )
+            try:
+                latencies, errors, elapsed = asyncio.run(
+                    load(
+                        port,
+                        args.path,
+                        token.key,
+                        args.connections,
+                        args.duration,
+                    )
+                )
+            finally:
+                server.terminate()
+                try:
+                    server.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    # SIGTERM can be lost while the server is overloaded
+                    server.kill()
+                    server.wait()
+
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0
+            print(
+                f"  {name:<6} {len(latencies) / elapsed:9.0f} req/s"
+                f"  p50 {statistics.median(latencies or [0]) * 1000:7.1f}ms"
+                f"  p99 {p99 * 1000:7.1f}ms  errors {len(errors)}"
+            )
+    finally:
+        product.category.delete()
+        user.delete()
+
+
+if __name__ == "__main__":
+    main()
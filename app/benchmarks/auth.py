@@ -0,0 +1,66 @@
+# Queries and latency per authenticated request to the user "me" endpoint
+#   python -m benchmarks.auth --requests 2000
+
+import argparse
+
+from benchmarks import report, rolled_back, setup, timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.authentication import TokenAuthentication
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIRequestFactory
+
+    from user.authentication import CachedTokenAuthentication, stats
+    from user.views import manageUserView
+
+    classes = {
+        "TokenAuthentication": TokenAuthentication,
+        "CachedTokenAuthentication": CachedTokenAuthentication,
+    }
+    results = {}
+    queries = {}
+    with rolled_back():
+        user = get_user_model().objects.create_user(
+            email="bench@example.com", password="benchpass"
+        )
+        token = Token.objects.create(user=user)
+        factory = APIRequestFactory()
+        cache.clear()
+
+        for name, authentication_class in classes.items():
+            view = manageUserView.as_view(
+                authentication_classes=[authentication_class]
+            )
+            with CaptureQueriesContext(connection) as captured:
+                with timer(results, name):
+                    for _ in range(args.requests):
+                        request = factory.get(
+                            "/api/user/me/",
+                            HTTP_AUTHORIZATION=f"Token {token.key}",
+                        )
+                        view(request)
+            queries[name] = len(captured) / args.requests
+
+    report(
+        "Authenticated GET /api/user/me/ (rows = requests)",
+        args.requests,
+        results,
+        baseline="TokenAuthentication",
+    )
+    for name, count in queries.items():
+        print(f"  {name:<24} {count:8.2f} queries/request")
+    print(f"  cache hits {stats['hits']} misses {stats['misses']}")
+
+
+if __name__ == "__main__":
+    main()
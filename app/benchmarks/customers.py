@@ -0,0 +1,143 @@
+# Customer lifetime value: Python loops vs the materialized views
+#   python -m benchmarks.customers --customers 100000 --transactions 1000000
+# Times summing Customer.transactions in Python for --sample customers,
+# refreshing the views (concurrently and blocking) and the latency of the
+# segment and customer value endpoints.
+
+import argparse
+import datetime
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from benchmarks import rolled_back, setup, timer
+
+
+def latency(view, request, runs=200):
+    # Median and p99 of calling view(request), in milliseconds
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        response = view(request)
+        response.render()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--customers", type=int, default=20000)
+    parser.add_argument("--transactions", type=int, default=200000)
+    parser.add_argument("--sample", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.utils import timezone
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from core import customer_value
+    from core.models import Customer, Transaction
+    from core.tests.factories import (
+        create_employee,
+        create_location,
+        create_order,
+    )
+    from sales.views import customerSegmentListView, customerValueListView
+
+    with rolled_back():
+        now = timezone.now()
+        customers = Customer.objects.bulk_create(
+            [
+                Customer(
+                    given_name="Bench",
+                    family_name=str(n),
+                    company_name="",
+                    nickname="",
+                    email_address=f"bench{n}@example.com",
+                    address="",
+                    phone_number="",
+                    reference_id="",
+                    group_id="",
+                    created_at=now,
+                    updated_at=now,
+                )
+                for n in range(args.customers)
+            ],
+            batch_size=5000,
+        )
+        order = create_order()
+        location = create_location()
+        employee = create_employee()
+        rng = random.Random(0)
+        for start in range(0, args.transactions, 50000):
+            count = min(50000, args.transactions - start)
+            Transaction.objects.bulk_create(
+                [
+                    Transaction(
+                        order=order,
+                        location=location,
+                        customer=rng.choice(customers),
+                        employee=employee,
+                        created_at=now
+                        - datetime.timedelta(minutes=rng.randrange(525600)),
+                        tender=[],
+                        amount_money=Decimal(rng.randrange(100, 10000)) / 100,
+                        tip_money=Decimal(rng.randrange(0, 500)) / 100,
+                        processing_fee_money=Decimal("0.30"),
+                        client_id="",
+                        refunds=[],
+                        reference_id="",
+                        product={},
+                    )
+                    for _ in range(count)
+                ],
+                batch_size=5000,
+            )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        results = {}
+        sample = customers[: args.sample]
+        with timer(results, f"python, {len(sample)} customers"):
+            for customer in sample:
+                spend = visits = 0
+                last = None
+                for row in customer.transactions.all():
+                    spend += row.amount_money + row.tip_money
+                    visits += 1
+                    last = max(last or row.created_at, row.created_at)
+        with timer(results, "refresh, concurrently"):
+            customer_value.refresh()
+        with timer(results, "refresh, blocking"):
+            customer_value.refresh(concurrently=False)
+
+        user = get_user_model().objects.create_user(
+            email="bench@example.com", password="benchpass"
+        )
+        factory = APIRequestFactory()
+        reads = {
+            "segments": (customerSegmentListView, {}),
+            "customers, one segment": (
+                customerValueListView,
+                {"segment": "champions"},
+            ),
+        }
+        timings = {}
+        for name, (view, params) in reads.items():
+            request = factory.get("/", params, HTTP_HOST="localhost")
+            force_authenticate(request, user=user)
+            timings[name] = latency(view.as_view(), request)
+
+    print(f"{args.customers} customers, {args.transactions} transactions")
+    for name, seconds in results.items():
+        print(f"  {name:<28} {seconds:8.2f}s")
+    for name, (median, p99) in timings.items():
+        print(f"  GET {name:<24} p50 {median:6.2f}ms  p99 {p99:6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# Latency of GET /api/user/me/ with each database connection mode
+#   python -m benchmarks.dbpool --requests 2000 --threads 4
+# Requests go through Django's WSGI handler, so connections are opened and
+# closed (or returned to the pool) at request boundaries as in production.
+# The token cache is disabled so every request queries the database. Like
+# benchmarks.asgi this needs committed data, which is deleted afterwards.
+
+import argparse
+import io
+import os
+import statistics
+import threading
+import time
+
+from benchmarks import setup
+
+MODES = {
+    "connect per request": {"CONN_MAX_AGE": 0, "POOL": None},
+    "persistent": {
+        "CONN_MAX_AGE": 60,
+        "CONN_HEALTH_CHECKS": False,
+        "POOL": None,
+    },
+    "persistent + checks": {
+        "CONN_MAX_AGE": 60,
+        "CONN_HEALTH_CHECKS": True,
+        "POOL": None,
+    },
+    "pool": {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": True},
+}
+
+
+def environ(token):
+    return {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": "/api/user/me/",
+        "QUERY_STRING": "",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_AUTHORIZATION": f"Token {token}",
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": io.StringIO(),
+    }
+
+
+def client(application, token, requests, latencies):
+    from django.db import connection
+
+    def start_response(status, headers):
+        assert status.startswith("200"), status
+
+    for _ in range(requests):
+        start = time.perf_counter()
+        b"".join(application(environ(token), start_response))
+        latencies.append(time.perf_counter() - start)
+    # Persistent connections of this thread would outlive it
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    os.environ["TOKEN_AUTH_CACHE_TIMEOUT"] = "0"
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connections
+    from rest_framework.authtoken.models import Token
+
+    settings_dict = connections.settings["default"]
+    user = get_user_model().objects.create_user(
+        email="bench-dbpool@example.com", password="benchpass"
+    )
+    token = Token.objects.create(user=user)
+    connections["default"].close()
+    application = WSGIHandler()
+    pool_options = {"MAX_SIZE": args.threads, "MAX_OVERFLOW": 0}
+
+    per_thread = args.requests // args.threads
+    print(
+        f"GET /api/user/me/, {args.threads} threads x {per_thread} requests"
+    )
+    try:
+        for name, options in MODES.items():
+            settings_dict.update(options)
+            if name == "pool":
+                settings_dict["POOL"] = pool_options
+            latencies = []
+            threads = [
+                threading.Thread(
+                    target=client,
+                    args=(application, token.key, per_thread, latencies),
+                )
+                for _ in range(args.threads)
+            ]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99)]
+            print(
+                f"  {name:<20} {len(latencies) / elapsed:7.0f} req/s"
+                f"  p50 {statistics.median(latencies) * 1000:6.2f}ms"
+                f"  p99 {p99 * 1000:6.2f}ms"
+            )
+        stats = connections["default"].pool.stats()
+        print(
+            f"  pool: opened {stats['opened']} reused {stats['reused']}"
+            f" waits {stats['waits']} wait time {stats['wait_time']:.3f}s"
+        )
+    finally:
+        settings_dict.update(MODES["connect per request"])
+        connections["default"].close()
+        user.delete()
+
+
+if __name__ == "__main__":
+    main()
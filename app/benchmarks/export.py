@@ -0,0 +1,70 @@
+# Peak Python memory of the NDJSON order export for growing row counts
+#   python -m benchmarks.export --rows 10000 --rows 100000
+
+import argparse
+import tracemalloc
+
+from benchmarks import rolled_back, setup
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, action="append")
+    args = parser.parse_args()
+    sizes = args.rows or [10000, 100000]
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from core.models import Order
+    from sales.views import orderExportView
+
+    print("Order export peak memory")
+    for size in sizes:
+        with rolled_back():
+            user = get_user_model().objects.create_user(
+                email="bench@example.com", password="benchpass"
+            )
+            now = timezone.now()
+            Order.objects.bulk_create(
+                [
+                    Order(
+                        buyer_email="bench@example.com",
+                        recipient_name="Bench",
+                        recipient_phone_number="",
+                        state="COMPLETED",
+                        shipping_address={},
+                        billing_address={},
+                        line_items=[{"name": "Coffee", "quantity": "1"}],
+                        taxes=[],
+                        discounts=[],
+                        service_charges=[],
+                        fulfillments=[],
+                        refunds=[],
+                        created_at=now,
+                        updated_at=now,
+                    )
+                    for _ in range(size)
+                ],
+                batch_size=5000,
+            )
+
+            request = APIRequestFactory().get("/api/sales/orders/export/")
+            force_authenticate(request, user=user)
+
+            tracemalloc.start()
+            response = orderExportView.as_view()(request)
+            written = sum(len(chunk) for chunk in response.streaming_content)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        print(
+            f"  {size:>9} rows {written / 2**20:9.1f} MiB streamed"
+            f" {peak / 2**20:9.1f} MiB peak"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+# Model factories shared by the benchmarks
+
+from core.tests import factories
+
+
+def create_sale_parties():
+    # Create and return an order, location, customer and employee
+    return (
+        factories.create_order(),
+        factories.create_location(),
+        factories.create_customer(),
+        factories.create_employee(),
+    )
@@ -0,0 +1,59 @@
+# Compare bulk transaction ingestion against one ORM save per row
+#   python -m benchmarks.ingest --rows 20000
+
+import argparse
+
+from benchmarks import report, rolled_back, setup, timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    setup()
+    from core.models import Transaction
+    from sales import ingest
+
+    results = {}
+    with rolled_back():
+        from benchmarks.fixtures import create_sale_parties
+
+        order, location, customer, employee = (
+            party.pk for party in create_sale_parties()
+        )
+        rows = [
+            {
+                "order": order,
+                "location": location,
+                "customer": customer,
+                "employee": employee,
+                "created_at": "2023-05-01T12:00:00Z",
+                "tender": [{"type": "CARD"}],
+                "amount_money": "10.50",
+                "tip_money": "1.00",
+                "processing_fee_money": "0.30",
+                "client_id": f"bench-{i}",
+                "reference_id": "",
+                "product": {},
+            }
+            for i in range(args.rows)
+        ]
+
+        with timer(results, "per-row save"):
+            for row in rows:
+                data, _ = ingest.validate_row(row)
+                for key in ingest.FOREIGN_KEYS:
+                    data[f"{key}_id"] = data.pop(key)
+                Transaction.objects.create(**data)
+
+        records = ((i, row, None) for i, row in enumerate(rows, start=1))
+        with timer(results, "bulk ingest"):
+            created, duplicates, errors = ingest.load_transactions(records)
+        assert created == args.rows and not duplicates and not errors
+
+    report("Transaction ingestion", args.rows, results, "per-row save")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Token login throughput, inline hashing vs the login pool
+#   python -m benchmarks.login --logins 200 --iterations 260000
+# "inline" is what ASGI got before: every login hashed in the one thread
+# running sync views. "pool" awaits logins whose hashing runs in
+# user.login's worker pool.
+
+import argparse
+import asyncio
+import os
+
+from benchmarks import report, rolled_back, setup, timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--iterations", type=int)
+    args = parser.parse_args()
+
+    setup()
+    from asgiref.sync import async_to_sync
+    from django.conf import settings
+    from django.contrib.auth import authenticate, get_user_model
+
+    from user import login
+
+    if args.iterations:
+        settings.PASSWORD_HASH_ITERATIONS = args.iterations
+    cores = len(os.sched_getaffinity(0))
+    # Queue every login, this measures throughput rather than shedding
+    login.pool = login.LoginPool(settings.LOGIN_WORKERS, args.logins)
+
+    async def pooled():
+        await asyncio.gather(
+            *[
+                login.aauthenticate_user(None, "bench@example.com", "pass")
+                for _ in range(args.logins)
+            ]
+        )
+
+    results = {}
+    with rolled_back():
+        get_user_model().objects.create_user(
+            email="bench@example.com", password="pass"
+        )
+        with timer(results, "inline"):
+            for _ in range(args.logins):
+                authenticate(username="bench@example.com", password="pass")
+        with timer(results, "pool"):
+            async_to_sync(pooled)()
+
+    report(
+        f"Token logins, {settings.PASSWORD_HASH_ITERATIONS} iterations,"
+        f" {settings.LOGIN_WORKERS} workers (rows = logins)",
+        args.logins,
+        results,
+        baseline="inline",
+    )
+    for name, seconds in results.items():
+        print(
+            f"  {name:<24} {args.logins / seconds / cores:8.1f}"
+            f" logins/s per core ({cores} cores)"
+        )
+
+
+if __name__ == "__main__":
+    main()
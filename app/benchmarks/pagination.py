@@ -0,0 +1,122 @@
+# Page loads with exact COUNT(*) vs estimated counts on a large table
+#   python -m benchmarks.pagination --rows 50000000
+# Orders are generated in SQL over the past year and analyzed. The order
+# admin changelist is loaded with Django's paginator and full result count
+# (two COUNT(*) per page) and with core.pagination, unfiltered and filtered
+# to one state; the order API is loaded with ?count=true. Counts are not
+# served from the cache, each load pays for its count.
+
+import argparse
+import statistics
+import time
+from unittest.mock import patch
+
+from benchmarks import rolled_back, setup
+
+
+def median_load(client, url, params, repeat):
+    # Median seconds to load url, dropping the counts it cached before each
+    # load. Only those estimated-count: keys are deleted, the rest of the
+    # cache (which may be shared) is left alone
+    from django.core.cache import caches
+
+    from core import pagination
+
+    cache = caches[pagination.config()["CACHE_ALIAS"]]
+    keys = set()
+
+    def count_key(queryset):
+        key = real_count_key(queryset)
+        keys.add(key)
+        return key
+
+    real_count_key = pagination.count_key
+    samples = []
+    with patch.object(pagination, "count_key", count_key):
+        for _ in range(repeat):
+            cache.delete_many(keys)
+            start = time.perf_counter()
+            response = client.get(url, params)
+            if hasattr(response, "render"):
+                response.render()
+            samples.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.status_code
+    cache.delete_many(keys)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.core.paginator import Paginator
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from core.admin import OrderAdmin
+
+    setup_test_environment()
+    admin_url = reverse("admin:core_order_changelist")
+    api_url = reverse("sales:order-list")
+    loads = [
+        ("admin", admin_url, {}),
+        ("admin ?state=OPEN", admin_url, {"state": "OPEN"}),
+    ]
+
+    with rolled_back():
+        user = get_user_model().objects.create_superuser(
+            email="bench@example.com", password="benchpass"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO core_order (buyer_email, recipient_name, "
+                "recipient_phone_number, state, shipping_address, "
+                "billing_address, note, line_items, taxes, discounts, "
+                "service_charges, fulfillments, refunds, created_at, "
+                "updated_at, items_normalized) "
+                "SELECT 'buyer' || n %% 100000 || '@example.com', 'Buyer', "
+                "'', CASE WHEN n %% 50 = 0 THEN 'OPEN' ELSE 'COMPLETED' END, "
+                "'{}', '{}', '', '[]', '[]', '[]', '[]', '[]', '[]', "
+                "now() - (n %% 525600) * interval '1 minute', now(), true "
+                "FROM generate_series(1, %s) n",
+                [args.rows],
+            )
+            cursor.execute("ANALYZE core_order")
+
+        admin_client = Client()
+        admin_client.force_login(user)
+        api_client = APIClient()
+        api_client.force_authenticate(user=user)
+
+        print(f"{args.rows} orders, median page load")
+        for name, url, params in loads:
+            with patch.multiple(
+                OrderAdmin, paginator=Paginator, show_full_result_count=True
+            ):
+                exact = median_load(admin_client, url, params, args.repeat)
+            estimated = median_load(admin_client, url, params, args.repeat)
+            print(
+                f"  {name:<20} exact {exact * 1000:9.1f}ms"
+                f"  estimated {estimated * 1000:9.1f}ms"
+                f"  x{exact / estimated:.1f}"
+            )
+
+        plain = median_load(api_client, api_url, {}, args.repeat)
+        counted = median_load(
+            api_client, api_url, {"count": "true"}, args.repeat
+        )
+        print(
+            f"  {'api ?count=true':<20} no count {plain * 1000:6.1f}ms"
+            f"  estimated {counted * 1000:9.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Response time and CPU per /api/schema/ request, dynamic vs precomputed
+#   python -m benchmarks.schema --requests 50
+
+import argparse
+import contextlib
+import io
+import time
+
+from benchmarks import setup
+
+
+def get(view, headers):
+    from rest_framework.test import APIRequestFactory
+
+    response = view(APIRequestFactory().get("/api/schema/", **headers))
+    if hasattr(response, "render"):
+        response.render()
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    setup()
+    from drf_spectacular.views import SpectacularAPIView
+
+    from core.openapi import cachedSchemaView, load
+
+    version, _ = load()
+    json = {"HTTP_ACCEPT": "application/json"}
+    gzip = {"HTTP_ACCEPT_ENCODING": "gzip"}
+    cases = {
+        "dynamic yaml": (SpectacularAPIView, {}),
+        "dynamic json": (SpectacularAPIView, json),
+        "cached yaml": (cachedSchemaView, {}),
+        "cached json": (cachedSchemaView, json),
+        "cached yaml gzip": (cachedSchemaView, gzip),
+        "cached 304": (
+            cachedSchemaView,
+            {"HTTP_IF_NONE_MATCH": f'"{version}-yaml"'},
+        ),
+    }
+
+    print(f"GET /api/schema/ x {args.requests}")
+    baseline = None
+    for name, (view_class, headers) in cases.items():
+        view = view_class.as_view(urlconf="app.urls")
+        # The generator reports its warnings on stderr every time
+        with contextlib.redirect_stderr(io.StringIO()):
+            get(view, headers)
+            wall, cpu = time.perf_counter(), time.process_time()
+            for _ in range(args.requests):
+                response = get(view, headers)
+            wall = (time.perf_counter() - wall) / args.requests
+            cpu = (time.process_time() - cpu) / args.requests
+        baseline = baseline or wall
+        print(
+            f"  {name:<18} {wall * 1000:8.2f}ms  cpu {cpu * 1000:8.2f}ms"
+            f"  {len(response.content):6d} bytes  x{baseline / wall:.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
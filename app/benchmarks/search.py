@@ -0,0 +1,152 @@
+# Product search latency against a large catalog
+#   python -m benchmarks.search --products 1000000
+# Products and one variation each are generated in SQL, named from small
+# word lists so common words match thousands of rows and rare ones a few.
+# Search vectors are backfilled the way migration 0013 does. Each query
+# runs --repeat times through catalog.search and, as the baseline, as an
+# icontains filter over name, description, UPC and SKU.
+
+import argparse
+import statistics
+import time
+
+from benchmarks import rolled_back, setup, timer
+
+ADJECTIVES = [
+    "cold", "iced", "hot", "dark", "light", "smoked", "spiced", "sweet",
+    "salted", "roasted", "double", "single", "organic", "vanilla", "honey",
+    "maple", "mocha", "caramel", "hazelnut", "matcha",
+]
+NOUNS = [
+    "brew", "espresso", "latte", "mocha", "bagel", "muffin", "scone",
+    "croissant", "cookie", "tea", "chai", "cocoa", "sandwich", "salad",
+    "granola", "yogurt", "smoothie", "juice", "biscotti", "brownie",
+    "macchiato", "cortado", "americano", "frappe", "donut",
+]
+
+QUERIES = [
+    "brew",
+    "cold brew",
+    "roasted hazel",
+    "espr",
+    "macchiato 4242",
+    "SKU-000424",
+    "sku-00999",
+    "001000000424",
+]
+
+
+def latencies(func, queries, repeat):
+    # Seconds per call of func(query), every query repeat times
+    samples = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            func(query)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--baseline-repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection
+    from django.db.models import Q
+
+    from catalog.search import has_trigram, search, update_search_vectors
+    from core.models import Product
+    from core.tests.factories import create_category
+
+    def ranked_search(text):
+        return list(search(text))
+
+    def icontains(text):
+        return list(
+            Product.objects.filter(
+                Q(name__icontains=text)
+                | Q(description__icontains=text)
+                | Q(UPC__icontains=text)
+                | Q(variations__sku__icontains=text)
+            )
+            .distinct()
+            .prefetch_related("variations")
+            .order_by("product_id")[:20]
+        )
+
+    results = {}
+    with rolled_back():
+        category = create_category()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO core_product (name, category_id, \"UPC\", "
+                "description, price, cost, available_online, "
+                "available_for_pickup, available_electronically, is_service, "
+                "track_inventory, inventory_alert_type, "
+                "inventory_alert_threshold, product_data) "
+                "SELECT initcap((%s::text[])[1 + n %% 20] || ' ' "
+                "|| (%s::text[])[1 + n / 20 %% 25]) || ' ' || n, %s, "
+                "lpad((1000000000000 + n)::text, 12, '0'), "
+                "'Made with ' || (%s::text[])[1 + n / 7 %% 20] || ' ' "
+                "|| (%s::text[])[1 + n / 11 %% 25] || ', served daily', "
+                "3.00, 1.00, true, true, false, false, true, 'NONE', 0, '{}' "
+                "FROM generate_series(1, %s) AS n",
+                [
+                    ADJECTIVES,
+                    NOUNS,
+                    category.pk,
+                    ADJECTIVES,
+                    NOUNS,
+                    args.products,
+                ],
+            )
+            cursor.execute(
+                "INSERT INTO core_variation (name, product_id, sku, upc, "
+                "cost_money, price_money, pricing_type, track_inventory, "
+                "inventory_alert_type, inventory_alert_threshold, "
+                "item_option_values) "
+                "SELECT 'Regular', product_id, "
+                "'SKU-' || lpad(row_number() OVER ()::text, 9, '0'), '', "
+                "1.00, 3.00, 'FIXED_PRICING', true, 'NONE', 0, '[]' "
+                "FROM core_product WHERE category_id = %s",
+                [category.pk],
+            )
+        with timer(results, "backfill vectors"):
+            update_search_vectors(category=category)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        # Warm the caches, then measure
+        latencies(ranked_search, QUERIES, 1)
+        ranked = latencies(ranked_search, QUERIES, args.repeat)
+        baseline = latencies(icontains, QUERIES, args.baseline_repeat)
+        per_query = {
+            text: statistics.median(
+                latencies(ranked_search, [text], 5)
+            )
+            for text in QUERIES
+        }
+
+    print(
+        f"{args.products} products, pg_trgm "
+        f"{'installed' if has_trigram() else 'not installed'}"
+    )
+    print(f"  backfill vectors    {results['backfill vectors']:9.1f}s")
+    for name, samples in (("search", ranked), ("icontains", baseline)):
+        samples.sort()
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(
+            f"  {name:<12} p50 {statistics.median(samples) * 1000:9.1f}ms"
+            f"  p99 {p99 * 1000:9.1f}ms"
+        )
+    print("Search p50 per query")
+    for text, seconds in per_query.items():
+        print(f"  {text:<18} {seconds * 1000:9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+# URL Mappings for the async Catalog API, see app/asgi_urls.py
+
+from django.urls import path
+from catalog import views
+
+app_name = "catalog"
+
+urlpatterns = [
+    path(
+        "categories/",
+        views.categoryListView.as_async_view(),
+        name="category-list",
+    ),
+    path(
+        "products/",
+        views.productListView.as_async_view(),
+        name="product-list",
+    ),
+    path(
+        "search/",
+        views.productSearchView.as_async_view(),
+        name="product-search",
+    ),
+    path(
+        "products/<int:pk>/",
+        views.productDetailView.as_async_view(),
+        name="product-detail",
+    ),
+]
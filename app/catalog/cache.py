@@ -0,0 +1,178 @@
+# Two tier cache for catalog reads
+#
+# Reads look in a small in-process LRU first, then in the shared Django
+# cache (locmem, Redis, memcached... whatever CACHES configures) and only
+# then hit the database. Shared keys are namespaced by a generation number
+# that every catalog write bumps, so one increment invalidates everything;
+# other processes' LRU entries expire after LOCAL_TIMEOUT seconds.
+#
+# Concurrent misses on the same key are collapsed: threads of a process
+# wait on a per-key lock and processes race for a short-lived lock key
+# added to the shared cache, so only one of them runs the query.
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.asyncviews import database_sync_to_async
+
+DEFAULTS = {
+    "CACHE_ALIAS": "default",
+    "KEY_PREFIX": "catalog",
+    "TIMEOUT": 300,
+    "LOCAL_MAX_ENTRIES": 1024,
+    "LOCAL_TIMEOUT": 5,
+    "LOCK_TIMEOUT": 10,
+    "LOCK_POLL_INTERVAL": 0.05,
+}
+
+_missing = object()
+
+
+class LocalLRU:
+    # Thread safe, size bounded LRU with per entry expiry
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _missing
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return _missing
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class TwoTierCache:
+    # Read-through cache with an in-process tier and a shared tier
+
+    def __init__(self, **options):
+        config = dict(DEFAULTS)
+        config.update(getattr(settings, "CATALOG_CACHE", {}))
+        config.update(options)
+        self.config = config
+        self.local = LocalLRU(
+            config["LOCAL_MAX_ENTRIES"], config["LOCAL_TIMEOUT"]
+        )
+        self.hits = {"local": 0, "shared": 0}
+        self.misses = 0
+        # Striped so the number of locks stays fixed however many keys
+        self._key_locks = [threading.Lock() for _ in range(64)]
+
+    @property
+    def shared(self):
+        return caches[self.config["CACHE_ALIAS"]]
+
+    @property
+    def generation_key(self):
+        return f"{self.config['KEY_PREFIX']}:generation"
+
+    def _generation(self):
+        generation = self.shared.get(self.generation_key)
+        if generation is None:
+            # Seeded from the clock so an evicted counter cannot restart
+            # at a generation that still has entries cached under it
+            seed = int(time.time() * 1000)
+            self.shared.add(self.generation_key, seed, timeout=None)
+            generation = self.shared.get(self.generation_key, seed)
+        return generation
+
+    def _key_lock(self, key):
+        return self._key_locks[hash(key) % len(self._key_locks)]
+
+    def get_or_load(self, key, loader):
+        # Return the cached value for key, calling loader() on a miss
+        value = self.local.get(key)
+        if value is not _missing:
+            self.hits["local"] += 1
+            return value
+
+        prefix = self.config["KEY_PREFIX"]
+        shared_key = f"{prefix}:{self._generation()}:{key}"
+        with self._key_lock(shared_key):
+            # Another thread may have filled it while we waited
+            value = self.local.get(key)
+            if value is not _missing:
+                self.hits["local"] += 1
+                return value
+
+            value = self._get_shared(shared_key, loader)
+            self.local.set(key, value)
+            return value
+
+    async def aget_or_load(self, key, loader):
+        # get_or_load() for async views: local hits are served on the event
+        # loop, anything that may block runs in the async database pool
+        value = self.local.get(key)
+        if value is not _missing:
+            self.hits["local"] += 1
+            return value
+        return await database_sync_to_async(self.get_or_load)(key, loader)
+
+    def _get_shared(self, shared_key, loader):
+        value = self.shared.get(shared_key, _missing)
+        if value is not _missing:
+            self.hits["shared"] += 1
+            return value
+
+        lock_key = f"{shared_key}:lock"
+        lock_timeout = self.config["LOCK_TIMEOUT"]
+        deadline = time.monotonic() + lock_timeout
+        locked = self.shared.add(lock_key, 1, timeout=lock_timeout)
+        while not locked and time.monotonic() < deadline:
+            # Another process is loading, wait for its result
+            time.sleep(self.config["LOCK_POLL_INTERVAL"])
+            value = self.shared.get(shared_key, _missing)
+            if value is not _missing:
+                self.hits["shared"] += 1
+                return value
+            locked = self.shared.add(lock_key, 1, timeout=lock_timeout)
+
+        try:
+            if locked:
+                # The previous holder may have stored it before releasing
+                value = self.shared.get(shared_key, _missing)
+                if value is not _missing:
+                    self.hits["shared"] += 1
+                    return value
+            self.misses += 1
+            value = loader()
+            self.shared.set(shared_key, value, self.config["TIMEOUT"])
+        finally:
+            if locked:
+                self.shared.delete(lock_key)
+        return value
+
+    def invalidate(self):
+        # Drop every cached catalog entry
+        self.local.clear()
+        try:
+            self.shared.incr(self.generation_key)
+        except ValueError:
+            # No generation yet, nothing has been cached under one
+            pass
+
+
+catalog_cache = TwoTierCache()
@@ -0,0 +1,113 @@
+# Ranked product search
+#
+# Products keep a weighted tsvector of their name and UPC (A) and
+# description (B) in Product.search_vector, GIN indexed. It is rewritten
+# whenever a product is saved (catalog.signals); queryset.update() and
+# bulk_create() bypass this, call update_search_vectors() after them.
+#
+# A search matches any of:
+#   - every word of the query, the last one as a prefix ("cold bre"
+#     finds "Cold Brew"), against the search vector
+#   - names similar to the query (pg_trgm), so typos still match
+#   - variation SKUs starting with the query, case insensitive, or
+#     similar to it (pg_trgm)
+#   - the exact UPC
+# Each condition is served by its own index and the results are ranked by
+# text rank plus name similarity, SKU and UPC hits first.
+#
+# pg_trgm is created by migration 0013 where the database offers it.
+# Without it fuzzy matching is skipped; prefix and full text search work
+# either way.
+
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+
+from core.models import Product, Variation
+
+CONFIG = "english"
+
+# Product fields the search vector is built from
+SEARCH_FIELDS = {"name", "UPC", "description"}
+
+# Rank added for an exact UPC or SKU prefix hit, above any text rank
+EXACT_RANK = 1.0
+
+_trigram = {}
+
+
+def search_vector():
+    # The value Product.search_vector is kept equal to
+    return SearchVector("name", "UPC", weight="A", config=CONFIG) + (
+        SearchVector("description", weight="B", config=CONFIG)
+    )
+
+
+def update_search_vectors(**filters):
+    # Recompute the search vector of the products matching filters
+    return Product.objects.filter(**filters).update(
+        search_vector=search_vector()
+    )
+
+
+def has_trigram():
+    # Whether pg_trgm is installed, checked once per database
+    key = connection.settings_dict["NAME"]
+    if key not in _trigram:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT EXISTS "
+                "(SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+            )
+            _trigram[key] = cursor.fetchone()[0]
+    return _trigram[key]
+
+
+def parse_query(text):
+    # Raw tsquery of the words in text, the last one a prefix, or None
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    words[-1] += ":*"
+    return SearchQuery(" & ".join(words), search_type="raw", config=CONFIG)
+
+
+def search(text, limit=20):
+    # Products matching text, best match first, annotated with rank
+    text = " ".join(text.split())
+    query = parse_query(text)
+    if query is None:
+        return Product.objects.none()
+
+    # A short list of ids keeps the OR below a union of index scans
+    skus = Q(sku__istartswith=text)
+    if has_trigram():
+        skus |= Q(sku__trigram_similar=text)
+    sku_hits = list(
+        Variation.objects.filter(skus)
+        .values_list("product_id", flat=True)
+        .distinct()[:limit]
+    )
+    matches = Q(search_vector=query) | Q(UPC=text) | Q(pk__in=sku_hits)
+    rank = SearchRank(F("search_vector"), query) + Case(
+        When(Q(UPC=text) | Q(pk__in=sku_hits), then=Value(EXACT_RANK)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    if has_trigram():
+        matches |= Q(name__trigram_similar=text)
+        rank = rank + TrigramSimilarity("name", text)
+
+    return (
+        Product.objects.filter(matches)
+        .annotate(rank=rank)
+        .prefetch_related("variations")
+        .order_by("-rank", "product_id")[:limit]
+    )
@@ -0,0 +1,37 @@
+# Serializers for the catalog API
+
+from rest_framework import serializers
+
+from core.models import Category, Product, Variation
+
+
+class CategorySerializer(serializers.ModelSerializer):
+    # Serializer for categories
+
+    class Meta:
+        model = Category
+        fields = ["category_id", "name", "sub_categories", "updated_at"]
+
+
+class VariationSerializer(serializers.ModelSerializer):
+    # Serializer for product variations
+
+    class Meta:
+        model = Variation
+        exclude = ["product"]
+
+
+class ProductSerializer(serializers.ModelSerializer):
+    # Serializer for products with their variations
+
+    variations = VariationSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Product
+        exclude = ["search_vector"]
+
+
+class ProductSearchSerializer(ProductSerializer):
+    # Serializer for search results, best match first
+
+    rank = serializers.FloatField(read_only=True)
@@ -0,0 +1,38 @@
+# Invalidate the catalog cache whenever catalog data changes and keep
+# product search vectors up to date
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from catalog.cache import catalog_cache
+from catalog.search import SEARCH_FIELDS, update_search_vectors
+from core.models import Category, Product, Variation
+
+
+def invalidate_catalog(sender, **kwargs):
+    # Invalidate now and again on commit: a reader between the write and
+    # the commit could otherwise cache the old rows under the new generation
+    catalog_cache.invalidate()
+    transaction.on_commit(catalog_cache.invalidate)
+
+
+for model in (Category, Product, Variation):
+    post_save.connect(
+        invalidate_catalog, sender=model, dispatch_uid=f"catalog-{model}-save"
+    )
+    post_delete.connect(
+        invalidate_catalog,
+        sender=model,
+        dispatch_uid=f"catalog-{model}-delete",
+    )
+
+
+def update_search_vector(sender, instance, update_fields=None, **kwargs):
+    # Saves touching none of the searched fields keep their vector
+    if update_fields is None or SEARCH_FIELDS & set(update_fields):
+        update_search_vectors(pk=instance.pk)
+
+
+post_save.connect(
+    update_search_vector, sender=Product, dispatch_uid="catalog-search"
+)
@@ -0,0 +1,90 @@
+# Test for the async catalog API served under ASGI
+#
+# The async views run ORM work in their own thread pool, whose connections
+# cannot see a TestCase transaction, so these tests commit their data.
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from catalog.cache import catalog_cache
+from core.tests.factories import create_product, create_variation
+
+
+@override_settings(ROOT_URLCONF="app.asgi_urls")
+class AsyncCatalogApiTests(TransactionTestCase):
+    # Test the async catalog views
+
+    def setUp(self):
+        cache.clear()
+        catalog_cache.local.clear()
+        user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+        token = Token.objects.create(user=user)
+        self.auth = {"authorization": f"Token {token.key}"}
+        self.product = create_product()
+        create_variation(product=self.product)
+
+    async def test_auth_required(self):
+        res = await self.async_client.get(reverse("catalog:product-list"))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_list_products(self):
+        res = await self.async_client.get(
+            reverse("catalog:product-list"), **self.auth
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.json()["results"]
+        self.assertEqual(results[0]["variations"][0]["sku"], "COF-REG")
+
+    async def test_list_products_in_pages(self):
+        await sync_to_async(create_product)(name="Tea")
+
+        res = await self.async_client.get(
+            reverse("catalog:product-list") + "?page_size=1", **self.auth
+        )
+
+        self.assertEqual(len(res.json()["results"]), 1)
+        self.assertIn("cursor=", res.json()["next"])
+
+    async def test_search_products(self):
+        res = await self.async_client.get(
+            reverse("catalog:product-search") + "?q=coff", **self.auth
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()[0]["product_id"], self.product.pk)
+
+    async def test_invalid_category(self):
+        res = await self.async_client.get(
+            reverse("catalog:product-list") + "?category=x", **self.auth
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_product_detail_and_not_found(self):
+        url = reverse("catalog:product-detail", args=[self.product.pk])
+
+        res = await self.async_client.get(url, **self.auth)
+
+        self.assertEqual(res.json()["name"], "Coffee")
+
+        url = reverse("catalog:product-detail", args=[self.product.pk + 1])
+        res = await self.async_client.get(url, **self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_list_categories(self):
+        res = await self.async_client.get(
+            reverse("catalog:category-list"), **self.auth
+        )
+
+        self.assertEqual(len(res.json()), 1)
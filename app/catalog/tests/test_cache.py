@@ -0,0 +1,96 @@
+# Test the two tier catalog cache
+
+import threading
+import time
+
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from catalog.cache import LocalLRU, TwoTierCache, _missing
+
+
+class LocalLRUTests(SimpleTestCase):
+    # Test the in-process tier
+
+    def test_evicts_least_recently_used(self):
+        lru = LocalLRU(max_entries=2, timeout=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+
+        self.assertEqual(lru.get("a"), 1)
+        self.assertIs(lru.get("b"), _missing)
+        self.assertEqual(lru.get("c"), 3)
+
+    def test_entries_expire(self):
+        lru = LocalLRU(max_entries=2, timeout=0)
+        lru.set("a", 1)
+
+        self.assertIs(lru.get("a"), _missing)
+
+
+class TwoTierCacheTests(SimpleTestCase):
+    # Test read-through, invalidation and stampede protection
+
+    def setUp(self):
+        caches["default"].clear()
+        self.cache = TwoTierCache(KEY_PREFIX="test")
+
+    def test_loads_once_then_serves_local(self):
+        calls = []
+
+        for _ in range(3):
+            value = self.cache.get_or_load("key", lambda: calls.append(1))
+
+        self.assertIsNone(value)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(self.cache.hits["local"], 2)
+
+    def test_other_process_reads_shared_tier(self):
+        self.cache.get_or_load("key", lambda: "value")
+        other = TwoTierCache(KEY_PREFIX="test")
+
+        value = other.get_or_load("key", lambda: "reloaded")
+
+        self.assertEqual(value, "value")
+        self.assertEqual(other.hits["shared"], 1)
+
+    def test_invalidate_reaches_every_process(self):
+        self.cache.get_or_load("key", lambda: "old")
+        other = TwoTierCache(KEY_PREFIX="test", LOCAL_TIMEOUT=0)
+        other.get_or_load("key", lambda: "old")
+
+        self.cache.invalidate()
+
+        self.assertEqual(self.cache.get_or_load("key", lambda: "new"), "new")
+        self.assertEqual(other.get_or_load("key", lambda: "newer"), "new")
+
+    def test_concurrent_misses_load_once(self):
+        # Two "processes" with four threads each miss the same key at once
+        calls = []
+        caches_ = [TwoTierCache(KEY_PREFIX="test") for _ in range(2)]
+        barrier = threading.Barrier(8)
+        results = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.2)
+            return "value"
+
+        def read(cache):
+            barrier.wait()
+            results.append(cache.get_or_load("key", loader))
+
+        threads = [
+            threading.Thread(target=read, args=(caches_[i % 2],))
+            for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["value"] * 8)
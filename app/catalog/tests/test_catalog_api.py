@@ -0,0 +1,166 @@
+# Test for the cached catalog API
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from catalog.cache import catalog_cache
+from core.tests.budgets import QueryBudgetMixin
+from core.tests.factories import (
+    create_category,
+    create_product,
+    create_variation,
+)
+
+CATEGORIES_URL = reverse("catalog:category-list")
+PRODUCTS_URL = reverse("catalog:product-list")
+
+
+def detail_url(product_id):
+    return reverse("catalog:product-detail", args=[product_id])
+
+
+class PublicCatalogApiTests(TestCase):
+    # Test unauthenticated catalog requests
+
+    def test_auth_required(self):
+        res = APIClient().get(PRODUCTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateCatalogApiTests(QueryBudgetMixin, TestCase):
+    # Test authenticated catalog requests
+
+    def setUp(self):
+        catalog_cache.invalidate()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.category = create_category()
+        self.product = create_product(category=self.category)
+        create_variation(product=self.product)
+
+    def test_list_products_with_variations(self):
+        res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertIsNone(res.data["next"])
+        self.assertEqual(
+            res.data["results"][0]["variations"][0]["sku"], "COF-REG"
+        )
+
+    def test_filter_by_category(self):
+        other = create_category(name="Food")
+        create_product(category=other, name="Bagel")
+
+        res = self.client.get(PRODUCTS_URL, {"category": other.pk})
+
+        self.assertEqual(
+            [row["name"] for row in res.data["results"]], ["Bagel"]
+        )
+
+    def test_list_products_in_pages(self):
+        for name in ("Tea", "Bagel"):
+            create_product(category=self.category, name=name)
+
+        first = self.client.get(PRODUCTS_URL, {"page_size": 2})
+        second = self.client.get(first.data["next"])
+
+        self.assertEqual(
+            [row["name"] for row in first.data["results"]],
+            ["Coffee", "Tea"],
+        )
+        self.assertEqual(
+            [row["name"] for row in second.data["results"]], ["Bagel"]
+        )
+        self.assertIsNone(second.data["next"])
+
+    def test_pages_cached_separately(self):
+        create_product(category=self.category, name="Tea")
+        with mock.patch("catalog.views.PAGE_SIZE", 1):
+            first = self.client.get(PRODUCTS_URL)
+            self.client.get(first.data["next"])
+
+            with self.assertNumQueries(0):
+                again = self.client.get(first.data["next"])
+
+        self.assertEqual(again.data["results"][0]["name"], "Tea")
+
+    def test_other_page_sizes_are_not_cached(self):
+        self.client.get(PRODUCTS_URL, {"page_size": 5})
+
+        # The products and their variations again
+        with self.assertNumQueries(2):
+            res = self.client.get(PRODUCTS_URL, {"page_size": 5})
+
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_invalid_cursor(self):
+        for cursor in ("not-a-cursor", signing.dumps([1, 100])):
+            res = self.client.get(PRODUCTS_URL, {"cursor": cursor})
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_category(self):
+        res = self.client.get(PRODUCTS_URL, {"category": "drinks"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_repeated_reads_skip_the_database(self):
+        self.client.get(PRODUCTS_URL)
+        self.client.get(detail_url(self.product.pk))
+        self.client.get(CATEGORIES_URL)
+
+        with self.assertNumQueries(0):
+            self.client.get(PRODUCTS_URL)
+            self.client.get(detail_url(self.product.pk))
+            self.client.get(CATEGORIES_URL)
+
+    def test_cache_misses_within_query_budget(self):
+        for index in range(5):
+            create_variation(
+                product=create_product(category=self.category),
+                sku=f"SKU-{index}",
+            )
+
+        with self.assertQueryBudget("catalog:product-list"):
+            res = self.client.get(PRODUCTS_URL)
+        with self.assertQueryBudget("catalog:product-detail"):
+            self.client.get(detail_url(self.product.pk))
+        with self.assertQueryBudget("catalog:category-list"):
+            self.client.get(CATEGORIES_URL)
+
+        self.assertEqual(len(res.data["results"]), 6)
+
+    def test_unknown_product(self):
+        res = self.client.get(detail_url(self.product.pk + 100))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_writes_invalidate_cached_reads(self):
+        self.client.get(detail_url(self.product.pk))
+
+        self.product.name = "Espresso"
+        self.product.save()
+        res = self.client.get(detail_url(self.product.pk))
+
+        self.assertEqual(res.data["name"], "Espresso")
+
+    def test_variation_delete_invalidates(self):
+        self.client.get(PRODUCTS_URL)
+
+        self.product.variations.all().delete()
+        res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(res.data["results"][0]["variations"], [])
@@ -0,0 +1,148 @@
+# Test for product search
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from catalog.cache import catalog_cache
+from catalog.search import has_trigram, search, update_search_vectors
+from core.models import Product
+from core.tests.budgets import QueryBudgetMixin
+from core.tests.factories import (
+    create_category,
+    create_product,
+    create_variation,
+)
+
+SEARCH_URL = reverse("catalog:product-search")
+
+
+class PublicSearchApiTests(TestCase):
+    # Test unauthenticated search requests
+
+    def test_auth_required(self):
+        res = APIClient().get(SEARCH_URL, {"q": "coffee"})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateSearchApiTests(QueryBudgetMixin, TestCase):
+    # Test authenticated search requests
+
+    def setUp(self):
+        catalog_cache.invalidate()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        category = create_category()
+        self.brew = create_product(
+            category=category,
+            name="Cold Brew Coffee",
+            UPC="012345678905",
+            description="Steeped overnight",
+        )
+        create_variation(product=self.brew, sku="CB-16OZ")
+        self.espresso = create_product(
+            category=category,
+            name="Espresso",
+            UPC="012345678912",
+            description="Double shot, pairs with cold milk",
+        )
+        create_variation(product=self.espresso, sku="ESP-DBL")
+        create_product(category=category, name="Bagel", UPC="1")
+
+    def names(self, res):
+        return [product["name"] for product in res.data]
+
+    def test_search_within_query_budget(self):
+        for index in range(5):
+            create_variation(
+                product=create_product(name=f"Iced Coffee {index}"),
+                sku=f"IC-{index}",
+            )
+
+        with self.assertQueryBudget("catalog:product-search"):
+            res = self.client.get(SEARCH_URL, {"q": "coffee"})
+
+        self.assertEqual(len(res.data), 6)
+
+    def test_search_ranks_name_above_description(self):
+        res = self.client.get(SEARCH_URL, {"q": "cold"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.names(res), ["Cold Brew Coffee", "Espresso"])
+        self.assertGreater(res.data[0]["rank"], res.data[1]["rank"])
+        self.assertEqual(res.data[0]["variations"][0]["sku"], "CB-16OZ")
+        self.assertNotIn("search_vector", res.data[0])
+
+    def test_last_word_is_a_prefix(self):
+        res = self.client.get(SEARCH_URL, {"q": "cold bre"})
+
+        self.assertEqual(self.names(res), ["Cold Brew Coffee"])
+
+    def test_stemmed_words_match(self):
+        res = self.client.get(SEARCH_URL, {"q": "steeping"})
+
+        self.assertEqual(self.names(res), ["Cold Brew Coffee"])
+
+    def test_sku_prefix_case_insensitive(self):
+        res = self.client.get(SEARCH_URL, {"q": "esp-d"})
+
+        self.assertEqual(self.names(res), ["Espresso"])
+
+    def test_exact_upc(self):
+        res = self.client.get(SEARCH_URL, {"q": "012345678912"})
+
+        self.assertEqual(self.names(res)[0], "Espresso")
+
+    def test_limit(self):
+        res = self.client.get(SEARCH_URL, {"q": "cold", "limit": 1})
+
+        self.assertEqual(self.names(res), ["Cold Brew Coffee"])
+
+    def test_invalid_params(self):
+        res = self.client.get(SEARCH_URL, {"q": "  ", "limit": "0"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("q", res.data)
+        self.assertIn("limit", res.data)
+
+    def test_punctuation_only_matches_nothing(self):
+        res = self.client.get(SEARCH_URL, {"q": "&!:*"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
+
+    def test_saving_a_product_updates_its_vector(self):
+        self.client.get(SEARCH_URL, {"q": "bagel"})
+        product = Product.objects.get(name="Bagel")
+        product.name = "Sesame Bagel"
+        product.save()
+
+        res = self.client.get(SEARCH_URL, {"q": "sesame"})
+
+        self.assertEqual(self.names(res), ["Sesame Bagel"])
+
+    def test_bulk_updates_need_an_explicit_refresh(self):
+        Product.objects.filter(name="Bagel").update(name="Croissant")
+        self.assertEqual(list(search("croissant")), [])
+
+        update_search_vectors(name="Croissant")
+
+        self.assertEqual(
+            [product.name for product in search("croissant")],
+            ["Croissant"],
+        )
+
+    def test_misspelt_name_matches(self):
+        if not has_trigram():
+            self.skipTest("pg_trgm is not available")
+        res = self.client.get(SEARCH_URL, {"q": "expresso"})
+
+        self.assertEqual(self.names(res), ["Espresso"])
@@ -0,0 +1,21 @@
+# URL Mappings for Catalog API
+
+from django.urls import path
+from catalog import views
+
+app_name = "catalog"
+
+urlpatterns = [
+    path(
+        "categories/",
+        views.categoryListView.as_view(),
+        name="category-list",
+    ),
+    path("products/", views.productListView.as_view(), name="product-list"),
+    path("search/", views.productSearchView.as_view(), name="product-search"),
+    path(
+        "products/<int:pk>/",
+        views.productDetailView.as_view(),
+        name="product-detail",
+    ),
+]
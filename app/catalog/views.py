@@ -0,0 +1,224 @@
+# Views for the catalog API
+# Responses are built once and served from catalog.cache afterwards
+
+import hashlib
+from abc import ABCMeta, abstractmethod
+from functools import partial
+
+from django.core import signing
+from django.http import Http404, JsonResponse
+from rest_framework import permissions
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+
+from catalog.cache import catalog_cache
+from catalog.search import search
+from catalog.serializers import (
+    CategorySerializer,
+    ProductSearchSerializer,
+    ProductSerializer,
+)
+from core.asyncviews import async_api_view, database_sync_to_async
+from core.models import Category, Product
+from user.authentication import CachedTokenAuthentication
+
+
+SEARCH_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+# Product list pages, as sales.pagination.KeysetPagination
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+CURSOR_SALT = "catalog.products"
+
+
+def _products():
+    return Product.objects.prefetch_related("variations").order_by(
+        "product_id"
+    )
+
+
+def _category_param(params):
+    category = params.get("category", "")
+    if category and not category.isdigit():
+        raise ValidationError({"category": ["A valid integer is required."]})
+    return category
+
+
+def _encode_cursor(product_id, page_size):
+    # Cursors are signed, so only pages this API linked to can be asked for
+    return signing.dumps([product_id, page_size], salt=CURSOR_SALT)
+
+
+def _page_params(params):
+    # (product_id after ?cursor=, ?page_size=, whether the page is one of
+    # the canonical ones that are cached). Those are the pages of the
+    # default size, reached from the first one, so clients cannot fill the
+    # cache with pages of their own choosing
+    try:
+        size = int(params["page_size"])
+    except (KeyError, ValueError):
+        size = PAGE_SIZE
+    size = max(1, min(size, MAX_PAGE_SIZE))
+    cursor = params.get("cursor", "")
+    if not cursor:
+        return 0, size, size == PAGE_SIZE
+    try:
+        after, linked_size = signing.loads(cursor, salt=CURSOR_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise NotFound("Invalid cursor")
+    return after, size, size == linked_size == PAGE_SIZE
+
+
+def _search_params(params):
+    # The normalised ?q= and ?limit= of a search request
+    errors = {}
+    text = " ".join(params.get("q", "").split())
+    if not text:
+        errors["q"] = ["This field is required."]
+    limit = params.get("limit", str(SEARCH_LIMIT))
+    if not limit.isdigit() or not 1 <= int(limit) <= SEARCH_MAX_LIMIT:
+        errors["limit"] = [
+            f"Ensure this value is between 1 and {SEARCH_MAX_LIMIT}."
+        ]
+    if errors:
+        raise ValidationError(errors)
+    return text, int(limit)
+
+
+def _search_key(text, limit):
+    # Queries are hashed, cache backends limit key length and characters
+    digest = hashlib.sha1(text.encode()).hexdigest()
+    return f"search:{limit}:{digest}"
+
+
+def load_categories():
+    return list(
+        CategorySerializer(
+            Category.objects.order_by("category_id"), many=True
+        ).data
+    )
+
+
+def load_products(category, after, page_size):
+    # One page of products after product_id after, keyset paginated so
+    # every page costs the same index range scan
+    products = _products().filter(product_id__gt=after)
+    if category:
+        products = products.filter(category_id=category)
+    # One extra row tells us whether there is a next page
+    rows = list(products[: page_size + 1])
+    page = rows[:page_size]
+    return {
+        "cursor": (
+            _encode_cursor(page[-1].pk, page_size)
+            if len(rows) > page_size
+            else None
+        ),
+        "results": list(ProductSerializer(page, many=True).data),
+    }
+
+
+def load_product(pk):
+    product = _products().filter(pk=pk).first()
+    if product is None:
+        # Cached too, so unknown ids do not reach the database
+        return None
+    return dict(ProductSerializer(product).data)
+
+
+def load_search(text, limit):
+    return list(ProductSearchSerializer(search(text, limit), many=True).data)
+
+
+class CatalogView(APIView, metaclass=ABCMeta):
+    # Base view for cached catalog reads. Subclasses return the cache key
+    # and loader of a request from cached(), and may shape the cached data
+    # per request in render(); get() and the async version from
+    # as_async_view() serve it.
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @abstractmethod
+    def cached(self, params, **kwargs):
+        # (cache key, loader) of a request, a None key loads uncached
+        pass
+
+    def render(self, request, data):
+        # The response body for the cached data, which must not be changed
+        return data
+
+    def get(self, request, **kwargs):
+        key, loader = self.cached(request.query_params, **kwargs)
+        if key is None:
+            data = loader()
+        else:
+            data = catalog_cache.get_or_load(key, loader)
+        if data is None:
+            raise Http404
+        return Response(self.render(request, data))
+
+    @classmethod
+    def as_async_view(cls):
+        # The view for app/asgi_urls.py, reading the same cache entries
+        view = cls()
+
+        @async_api_view(["GET"], authenticated=True)
+        async def async_view(request, **kwargs):
+            key, loader = view.cached(request.GET, **kwargs)
+            if key is None:
+                data = await database_sync_to_async(loader)()
+            else:
+                data = await catalog_cache.aget_or_load(key, loader)
+            if data is None:
+                raise Http404
+            return JsonResponse(view.render(request, data), safe=False)
+
+        async_view.__name__ = async_view.__qualname__ = f"{cls.__name__}Async"
+        return async_view
+
+
+class categoryListView(CatalogView):
+    # List every category
+
+    def cached(self, params):
+        return "categories", load_categories
+
+
+class productListView(CatalogView):
+    # List products with variations, optionally within one ?category=,
+    # ?page_size= at a time. Pages of the default size are cached on their
+    # own, other sizes are loaded uncached
+
+    def cached(self, params):
+        category = _category_param(params)
+        after, page_size, canonical = _page_params(params)
+        loader = partial(load_products, category, after, page_size)
+        if not canonical:
+            return None, loader
+        return f"products:{category}:{after}", loader
+
+    def render(self, request, data):
+        next_link = None
+        if data["cursor"]:
+            next_link = replace_query_param(
+                request.build_absolute_uri(), "cursor", data["cursor"]
+            )
+        return {"next": next_link, "results": data["results"]}
+
+
+class productDetailView(CatalogView):
+    # Retrieve a single product with its variations
+
+    def cached(self, params, pk):
+        return f"product:{pk}", partial(load_product, pk)
+
+
+class productSearchView(CatalogView):
+    # Products matching ?q=, ranked, at most ?limit= of them
+
+    def cached(self, params):
+        text, limit = _search_params(params)
+        return _search_key(text, limit), partial(load_search, text, limit)
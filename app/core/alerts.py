@@ -0,0 +1,88 @@
+# Batched low stock alerts
+#
+# Stock is not checked against thresholds on every sale. evaluate() runs on
+# a schedule (see the check_stock_alerts command) and, in one transaction:
+#   - opens an alert for each stock row at or under its threshold that has
+#     none open, with a single INSERT ... SELECT; the open alert unique
+#     constraint turns repeats into no-ops
+#   - resolves the open alerts of rows back above their threshold
+#
+# Only stock rows changed since the previous run's watermark are looked at,
+# so a run costs in proportion to recent stock changes, not to the number
+# of variations. Changing a threshold does not touch the stock rows, a full
+# run re-checks every row to pick those changes up.
+#
+# The watermark is set OVERLAP before the run started: a row written by a
+# transaction still open during the run is seen by the next one.
+
+import datetime
+
+from django.db import connection, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from core import inventory
+from core.models import JobWatermark, StockAlert
+
+WATERMARK = "stock_alerts"
+# Longer than any transaction changing stock is expected to stay open
+OVERLAP = datetime.timedelta(minutes=5)
+
+# Sent with alerts=[StockAlert, ...] after a run opened new alerts
+alerts_opened = Signal()
+
+
+def _open_alerts(low, now):
+    # Insert an alert for every row of low without an open one, returns the
+    # new alert ids
+    quote = connection.ops.quote_name
+    select, params = (
+        low.values("pk", "quantity", "threshold")
+        .order_by()
+        .query.sql_with_params()
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(StockAlert._meta.db_table)} "
+            f"(stock_id, quantity, threshold, created_at) "
+            f"SELECT low.id, low.quantity, low.threshold, %s "
+            f"FROM ({select}) low "
+            f"ON CONFLICT DO NOTHING RETURNING id",
+            [now, *params],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def evaluate(full=False):
+    # Run one check, returns (new alerts, number of alerts resolved)
+    now = timezone.now()
+    with transaction.atomic():
+        JobWatermark.objects.get_or_create(name=WATERMARK)
+        # Locked so that overlapping runs take turns
+        mark = JobWatermark.objects.select_for_update().get(name=WATERMARK)
+        touched = {}
+        if mark.value is not None and not full:
+            touched["updated_at__gte"] = mark.value
+
+        low = inventory.below_threshold(**touched)
+        opened = _open_alerts(low, now)
+        resolved = (
+            StockAlert.objects.filter(
+                resolved_at__isnull=True,
+                **{f"stock__{key}": value for key, value in touched.items()},
+            )
+            .exclude(stock__in=low.values("pk"))
+            .update(resolved_at=now)
+        )
+
+        mark.value = now - OVERLAP
+        mark.save()
+
+    alerts = list(
+        StockAlert.objects.filter(pk__in=opened)
+        .select_related("stock__variation", "stock__location")
+        .order_by("pk")
+    )
+    if alerts:
+        alerts_opened.send(sender=StockAlert, alerts=alerts)
+    return alerts, resolved
@@ -0,0 +1,289 @@
+# Vectorized analytics over transactions and items sold
+#
+# Reports read only the columns they need with values_list() through a
+# server-side cursor, CHUNK_SIZE rows at a time, each chunk going straight
+# into a NumPy array: no model instances are built. Money is read as
+# integer cents and datetimes as epoch seconds (wall clock of the current
+# time zone) so every column is an int64 array, sums are exact and time
+# buckets are integer arithmetic. Group-bys are np.unique() + np.bincount()
+# for row counts and np.add.at() into int64 for sums (bincount() weights
+# would add up in float64 and lose cents past 2**53).
+#
+# run() caches each report's result per query signature (report name and
+# parameters) for TIMEOUT seconds, results may be that much out of date.
+
+import datetime
+import hashlib
+import itertools
+import json
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import (
+    BigIntegerField,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+)
+from django.db.models.functions import Cast, Coalesce, Extract
+from django.utils import timezone
+
+from core.models import ItemSold, Transaction
+
+DEFAULTS = {
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": 300,
+    "CHUNK_SIZE": 50000,
+}
+
+DAY = 86400
+# Bucket name -> seconds, hour_of_day folds every day onto 0-23
+BUCKETS = {"hour": 3600, "day": DAY, "week": 7 * DAY, "hour_of_day": 3600}
+
+
+def config():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, "ANALYTICS", {}))
+    return options
+
+
+def cents(field):
+    # Money column (or expression) as integer cents
+    if isinstance(field, str):
+        field = F(field)
+    return Cast(
+        ExpressionWrapper(
+            field * 100, output_field=DecimalField(max_digits=16)
+        ),
+        BigIntegerField(),
+    )
+
+
+def epoch(field):
+    # Datetime column as seconds since the epoch in the current time zone
+    return Cast(Extract(field, "epoch"), BigIntegerField())
+
+
+def load(queryset, columns):
+    # {name: int64 array} of columns {name: expression} over queryset
+    chunk_size = config()["CHUNK_SIZE"]
+    rows = queryset.values_list(*columns.values()).iterator(
+        chunk_size=chunk_size
+    )
+    chunks = []
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+        chunks.append(np.array(chunk, dtype=np.int64))
+    if chunks:
+        table = np.concatenate(chunks)
+    else:
+        table = np.empty((0, len(columns)), dtype=np.int64)
+    return {name: table[:, index] for index, name in enumerate(columns)}
+
+
+def group_by(keys, **values):
+    # Distinct keys (sorted), rows per key and {name: sum of values per key}
+    unique, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(unique))
+    sums = {}
+    for name, array in values.items():
+        total = np.zeros(len(unique), dtype=np.int64)
+        np.add.at(total, inverse, array.astype(np.int64, copy=False))
+        sums[name] = total
+    return unique, counts, sums
+
+
+def bucket_keys(seconds, bucket):
+    # Start of the bucket each epoch second falls in
+    size = BUCKETS[bucket]
+    if bucket == "hour_of_day":
+        return seconds // size % 24
+    # The epoch was a Thursday, weeks start on Monday
+    offset = 3 * DAY if bucket == "week" else 0
+    return (seconds + offset) // size * size - offset
+
+
+def bucket_label(key, bucket):
+    if bucket == "hour_of_day":
+        return int(key)
+    start = datetime.datetime(1970, 1, 1) + datetime.timedelta(
+        seconds=int(key)
+    )
+    return timezone.make_aware(start)
+
+
+def money(total):
+    # Sum of cents as a Decimal amount
+    return Decimal(int(total)).scaleb(-2)
+
+
+def ratio(numerators, denominators, places):
+    # Elementwise numerators / denominators, None where dividing by zero
+    result = np.divide(
+        numerators,
+        denominators,
+        out=np.zeros(len(numerators)),
+        where=denominators != 0,
+    )
+    return [
+        round(float(value), places) if denominator else None
+        for value, denominator in zip(result, denominators)
+    ]
+
+
+def transactions(start=None, end=None):
+    queryset = Transaction.objects.all()
+    if start is not None:
+        queryset = queryset.filter(created_at__gte=start)
+    if end is not None:
+        queryset = queryset.filter(created_at__lt=end)
+    return queryset
+
+
+def revenue(start=None, end=None, bucket="hour"):
+    # Transactions, amounts and tips per time bucket
+    data = load(
+        transactions(start, end),
+        {
+            "at": epoch("created_at"),
+            "amount": cents("amount_money"),
+            "tip": cents("tip_money"),
+        },
+    )
+    keys, counts, sums = group_by(
+        bucket_keys(data["at"], bucket),
+        amount=data["amount"],
+        tip=data["tip"],
+    )
+    return [
+        {
+            "bucket": bucket_label(key, bucket),
+            "transactions": int(count),
+            "amount_money": money(amount),
+            "tip_money": money(tip),
+        }
+        for key, count, amount, tip in zip(
+            keys, counts, sums["amount"], sums["tip"]
+        )
+    ]
+
+
+def tips_by_employee(start=None, end=None):
+    # Tips as a percentage of the amount charged, per employee
+    data = load(
+        transactions(start, end),
+        {
+            "employee": F("employee_id"),
+            "amount": cents("amount_money"),
+            "tip": cents("tip_money"),
+        },
+    )
+    keys, counts, sums = group_by(
+        data["employee"], amount=data["amount"], tip=data["tip"]
+    )
+    percentages = ratio(sums["tip"] * 100, sums["amount"], 2)
+    return [
+        {
+            "employee": int(key),
+            "transactions": int(count),
+            "amount_money": money(amount),
+            "tip_money": money(tip),
+            "tip_percentage": percentage,
+        }
+        for key, count, amount, tip, percentage in zip(
+            keys, counts, sums["amount"], sums["tip"], percentages
+        )
+    ]
+
+
+def fees_by_location(start=None, end=None):
+    # Processing fees as a fraction of the amount charged, per location
+    data = load(
+        transactions(start, end),
+        {
+            "location": F("location_id"),
+            "amount": cents("amount_money"),
+            "fee": cents("processing_fee_money"),
+        },
+    )
+    keys, counts, sums = group_by(
+        data["location"], amount=data["amount"], fee=data["fee"]
+    )
+    ratios = ratio(sums["fee"], sums["amount"], 4)
+    return [
+        {
+            "location": int(key),
+            "transactions": int(count),
+            "amount_money": money(amount),
+            "processing_fee_money": money(fee),
+            "fee_ratio": fee_ratio,
+        }
+        for key, count, amount, fee, fee_ratio in zip(
+            keys, counts, sums["amount"], sums["fee"], ratios
+        )
+    ]
+
+
+def items_by_variation(start=None, end=None):
+    # Units and revenue at the price sold per variation, by order date
+    queryset = ItemSold.objects.all()
+    if start is not None:
+        queryset = queryset.filter(order__created_at__gte=start)
+    if end is not None:
+        queryset = queryset.filter(order__created_at__lt=end)
+    data = load(
+        queryset,
+        {
+            "variation": F("variation_id"),
+            "quantity": F("quantity"),
+            "price": cents(
+                Coalesce("price_money", "variation__price_money")
+            ),
+        },
+    )
+    keys, counts, sums = group_by(
+        data["variation"],
+        units=data["quantity"],
+        revenue=data["quantity"] * data["price"],
+    )
+    return [
+        {
+            "variation": int(key),
+            "line_count": int(count),
+            "units": int(units),
+            "revenue_money": money(revenue),
+        }
+        for key, count, units, revenue in zip(
+            keys, counts, sums["units"], sums["revenue"]
+        )
+    ]
+
+
+REPORTS = {
+    "revenue": revenue,
+    "tips_by_employee": tips_by_employee,
+    "fees_by_location": fees_by_location,
+    "items_by_variation": items_by_variation,
+}
+
+
+def signature(report, params):
+    # Cache key for a report and its parameters, in any order
+    key = json.dumps([report, params], sort_keys=True, default=str)
+    return f"analytics:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def run(report, **params):
+    # Result of REPORTS[report](**params), cached per signature
+    options = config()
+    cache = caches[options["CACHE_ALIAS"]]
+    key = signature(report, params)
+    result = cache.get(key)
+    if result is None:
+        result = REPORTS[report](**params)
+        cache.set(key, result, options["TIMEOUT"])
+    return result
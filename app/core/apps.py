@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        # Connects the signal handlers
+        from core import signals  # noqa: F401
+
+        # Request metrics count queries and time serializers, see
+        # core/metrics.py
+        from django.db.backends.signals import connection_created
+
+        from core import metrics
+
+        connection_created.connect(
+            metrics.install_query_timer, dispatch_uid="request-metrics"
+        )
+        metrics.instrument_serializers()
@@ -0,0 +1,104 @@
+# Helpers for async views served under ASGI (see app/asgi_urls.py)
+#
+# Django 3.2's ORM is sync only and sync_to_async() runs sync code in one
+# shared thread by default, so every request would queue behind it.
+# database_sync_to_async() runs ORM work in a pool of ASYNC_DB_WORKERS
+# threads instead; each thread holds its own connection, so keep the pool
+# below the database's connection limit. Connections are closed or kept
+# around each call as CONN_MAX_AGE says, as a request would.
+#
+# async_api_view() gives async function views the parts of DRF they need:
+# method checks, token authentication and APIException responses in the
+# same JSON shape DRF uses.
+
+import functools
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import Http404, JsonResponse, QueryDict
+from rest_framework import exceptions
+
+from user.authentication import CachedTokenAuthentication
+
+pool = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_DB_WORKERS, thread_name_prefix="async-db"
+)
+
+
+def _in_pool(func, *args, **kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def database_sync_to_async(func):
+    # Wrap a blocking ORM function to be awaited from async code
+    return sync_to_async(
+        functools.partial(_in_pool, func),
+        thread_sensitive=False,
+        executor=pool,
+    )
+
+
+def read_data(request):
+    # Parse a JSON or form encoded request body
+    if request.content_type == "application/json":
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError as exc:
+            raise exceptions.ParseError(f"JSON parse error - {exc}")
+    if request.method == "POST":
+        return request.POST
+    return QueryDict(request.body)
+
+
+def _authenticate(request):
+    return CachedTokenAuthentication().authenticate(request)
+
+
+def error_response(exc):
+    # Render an APIException like DRF's exception handler does
+    detail = exc.detail
+    if not isinstance(detail, (list, dict)):
+        detail = {"detail": detail}
+    response = JsonResponse(detail, status=exc.status_code, safe=False)
+    if isinstance(
+        exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+    ):
+        response["WWW-Authenticate"] = "Token"
+    return response
+
+
+def async_api_view(methods, authenticated=False):
+    # Decorate an async view accepting methods, optionally token protected
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                if request.method not in methods:
+                    raise exceptions.MethodNotAllowed(request.method)
+                if authenticated:
+                    result = await database_sync_to_async(_authenticate)(
+                        request
+                    )
+                    if result is None:
+                        raise exceptions.NotAuthenticated()
+                    request.user, request.auth = result
+                return await view(request, *args, **kwargs)
+            except Http404:
+                return error_response(exceptions.NotFound())
+            except exceptions.APIException as exc:
+                response = error_response(exc)
+                if isinstance(exc, exceptions.MethodNotAllowed):
+                    response["Allow"] = ", ".join(methods)
+                return response
+
+        wrapper.csrf_exempt = True
+        return wrapper
+
+    return decorator
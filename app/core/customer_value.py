@@ -0,0 +1,58 @@
+# Customer lifetime value and RFM segments
+#
+# CustomerValue and CustomerSegment are PostgreSQL materialized views
+# (created in migration 0012_customer_value). A refresh recomputes them
+# from every transaction in one pass, so reads are plain indexed lookups
+# instead of loops over Customer.transactions.
+#
+# Refreshes run CONCURRENTLY: the new contents are built next to the old
+# and only the changed rows are swapped in, so readers are never blocked
+# and see the previous contents until the refresh commits. Both views are
+# refreshed in one transaction, the segment totals always match the
+# customer rows. The rows hold no refresh time, which would change every
+# row on every refresh; it is kept in the customer_value JobWatermark.
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import CustomerSegment, CustomerValue, JobWatermark
+
+WATERMARK = "customer_value"
+
+# Best customers first
+SEGMENTS = [
+    "champions",
+    "loyal",
+    "promising",
+    "new",
+    "needs_attention",
+    "at_risk",
+    "hibernating",
+]
+
+# In dependency order
+VIEWS = [CustomerValue, CustomerSegment]
+
+
+def refresh(concurrently=True):
+    # Recompute the customer value views
+    quote = connection.ops.quote_name
+    mode = "CONCURRENTLY " if concurrently else ""
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model in VIEWS:
+            cursor.execute(
+                f"REFRESH MATERIALIZED VIEW {mode}"
+                f"{quote(model._meta.db_table)}"
+            )
+        JobWatermark.objects.update_or_create(
+            name=WATERMARK, defaults={"value": timezone.now()}
+        )
+
+
+def refreshed_at():
+    # When the views were last refreshed, None if never
+    return (
+        JobWatermark.objects.filter(name=WATERMARK)
+        .values_list("value", flat=True)
+        .first()
+    )
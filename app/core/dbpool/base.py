@@ -0,0 +1,79 @@
+# PostgreSQL backend with connection health checks and optional pooling
+#
+# Use it as ENGINE "core.dbpool". On top of the stock backend:
+#   - CONN_HEALTH_CHECKS: a persistent connection is checked with a
+#     trivial query the first time it is used in each request, so one the
+#     server dropped is replaced instead of failing the request
+#   - POOL: {"MAX_SIZE": ..., "MAX_OVERFLOW": ..., "TIMEOUT": ...} (see
+#     core.dbpool.pool) shares connections between the threads of a process
+#     and "closing" a connection returns it to the pool. Pair it with
+#     CONN_MAX_AGE = 0 so connections go back at the end of each request.
+
+import os
+
+from django.db.backends.postgresql import base
+
+from core.dbpool import pool
+from core.dbpool.creation import DatabaseCreation
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    health_check_done = False
+
+    @property
+    def pool(self):
+        # This process's pool for these settings, None if pooling is off
+        options = self.settings_dict.get("POOL")
+        if not options:
+            return None
+        params = self.get_connection_params()
+        # Keyed by pid too, forked workers must not share connections
+        key = (os.getpid(), tuple(sorted(params.items())))
+        return pool.get_pool(key, **options)
+
+    def get_new_connection(self, conn_params):
+        connection_pool = self.pool
+        if connection_pool is None:
+            return super().get_new_connection(conn_params)
+        connection = connection_pool.acquire(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params
+            )
+        )
+        # Set when the connection was opened, only read back here
+        self.isolation_level = self.settings_dict["OPTIONS"].get(
+            "isolation_level", connection.isolation_level
+        )
+        return connection
+
+    def connect(self):
+        # A new connection needs no check, and connect() itself calls
+        # ensure_connection() before autocommit is set up
+        self.health_check_done = True
+        super().connect()
+
+    def _close(self):
+        connection_pool = self.pool
+        if self.connection is None or connection_pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            connection_pool.release(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        # Called when requests start and finish: check again on next use
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.settings_dict.get("CONN_HEALTH_CHECKS")
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
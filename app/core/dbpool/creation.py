@@ -0,0 +1,19 @@
+from django.db.backends.postgresql import creation
+
+from core.dbpool import pool
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Pooled connections and the persistent connections of other
+        # threads (e.g. core.asyncviews) would keep the database in use
+        for key, connection_pool in pool.pools().items():
+            if dict(key[1]).get("database") == test_database_name:
+                connection_pool.close_idle()
+        with self._nodb_cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                "WHERE datname = %s AND pid <> pg_backend_pid()",
+                [test_database_name],
+            )
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,197 @@
+# In-process PostgreSQL connection pool
+#
+# Keeps up to MAX_SIZE idle connections per database and opens up to
+# MAX_OVERFLOW more under load; those are closed when returned while the
+# pool is full. A checkout waits up to TIMEOUT seconds for a connection
+# once every one is in use, then fails with PoolTimeout. Idle connections
+# are health checked before reuse if they sat longer than
+# HEALTH_CHECK_INTERVAL seconds, and dropped once older than RECYCLE.
+
+import collections
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+DEFAULTS = {
+    "MAX_SIZE": 10,
+    "MAX_OVERFLOW": 10,
+    "TIMEOUT": 30,
+    "HEALTH_CHECK_INTERVAL": 30,
+    "RECYCLE": 3600,
+}
+
+# Pools of this process by connection parameters
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    pass
+
+
+class ConnectionPool:
+    # Thread safe pool of DB-API connections
+
+    def __init__(self, **options):
+        config = dict(DEFAULTS)
+        config.update(options)
+        self.config = config
+        # (connection, created at, last returned at), newest last
+        self._idle = collections.deque()
+        self._opened = 0
+        # Creation time of checked out connections by id()
+        self._in_use = {}
+        self._waiters = 0
+        self._cond = threading.Condition()
+        self.counters = dict.fromkeys(
+            ["opened", "closed", "reused", "health_checks", "waits"], 0
+        )
+        self.counters["timeouts"] = 0
+        self.wait_time = 0.0
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self._opened,
+                "idle": len(self._idle),
+                "checked_out": self._opened - len(self._idle),
+                "waiters": self._waiters,
+                "wait_time": self.wait_time,
+                **self.counters,
+            }
+
+    def acquire(self, connect):
+        # Return a healthy connection, waiting for one or calling connect()
+        # to open one as needed
+        while True:
+            entry = self._checkout()
+            if entry is None:
+                return self._open(connect)
+            connection, created, returned = entry
+            if self._healthy(connection, created, returned):
+                self._in_use[id(connection)] = created
+                return connection
+            self._discard(connection)
+
+    def _checkout(self):
+        # Take an idle entry, or reserve room for a new connection (None)
+        limit = self.config["MAX_SIZE"] + self.config["MAX_OVERFLOW"]
+        started = None
+        with self._cond:
+            try:
+                while not self._idle and self._opened >= limit:
+                    now = time.monotonic()
+                    if started is None:
+                        started = now
+                        self.counters["waits"] += 1
+                    remaining = started + self.config["TIMEOUT"] - now
+                    if remaining <= 0:
+                        self.counters["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"No database connection available within "
+                            f"{self.config['TIMEOUT']}s ({limit} in use)"
+                        )
+                    self._waiters += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiters -= 1
+            finally:
+                if started is not None:
+                    self.wait_time += time.monotonic() - started
+            if self._idle:
+                self.counters["reused"] += 1
+                # Most recently used first, it is the least likely stale
+                return self._idle.pop()
+            self._opened += 1
+            return None
+
+    def _open(self, connect):
+        try:
+            connection = connect()
+        except BaseException:
+            with self._cond:
+                self._opened -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.counters["opened"] += 1
+        self._in_use[id(connection)] = time.monotonic()
+        return connection
+
+    def _healthy(self, connection, created, returned):
+        now = time.monotonic()
+        if connection.closed or now - created > self.config["RECYCLE"]:
+            return False
+        if now - returned < self.config["HEALTH_CHECK_INTERVAL"]:
+            return True
+        with self._cond:
+            self.counters["health_checks"] += 1
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except psycopg2.Error:
+            return False
+
+    def release(self, connection):
+        # Return a connection, closing it if broken or beyond MAX_SIZE
+        created = self._in_use.pop(id(connection), None)
+        if created is None or not self._reset(connection):
+            self._discard(connection)
+            return
+        with self._cond:
+            if len(self._idle) < self.config["MAX_SIZE"] or self._waiters:
+                self._idle.append((connection, created, time.monotonic()))
+                self._cond.notify()
+                return
+        self._discard(connection)
+
+    def _reset(self, connection):
+        # Roll back any open transaction, False if the connection is broken
+        if connection.closed:
+            return False
+        try:
+            status = connection.info.transaction_status
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            return (
+                connection.info.transaction_status
+                == extensions.TRANSACTION_STATUS_IDLE
+            )
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+        with self._cond:
+            self._opened -= 1
+            self.counters["closed"] += 1
+            self._cond.notify()
+
+    def close_idle(self):
+        # Close every idle connection, e.g. before dropping the database
+        with self._cond:
+            idle, self._idle = list(self._idle), collections.deque()
+        for connection, _, _ in idle:
+            self._discard(connection)
+
+
+def get_pool(key, **options):
+    # The process wide pool for key, created on first use
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(**options)
+        return pool
+
+
+def pools():
+    # {key: pool} of this process
+    with _pools_lock:
+        return dict(_pools)
@@ -0,0 +1,155 @@
+# Idempotent transaction writes
+#
+# POS clients retry uploads that timed out, and nothing kept a retry from
+# writing its transactions a second time. Two layers stop that:
+#
+# Every transaction sales.ingest writes claims its key, the (client_id,
+# reference_id) pair, in core_transactionkey, whose unique constraint
+# admits a key once. Rows whose key is already claimed are reported as
+# duplicates and not written. Keys are claimed in the transaction writing
+# the rows: a concurrent upload of the same key waits on the unique index
+# until the first commits (its row is then a duplicate) or rolls back (it
+# is then written). Rows missing a client_id or a reference_id carry no
+# key: a client sending no reference_id would otherwise see every
+# transaction after its first dropped as a duplicate.
+#
+# The constraint lives in its own table because unique constraints on the
+# partitioned core_transaction must include created_at, and a key would
+# then only be unique per timestamp. Keys are kept KEY_RETENTION_DAYS,
+# the purge_transaction_keys command deletes older ones.
+#
+# Uploads sent with an Idempotency-Key header also have their response
+# cached for RESPONSE_TIMEOUT seconds per user and key: a retry gets the
+# original response back without writing anything. The key is reserved
+# with cache.add() before the upload is loaded, so of concurrent requests
+# with one key only the first runs, the others are told it is in
+# progress; an entry is never overwritten by another request. Entries
+# carry a hash of the body, a key reused for another body is refused.
+
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.utils import timezone
+
+from core.models import TransactionKey
+
+DEFAULTS = {
+    "CACHE_ALIAS": "default",
+    "RESPONSE_TIMEOUT": 600,
+    "KEY_RETENTION_DAYS": 30,
+    "PURGE_BATCH_SIZE": 10000,
+}
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def config():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, "IDEMPOTENCY", {}))
+    return options
+
+
+def row_key(row):
+    # Idempotency key of a transaction row, None when it has none
+    if row["client_id"] and row["reference_id"]:
+        return (row["client_id"], row["reference_id"])
+    return None
+
+
+def claim(keys):
+    # Claim (client_id, reference_id) keys, returns those not claimed before
+    keys = set(keys)
+    if not keys:
+        return set()
+    if connection.vendor == "postgresql":
+        # Sorted, uploads claiming overlapping keys then wait on each other
+        # in the same order and cannot deadlock
+        client_ids, reference_ids = zip(*sorted(keys))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {TransactionKey._meta.db_table} "
+                "(client_id, reference_id, created_at) "
+                "SELECT client_id, reference_id, now() "
+                "FROM unnest(%s::varchar[], %s::varchar[]) "
+                "AS claimed (client_id, reference_id) "
+                "ON CONFLICT (client_id, reference_id) DO NOTHING "
+                "RETURNING client_id, reference_id",
+                [list(client_ids), list(reference_ids)],
+            )
+            return set(cursor.fetchall())
+    # Other backends, without waiting on concurrent claims
+    taken = set(
+        TransactionKey.objects.filter(
+            client_id__in={client_id for client_id, _ in keys}
+        ).values_list("client_id", "reference_id")
+    )
+    claimed = keys - taken
+    TransactionKey.objects.bulk_create(
+        [TransactionKey(client_id=c, reference_id=r) for c, r in claimed],
+        ignore_conflicts=True,
+    )
+    return claimed
+
+
+def purge(before=None, batch_size=None):
+    # Delete keys claimed before `before`, a batch per statement so no
+    # lock is held for long, returns the number deleted
+    options = config()
+    if before is None:
+        before = timezone.now() - datetime.timedelta(
+            days=options["KEY_RETENTION_DAYS"]
+        )
+    batch_size = batch_size or options["PURGE_BATCH_SIZE"]
+    expired = TransactionKey.objects.filter(created_at__lt=before)
+    purged = 0
+    while True:
+        ids = list(expired.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return purged
+        deleted, _ = TransactionKey.objects.filter(pk__in=ids).delete()
+        purged += deleted
+
+
+def response_key(user, key):
+    # Hashed, the header is free text of any length
+    digest = hashlib.sha256(f"{user.pk}:{key}".encode()).hexdigest()
+    return f"idempotency:{digest}"
+
+
+def fingerprint(body):
+    return hashlib.sha256(body).hexdigest()
+
+
+def reserve(user, key, body_hash):
+    # Reserve key for a request with body_hash. Returns None once reserved,
+    # otherwise the entry of the request holding it: {"fingerprint",
+    # "status", "data"}, status None while that request runs
+    options = config()
+    cache = caches[options["CACHE_ALIAS"]]
+    pending = {"fingerprint": body_hash, "status": None, "data": None}
+    cache_key = response_key(user, key)
+    while not cache.add(cache_key, pending, options["RESPONSE_TIMEOUT"]):
+        entry = cache.get(cache_key)
+        if entry is not None:
+            return entry
+        # Expired in between, try again
+
+
+def complete(user, key, body_hash, status, data):
+    # Store the response of the request holding the key
+    options = config()
+    caches[options["CACHE_ALIAS"]].set(
+        response_key(user, key),
+        {"fingerprint": body_hash, "status": status, "data": data},
+        options["RESPONSE_TIMEOUT"],
+    )
+
+
+def release(user, key):
+    # Free the key of a request that failed, so a retry can run
+    options = config()
+    caches[options["CACHE_ALIAS"]].delete(response_key(user, key))
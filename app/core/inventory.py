@@ -0,0 +1,158 @@
+# Stock per variation and location with an append-only movement ledger
+#
+# Stock rows only change through relative UPDATE ... SET quantity =
+# quantity + n statements, so concurrent checkouts never read-modify-write
+# a row and no decrement is lost: each waits only for the row lock of the
+# other's UPDATE. Every change appends an InventoryMovement in the same
+# transaction, so a stock row always equals the sum of its movements.
+#
+# ItemSold drives sales (see core.signals): creating one takes its units
+# out of stock at the order's location, changing or deleting it moves the
+# difference back. Sales recorded before their order is paid count against
+# the row without a location until relocate_order() moves them.
+#
+# Low stock is not checked per sale, below_threshold() finds every row at
+# or under its alert threshold in one query (core.alerts runs it).
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Sum, When
+from django.utils import timezone
+
+from core.models import InventoryMovement, InventoryStock, ItemSold
+from core.rollups import order_location_id
+
+LOW_QUANTITY = "LOW_QUANTITY"
+
+
+def _bump(variation_id, location_id, quantity):
+    # Add quantity to the stock row, creating it on first use
+    key = {"variation_id": variation_id, "location_id": location_id}
+    changes = {
+        "quantity": F("quantity") + quantity,
+        "updated_at": timezone.now(),
+    }
+    if InventoryStock.objects.filter(**key).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            InventoryStock.objects.create(quantity=quantity, **key)
+    except IntegrityError:
+        # Another writer created the row first
+        InventoryStock.objects.filter(**key).update(**changes)
+
+
+def move(variation_id, location_id, quantity, reason, **fields):
+    # Change stock by quantity (signed) and record why, returns the movement
+    with transaction.atomic():
+        _bump(variation_id, location_id, quantity)
+        return InventoryMovement.objects.create(
+            variation_id=variation_id,
+            location_id=location_id,
+            quantity=quantity,
+            reason=reason,
+            **fields,
+        )
+
+
+def _reconcile(item_sold, target, applied, reason=None, link=True):
+    # Move stock from what the ledger applied for item_sold to target, both
+    # {(variation_id, location_id): units}
+    #
+    # Rows are updated in key order so that two transactions touching the
+    # same rows cannot deadlock.
+    item_sold_id = item_sold.pk if link else None
+    with transaction.atomic():
+        for key in sorted(set(target) | set(applied), key=str):
+            change = target.get(key, 0) - applied.get(key, 0)
+            if not change:
+                continue
+            move(
+                *key,
+                change,
+                reason
+                or (
+                    InventoryMovement.SALE
+                    if change < 0
+                    else InventoryMovement.RETURN
+                ),
+                item_sold_id=item_sold_id,
+                order_id=item_sold.order_id,
+            )
+
+
+def _applied(item_sold):
+    movements = (
+        InventoryMovement.objects.filter(item_sold_id=item_sold.pk)
+        .values_list("variation_id", "location_id")
+        .annotate(units=Sum("quantity"))
+        .order_by()
+    )
+    return {
+        (variation, location): units
+        for variation, location, units in movements
+    }
+
+
+def record_sale(item_sold, created=False, reason=None):
+    # Bring stock in line with a new or changed ItemSold
+    if not item_sold.variation.track_inventory:
+        return
+    location_id = order_location_id(item_sold.order_id)
+    target = {(item_sold.variation_id, location_id): -item_sold.quantity}
+    # Nothing can have been applied for a row just created
+    applied = {} if created else _applied(item_sold)
+    if not created and not applied:
+        # Sold before the ledger existed, its stock was never taken
+        return
+    _reconcile(item_sold, target, applied, reason)
+
+
+def remove_sale(item_sold):
+    # Put the units of a deleted ItemSold back into stock
+    #
+    # Called from pre_delete, after the delete has collected the movements
+    # to unlink, so the returns must not point at item_sold themselves.
+    _reconcile(item_sold, {}, _applied(item_sold), link=False)
+
+
+def relocate_order(order_id):
+    # Move an order's sales to the location of its first transaction
+    unplaced = InventoryMovement.objects.filter(
+        order_id=order_id, location__isnull=True
+    ).values("item_sold_id")
+    items = ItemSold.objects.filter(pk__in=unplaced).select_related(
+        "variation"
+    )
+    for item_sold in items:
+        record_sale(item_sold, reason=InventoryMovement.RELOCATION)
+
+
+def with_threshold(queryset):
+    # Annotate stock rows with their low quantity alert threshold: the
+    # variation's own, else its product's, else None (no alert)
+    return queryset.annotate(
+        threshold=Case(
+            When(
+                variation__inventory_alert_type=LOW_QUANTITY,
+                then=F("variation__inventory_alert_threshold"),
+            ),
+            When(
+                variation__product__inventory_alert_type=LOW_QUANTITY,
+                then=F("variation__product__inventory_alert_threshold"),
+            ),
+        )
+    )
+
+
+def below_threshold(**filters):
+    # Stock rows at or under their low quantity alert threshold
+    return (
+        with_threshold(
+            InventoryStock.objects.filter(
+                variation__track_inventory=True, **filters
+            )
+        )
+        .filter(quantity__lte=F("threshold"))
+        .select_related("variation", "location")
+        .order_by("variation_id", "location_id")
+    )
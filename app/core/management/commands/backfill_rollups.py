@@ -0,0 +1,31 @@
+# Django command to rebuild the sales fact and rollup tables
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import rollups
+
+
+class Command(BaseCommand):
+    # Command to backfill sales rollups from ItemSold history
+
+    help = "Rebuild SaleFact and the daily, weekly and monthly rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Rows read and written per round trip.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            facts = rollups.backfill_facts(chunk_size=options["chunk_size"])
+            self.stdout.write(f"Wrote {facts} sale facts")
+
+            for rollup in rollups.ROLLUPS:
+                rows = rollups.backfill_rollup(rollup)
+                self.stdout.write(f"Wrote {rows} {rollup.period} rollups")
+
+        self.stdout.write(self.style.SUCCESS("Rollups rebuilt!"))
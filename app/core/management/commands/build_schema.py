@@ -0,0 +1,43 @@
+# Django command to precompute the OpenAPI schema
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import openapi
+
+
+class Command(BaseCommand):
+    # Command to build the schema artifacts served at /api/schema/
+
+    help = (
+        "Generate the OpenAPI schema artifacts for the current code, "
+        "unless they already exist, and delete those of older versions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate even if the artifacts exist.",
+        )
+        parser.add_argument(
+            "--keep-old",
+            action="store_true",
+            help="Keep the artifacts of other versions.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        version = openapi.fingerprint()
+        paths = openapi.build(version, force=options["force"])
+        if not options["keep_old"]:
+            for path in openapi.prune(version):
+                self.stdout.write(f"Removed {path}")
+        for path in paths:
+            self.stdout.write(f"Schema at {path}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Schema {version} ready in {time.monotonic() - start:.2f}s!"
+            )
+        )
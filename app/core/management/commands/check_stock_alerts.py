@@ -0,0 +1,57 @@
+# Django command to raise and resolve low stock alerts
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import alerts
+
+
+class Command(BaseCommand):
+    # Command to check stock against thresholds, once or as a worker
+
+    help = (
+        "Open alerts for stock at or under its low quantity threshold and "
+        "resolve those back above it, checking only rows changed since "
+        "the previous run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Check every stock row, e.g. after thresholds changed.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Keep running, checking every this many seconds.",
+        )
+
+    def run(self, full):
+        opened, resolved = alerts.evaluate(full=full)
+        for alert in opened:
+            stock = alert.stock
+            location = stock.location.name if stock.location else "-"
+            self.stdout.write(
+                f"Low stock: {stock.variation.name} "
+                f"({stock.variation.sku}) at {location}: "
+                f"{alert.quantity} <= {alert.threshold}"
+            )
+        self.stdout.write(
+            f"{len(opened)} alerts opened, {resolved} resolved"
+        )
+
+    def handle(self, *args, **options):
+        self.run(options["full"])
+        if options["interval"] is None:
+            return
+
+        try:
+            while True:
+                time.sleep(options["interval"])
+                close_old_connections()
+                self.run(full=False)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped")
@@ -0,0 +1,68 @@
+# Django command to maintain the monthly table partitions
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from core import partitions
+
+
+class Command(BaseCommand):
+    # Command to create upcoming partitions and retire old ones
+
+    help = (
+        "Create monthly partitions ahead of time and detach (or drop) "
+        "those older than the retention period."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=3,
+            help="Months after the current one to create partitions for.",
+        )
+        parser.add_argument(
+            "--retain-months",
+            type=int,
+            default=None,
+            help="Detach monthly partitions older than this many months.",
+        )
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Drop detached partitions instead of keeping them.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write("Partitioning needs PostgreSQL, skipping.")
+            return
+
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            for table in partitions.PARTITIONED_TABLES:
+                if not partitions.is_partitioned(table, cursor):
+                    self.stdout.write(f"{table} is not partitioned, skipping")
+                    continue
+
+                created = partitions.ensure_partitions(
+                    table, now, options["months_ahead"], cursor
+                )
+                self.stdout.write(f"{table}: {', '.join(created)} ready")
+
+                if options["retain_months"] is None:
+                    continue
+                cutoff = partitions.add_months(
+                    partitions.month_start(now), -options["retain_months"]
+                )
+                for name in partitions.expired_partitions(
+                    table, cutoff, cursor
+                ):
+                    partitions.detach_partition(
+                        table, name, cursor, drop=options["drop"]
+                    )
+                    action = "dropped" if options["drop"] else "detached"
+                    self.stdout.write(f"{table}: {name} {action}")
+
+        self.stdout.write(self.style.SUCCESS("Partitions up to date!"))
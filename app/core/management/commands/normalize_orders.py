@@ -0,0 +1,36 @@
+# Django command to copy Order JSON collections into the child tables
+
+from django.core.management.base import BaseCommand
+
+from core import order_items
+
+
+class Command(BaseCommand):
+    # Command to normalize the orders saved before dual-write
+
+    help = (
+        "Copy Order line items, taxes, discounts, service charges, "
+        "fulfillments and refunds into their tables, in resumable batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Orders converted and committed per batch.",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            help="Stop after this many batches, run again to resume.",
+        )
+
+    def handle(self, *args, **options):
+        converted = order_items.normalize_orders(
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Normalized {converted} orders!")
+        )
@@ -0,0 +1,89 @@
+# Django command to profile the startup of the project
+
+import json
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import startup
+
+
+class Command(BaseCommand):
+    # Command to time the startup phases and their imports
+
+    help = (
+        "Start a fresh interpreter and report the time spent starting "
+        "Python, loading settings, populating apps, importing the URLconf "
+        "and serving a first request, with the slowest imports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default="/api/user/me/",
+            help="Path of the first request.",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=1,
+            help="Start this many times and report the median timings.",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=10,
+            help="Packages and modules listed per phase.",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the timings as JSON, e.g. to track them over time.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            results = [
+                startup.profile(options["path"])
+                for _ in range(max(options["runs"], 1))
+            ]
+        except RuntimeError as exc:
+            raise CommandError(f"Startup failed: {exc}")
+
+        result = results[0]
+        timings = {
+            phase: statistics.median(
+                run["timings"][phase] for run in results
+            )
+            for phase in startup.PHASES
+        }
+        if options["json"]:
+            self.stdout.write(
+                json.dumps(
+                    {
+                        "timings": timings,
+                        "total": sum(timings.values()),
+                        "status": result["status"],
+                    }
+                )
+            )
+            return
+
+        for phase in startup.PHASES:
+            imports = result["imports"].get(phase, [])
+            self.stdout.write(
+                f"{phase:<14} {timings[phase] * 1000:8.1f}ms"
+                f"  ({len(imports)} modules imported)"
+            )
+            packages = startup.by_package(imports).most_common(options["top"])
+            for package, own in packages:
+                self.stdout.write(f"    {package:<40} {own / 1000:8.1f}ms")
+            slowest = sorted(imports, key=lambda item: -item[1])
+            for module, own, _ in slowest[: options["top"]]:
+                self.stdout.write(f"      {module:<38} {own / 1000:8.1f}ms")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Ready in {sum(timings.values()) * 1000:.1f}ms, "
+                f"GET {options['path']} -> {result['status']}"
+            )
+        )
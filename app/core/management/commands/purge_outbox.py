@@ -0,0 +1,32 @@
+# Django command to delete delivered, expired outbox events
+
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    # Command to purge old outbox events, run on a schedule
+
+    help = (
+        "Delete outbox events older than OUTBOX['RETENTION_DAYS'] that "
+        "every relay has delivered, in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Keep events this many days instead.",
+        )
+        parser.add_argument("--batch-size", type=int)
+
+    def handle(self, *args, **options):
+        before = None
+        if options["days"] is not None:
+            before = timezone.now() - datetime.timedelta(days=options["days"])
+        purged = outbox.purge(before, options["batch_size"])
+        self.stdout.write(f"{purged} events purged")
@@ -0,0 +1,33 @@
+# Django command to delete expired transaction idempotency keys
+
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core import idempotency
+
+
+class Command(BaseCommand):
+    # Command to purge old transaction keys, run on a schedule
+
+    help = (
+        "Delete transaction idempotency keys older than "
+        "IDEMPOTENCY['KEY_RETENTION_DAYS'], in batches. Transactions "
+        "retried after that are written again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Keep keys this many days instead.",
+        )
+        parser.add_argument("--batch-size", type=int)
+
+    def handle(self, *args, **options):
+        before = None
+        if options["days"] is not None:
+            before = timezone.now() - datetime.timedelta(days=options["days"])
+        purged = idempotency.purge(before, options["batch_size"])
+        self.stdout.write(f"{purged} keys purged")
@@ -0,0 +1,33 @@
+# Django command to refresh the customer lifetime value views
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import customer_value
+
+
+class Command(BaseCommand):
+    # Command to recompute customer LTV and RFM segments, run on a schedule
+
+    help = (
+        "Refresh the customer lifetime value and RFM segment materialized "
+        "views without blocking readers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--blocking",
+            action="store_true",
+            help="Refresh faster but lock readers out meanwhile.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        customer_value.refresh(concurrently=not options["blocking"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Customer value refreshed in "
+                f"{time.perf_counter() - start:.1f}s!"
+            )
+        )
@@ -0,0 +1,60 @@
+# Django command to relay outbox events to the configured sink
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    # Command to deliver change events, once or as a worker
+
+    help = (
+        "Deliver new outbox events to the sink in OUTBOX, in batches, at "
+        "least once. Progress is kept per --name, so a restarted relay "
+        "resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--name",
+            default="relay",
+            help="Relay whose progress to use, one per sink.",
+        )
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Deliver what is pending and stop.",
+        )
+
+    def handle(self, *args, **options):
+        config = outbox.config()
+        sink = outbox.make_sink(config)
+        batch_size = options["batch_size"] or config["BATCH_SIZE"]
+        delivered = 0
+        try:
+            while True:
+                try:
+                    sent = outbox.relay_once(sink, options["name"], batch_size)
+                except OSError as exc:
+                    # The sink is down, the batch is retried
+                    if options["once"]:
+                        raise
+                    self.stderr.write(f"Sink unavailable: {exc}")
+                    time.sleep(config["POLL_INTERVAL"])
+                    continue
+                delivered += sent
+                if sent:
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(config["POLL_INTERVAL"])
+                close_old_connections()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sink.close()
+        self.stdout.write(f"{delivered} events delivered")
@@ -1,27 +1,61 @@
-# Django command for to wait for db available
-
-from django.core.management.base import BaseCommand
+# Django command to wait for the database and other dependencies
 
 import time
 
-from psycopg2 import OperationalError as Psycopg2OpError
+from django.core.management.base import BaseCommand, CommandError
 
-from django.db.utils import OperationalError
+from core import readiness
 
 
 class Command(BaseCommand):
-    # Command to wait or db
+    # Command to wait for db
+
+    help = (
+        "Wait until every database and cache answers a probe, retrying "
+        "with jittered exponential backoff, and report the time to ready."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60,
+            help="Give up after this many seconds.",
+        )
+        parser.add_argument(
+            "--max-delay",
+            type=float,
+            default=readiness.MAX_DELAY,
+            help="Longest wait between two probes of a dependency.",
+        )
+
+    def on_retry(self, name, exc, delay):
+        reason = str(exc).strip().splitlines()[0] if str(exc) else exc
+        self.stdout.write(
+            f"{name} unavailable ({reason}), retrying in {delay:.2f}s..."
+        )
+
+    def on_ready(self, name, seconds, attempts):
+        self.stdout.write(
+            f"{name} ready in {seconds:.3f}s, attempts: {attempts}"
+        )
 
     def handle(self, *args, **options):
-        self.stdout.write('Waiting for database...')
-        db_up = False
-
-        while db_up is False:
-            try:
-                self.check(databases=['default'])
-                db_up = True
-            except(Psycopg2OpError, OperationalError):
-                self.stdout.write('Database unavailble, waiting 1 second...')
-                time.sleep(1)
-
-        self.stdout.write(self.style.SUCCESS('Database available!'))
+        self.stdout.write("Waiting for database...")
+        start = time.monotonic()
+        try:
+            readiness.wait_until_ready(
+                readiness.default_probes(),
+                timeout=options["timeout"],
+                max_delay=options["max_delay"],
+                on_ready=self.on_ready,
+                on_retry=self.on_retry,
+            )
+        except readiness.NotReady as exc:
+            raise CommandError(f"Dependencies unavailable: {exc}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Database available! time_to_ready="
+                f"{time.monotonic() - start:.3f}s"
+            )
+        )
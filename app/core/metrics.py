@@ -0,0 +1,237 @@
+# Per request SQL and latency metrics, aggregated per route
+#
+# RequestMetricsMiddleware records for every request:
+#   - the number of SQL queries and the time spent running them, on every
+#     database alias, through an execute wrapper installed on each new
+#     connection (DEBUG is not needed)
+#   - the time spent building serializer .data, which includes any
+#     queries serializing triggers
+#   - the total latency through the middleware, streamed bodies excluded
+# A request's numbers live in a context variable, so queries run by async
+# views in the database pool (core/asyncviews.py) are counted too.
+#
+# They are added to histograms per route, the view name a URL reverses by
+# (e.g. "catalog:product-detail"), kept per process and served by
+# requestMetricsView. Buckets are cumulative ("le": requests at most that
+# value), the last one, None, counts every request.
+#
+# REQUEST_METRICS["BUDGETS"] caps the queries per request of a route.
+# Requests over it are logged and counted here; the test suites assert the
+# same budgets with core.tests.budgets.QueryBudgetMixin, so N+1 regressions
+# fail there first.
+
+import asyncio
+import bisect
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # Milliseconds
+    "LATENCY_BUCKETS": [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000],
+    "QUERY_BUCKETS": [0, 1, 2, 3, 5, 10, 20, 50, 100],
+    "BUDGETS": {},
+}
+
+# Route of requests no URL pattern matched
+UNRESOLVED = "<unresolved>"
+
+# The RequestMetrics of the request being served
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+# {route: RouteMetrics} of this process
+_routes = {}
+_routes_lock = threading.Lock()
+
+
+def config():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, "REQUEST_METRICS", {}))
+    return options
+
+
+def budget(route):
+    # Most queries one request of route may run, None when unbudgeted
+    return config()["BUDGETS"].get(route)
+
+
+class Histogram:
+    # Count of observations at most each bound, their sum and maximum
+
+    def __init__(self, bounds):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def as_dict(self):
+        buckets = []
+        total = 0
+        for bound, count in zip(self.bounds + [None], self.counts):
+            total += count
+            buckets.append({"le": bound, "count": total})
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "max": round(self.max, 3),
+            "buckets": buckets,
+        }
+
+
+class RequestMetrics:
+    # Numbers of one request, times in seconds
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        # Nested .data calls are timed by the outermost one only
+        self.serializing = False
+
+
+class RouteMetrics:
+    # Histograms of the requests of one route, times in milliseconds
+
+    def __init__(self, options):
+        self.queries = Histogram(options["QUERY_BUCKETS"])
+        self.db_time = Histogram(options["LATENCY_BUCKETS"])
+        self.serializer_time = Histogram(options["LATENCY_BUCKETS"])
+        self.latency = Histogram(options["LATENCY_BUCKETS"])
+        self.over_budget = 0
+
+    def as_dict(self):
+        return {
+            "queries": self.queries.as_dict(),
+            "db_time_ms": self.db_time.as_dict(),
+            "serializer_time_ms": self.serializer_time.as_dict(),
+            "latency_ms": self.latency.as_dict(),
+            "over_budget": self.over_budget,
+        }
+
+
+def record(route, metrics, latency):
+    # Add one request of route to its histograms
+    options = config()
+    limit = options["BUDGETS"].get(route)
+    over_budget = limit is not None and metrics.queries > limit
+    with _routes_lock:
+        if route not in _routes:
+            _routes[route] = RouteMetrics(options)
+        stats = _routes[route]
+        stats.queries.observe(metrics.queries)
+        stats.db_time.observe(metrics.db_time * 1000)
+        stats.serializer_time.observe(metrics.serializer_time * 1000)
+        stats.latency.observe(latency * 1000)
+        stats.over_budget += over_budget
+    if over_budget:
+        logger.warning(
+            "%s ran %d queries, its budget is %d",
+            route,
+            metrics.queries,
+            limit,
+        )
+
+
+def snapshot():
+    # {route: histograms} of this process
+    with _routes_lock:
+        return {
+            route: stats.as_dict() for route, stats in sorted(_routes.items())
+        }
+
+
+def reset():
+    with _routes_lock:
+        _routes.clear()
+
+
+def time_query(execute, sql, params, many, context):
+    # Execute wrapper counting the queries of the current request
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - start
+        metrics.queries += 1
+
+
+def install_query_timer(sender, connection, **kwargs):
+    # Connected to connection_created, the wrapper list outlives reconnects
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+def timed_data(data):
+    # Wrap a serializer's data property to time the outermost call
+    def getter(serializer):
+        metrics = _current.get()
+        if metrics is None or metrics.serializing:
+            return data.fget(serializer)
+        metrics.serializing = True
+        start = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
+            metrics.serializing = False
+
+    getter.timed = True
+    return property(getter)
+
+
+def instrument_serializers():
+    # Time BaseSerializer.data, which Serializer and ListSerializer extend
+    from rest_framework import serializers
+
+    data = serializers.BaseSerializer.data
+    if not getattr(data.fget, "timed", False):
+        serializers.BaseSerializer.data = timed_data(data)
+
+
+def _route(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else UNRESOLVED
+
+
+@contextlib.contextmanager
+def measure(request):
+    # Collect the metrics of request while the block runs
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    start = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+        record(_route(request), metrics, time.perf_counter() - start)
+
+
+class RequestMetricsMiddleware(MiddlewareMixin):
+    # Record the metrics of every request, sync or async
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        with measure(request):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with measure(request):
+            return await self.get_response(request)
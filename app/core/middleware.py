@@ -0,0 +1,29 @@
+# Async-native versions of Django middleware whose hooks never block
+#
+# Under ASGI, Django runs each hook of a sync middleware in the one thread
+# shared by sync code and awaits it. These middleware only read the
+# request and set headers, so their hooks are called inline instead.
+
+from django.middleware.common import CommonMiddleware
+from django.middleware.security import SecurityMiddleware
+
+
+def inline_hooks(middleware_class):
+    # Subclass middleware_class calling its hooks on the event loop
+    class InlineHooks(middleware_class):
+        async def __acall__(self, request):
+            response = None
+            if hasattr(self, "process_request"):
+                response = self.process_request(request)
+            response = response or await self.get_response(request)
+            if hasattr(self, "process_response"):
+                response = self.process_response(request, response)
+            return response
+
+    InlineHooks.__name__ = f"Async{middleware_class.__name__}"
+    InlineHooks.__qualname__ = InlineHooks.__name__
+    return InlineHooks
+
+
+AsyncSecurityMiddleware = inline_hooks(SecurityMiddleware)
+AsyncCommonMiddleware = inline_hooks(CommonMiddleware)
@@ -0,0 +1,179 @@
+# Generated by Django 3.2.25 on 2026-10-18 15:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_alter_product_cost'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='Product',
+        ),
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('category_id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('sub_categories', models.JSONField()),
+                ('items', models.JSONField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Customer',
+            fields=[
+                ('customer_id', models.AutoField(primary_key=True, serialize=False)),
+                ('given_name', models.CharField(max_length=255)),
+                ('family_name', models.CharField(max_length=255)),
+                ('company_name', models.CharField(max_length=255)),
+                ('nickname', models.CharField(max_length=255)),
+                ('email_address', models.EmailField(max_length=254)),
+                ('address', models.TextField()),
+                ('phone_number', models.CharField(max_length=255)),
+                ('reference_id', models.CharField(max_length=255)),
+                ('group_id', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Discount',
+            fields=[
+                ('discount_id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('discount_type', models.CharField(max_length=255)),
+                ('amount_money', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('percentage', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('scope', models.CharField(max_length=255)),
+                ('customer_group_ids', models.JSONField()),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Employee',
+            fields=[
+                ('employee_id', models.AutoField(primary_key=True, serialize=False)),
+                ('first_name', models.CharField(max_length=255)),
+                ('last_name', models.CharField(max_length=255)),
+                ('nick_name', models.CharField(max_length=255)),
+                ('email_address', models.EmailField(max_length=254, unique=True)),
+                ('phone', models.CharField(max_length=255)),
+                ('role_id', models.CharField(max_length=255)),
+                ('status', models.CharField(max_length=255)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('location_id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('address', models.TextField()),
+                ('phone', models.CharField(max_length=255)),
+                ('time_zone', models.CharField(max_length=255)),
+                ('business_name', models.CharField(max_length=255)),
+                ('type', models.CharField(max_length=255)),
+                ('website', models.URLField()),
+                ('business_hours', models.JSONField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('order_id', models.AutoField(primary_key=True, serialize=False)),
+                ('buyer_email', models.EmailField(max_length=254)),
+                ('recipient_name', models.CharField(max_length=255)),
+                ('recipient_phone_number', models.CharField(max_length=255)),
+                ('state', models.CharField(max_length=255)),
+                ('shipping_address', models.JSONField()),
+                ('billing_address', models.JSONField()),
+                ('note', models.TextField(blank=True)),
+                ('line_items', models.JSONField()),
+                ('taxes', models.JSONField()),
+                ('discounts', models.JSONField()),
+                ('service_charges', models.JSONField()),
+                ('fulfillments', models.JSONField()),
+                ('refunds', models.JSONField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('product_id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('UPC', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('cost', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('available_online', models.BooleanField()),
+                ('available_for_pickup', models.BooleanField()),
+                ('available_electronically', models.BooleanField()),
+                ('is_service', models.BooleanField()),
+                ('track_inventory', models.BooleanField()),
+                ('inventory_alert_type', models.CharField(max_length=255)),
+                ('inventory_alert_threshold', models.IntegerField()),
+                ('product_data', models.JSONField()),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='products', to='core.category')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Variation',
+            fields=[
+                ('variation_id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('sku', models.CharField(max_length=255)),
+                ('upc', models.CharField(max_length=255)),
+                ('cost_money', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('price_money', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('pricing_type', models.CharField(max_length=255)),
+                ('track_inventory', models.BooleanField()),
+                ('inventory_alert_type', models.CharField(max_length=255)),
+                ('inventory_alert_threshold', models.IntegerField()),
+                ('item_option_values', models.JSONField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variations', to='core.product')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Transaction',
+            fields=[
+                ('transaction_id', models.AutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField()),
+                ('tender', models.JSONField()),
+                ('amount_money', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('tip_money', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('processing_fee_money', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('client_id', models.CharField(max_length=255)),
+                ('refunds', models.JSONField()),
+                ('reference_id', models.CharField(max_length=255)),
+                ('product', models.JSONField()),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='core.customer')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='core.employee')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='core.location')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='core.order')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='variation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='products', to='core.variation'),
+        ),
+        migrations.CreateModel(
+            name='ItemSold',
+            fields=[
+                ('item_sold_id', models.AutoField(primary_key=True, serialize=False)),
+                ('quantity', models.IntegerField()),
+                ('note', models.TextField(blank=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items_sold', to='core.product')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items_sold', to='core.order')),
+                ('variation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items_sold', to='core.variation')),
+            ],
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 3.2.25 on 2026-10-18 15:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_sales_models'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeeklySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('revenue_money', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('line_count', models.IntegerField(default=0)),
+                ('location', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.location')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.product')),
+                ('variation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.variation')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SaleFact',
+            fields=[
+                ('item_sold', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fact', serialize=False, to='core.itemsold')),
+                ('sold_on', models.DateField()),
+                ('quantity', models.IntegerField()),
+                ('revenue_money', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('location', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sale_facts', to='core.location')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sale_facts', to='core.order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sale_facts', to='core.product')),
+                ('variation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sale_facts', to='core.variation')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MonthlySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('revenue_money', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('line_count', models.IntegerField(default=0)),
+                ('location', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.location')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.product')),
+                ('variation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.variation')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('revenue_money', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('line_count', models.IntegerField(default=0)),
+                ('location', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.location')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.product')),
+                ('variation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.variation')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='weeklysalesrollup',
+            constraint=models.UniqueConstraint(fields=('period_start', 'product', 'variation', 'location'), name='weekly_rollup_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='weeklysalesrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('location__isnull', True)), fields=('period_start', 'product', 'variation'), name='weekly_rollup_unique_no_location'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlysalesrollup',
+            constraint=models.UniqueConstraint(fields=('period_start', 'product', 'variation', 'location'), name='monthly_rollup_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlysalesrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('location__isnull', True)), fields=('period_start', 'product', 'variation'), name='monthly_rollup_unique_no_location'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailysalesrollup',
+            constraint=models.UniqueConstraint(fields=('period_start', 'product', 'variation', 'location'), name='daily_rollup_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailysalesrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('location__isnull', True)), fields=('period_start', 'product', 'variation'), name='daily_rollup_unique_no_location'),
+        ),
+    ]
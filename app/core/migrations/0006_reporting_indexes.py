@@ -0,0 +1,65 @@
+# Generated by Django 3.2.25 on 2026-10-18 15:39
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built without locking writes on the live tables
+    atomic = False
+
+    dependencies = [
+        ('core', '0005_sales_rollups'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='customer',
+            index=models.Index(fields=['email_address'], name='customer_email_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['created_at', 'order_id'], name='order_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['buyer_email'], name='order_buyer_email_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['state'], name='order_state_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(condition=models.Q(('state', 'OPEN')), fields=['created_at'], name='order_open_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['line_items'], name='order_line_items_gin', opclasses=['jsonb_path_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['UPC'], name='product_upc_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(fields=['created_at', 'transaction_id'], name='transaction_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(fields=['location', 'created_at'], name='transaction_location_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(fields=['customer', 'created_at'], name='transaction_customer_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tender'], name='transaction_tender_gin', opclasses=['jsonb_path_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='variation',
+            index=models.Index(fields=['sku'], name='variation_sku_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Convert core_transaction to monthly range partitions on created_at
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def partition_transactions(apps, schema_editor):
+    from core import partitions
+
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        if partitions.is_partitioned('core_transaction', cursor):
+            return
+        partitions.convert_to_partitioned(
+            'core_transaction', timezone.now(), 3, cursor
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_reporting_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            partition_transactions, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,174 @@
+# Generated by Django 3.2.25 on 2026-10-18 15:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_partition_transaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderDiscount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('uid', models.CharField(blank=True, max_length=255)),
+                ('data', models.JSONField()),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('percentage', models.DecimalField(decimal_places=4, max_digits=9, null=True)),
+                ('applied_money', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+            ],
+            options={
+                'ordering': ['order', 'position'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderFulfillment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('uid', models.CharField(blank=True, max_length=255)),
+                ('data', models.JSONField()),
+                ('type', models.CharField(blank=True, max_length=255)),
+                ('state', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'ordering': ['order', 'position'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderLineItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('uid', models.CharField(blank=True, max_length=255)),
+                ('data', models.JSONField()),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('sku', models.CharField(blank=True, max_length=255)),
+                ('quantity', models.DecimalField(decimal_places=3, max_digits=12)),
+                ('base_price_money', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('total_money', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+            ],
+            options={
+                'ordering': ['order', 'position'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderRefund',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('uid', models.CharField(blank=True, max_length=255)),
+                ('data', models.JSONField()),
+                ('reason', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(blank=True, max_length=255)),
+                ('amount_money', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+            ],
+            options={
+                'ordering': ['order', 'position'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderServiceCharge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('uid', models.CharField(blank=True, max_length=255)),
+                ('data', models.JSONField()),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('percentage', models.DecimalField(decimal_places=4, max_digits=9, null=True)),
+                ('applied_money', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+            ],
+            options={
+                'ordering': ['order', 'position'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderTax',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('uid', models.CharField(blank=True, max_length=255)),
+                ('data', models.JSONField()),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('percentage', models.DecimalField(decimal_places=4, max_digits=9, null=True)),
+                ('applied_money', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+            ],
+            options={
+                'ordering': ['order', 'position'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='items_normalized',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='ordertax',
+            name='order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tax_rows', to='core.order'),
+        ),
+        migrations.AddField(
+            model_name='orderservicecharge',
+            name='order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='service_charge_rows', to='core.order'),
+        ),
+        migrations.AddField(
+            model_name='orderrefund',
+            name='order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='refund_rows', to='core.order'),
+        ),
+        migrations.AddField(
+            model_name='orderlineitem',
+            name='order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='line_item_rows', to='core.order'),
+        ),
+        migrations.AddField(
+            model_name='orderfulfillment',
+            name='order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fulfillment_rows', to='core.order'),
+        ),
+        migrations.AddField(
+            model_name='orderdiscount',
+            name='order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='discount_rows', to='core.order'),
+        ),
+        migrations.AddConstraint(
+            model_name='ordertax',
+            constraint=models.UniqueConstraint(fields=('order', 'position'), name='order_tax_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='orderservicecharge',
+            constraint=models.UniqueConstraint(fields=('order', 'position'), name='order_service_charge_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='orderrefund',
+            constraint=models.UniqueConstraint(fields=('order', 'position'), name='order_refund_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='orderlineitem',
+            index=models.Index(fields=['sku'], name='order_line_item_sku_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='orderlineitem',
+            constraint=models.UniqueConstraint(fields=('order', 'position'), name='order_line_item_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='orderfulfillment',
+            constraint=models.UniqueConstraint(fields=('order', 'position'), name='order_fulfillment_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='orderdiscount',
+            constraint=models.UniqueConstraint(fields=('order', 'position'), name='order_discount_unique'),
+        ),
+    ]
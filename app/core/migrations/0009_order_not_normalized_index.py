@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-18 15:50
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Built without locking writes on core_order
+    atomic = False
+
+    dependencies = [
+        ('core', '0008_order_items'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(condition=models.Q(('items_normalized', False)), fields=['order_id'], name='order_not_normalized_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_order_not_normalized_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('location', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock', to='core.location')),
+                ('variation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock', to='core.variation')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InventoryMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField()),
+                ('reason', models.CharField(choices=[('SALE', 'Sale'), ('RETURN', 'Return'), ('RECEIPT', 'Receipt'), ('ADJUSTMENT', 'Adjustment'), ('RELOCATION', 'Relocation')], max_length=16)),
+                ('note', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('item_sold', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movements', to='core.itemsold')),
+                ('location', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='core.location')),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movements', to='core.order')),
+                ('variation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='core.variation')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='inventorystock',
+            constraint=models.UniqueConstraint(fields=('variation', 'location'), name='inventory_stock_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='inventorystock',
+            constraint=models.UniqueConstraint(condition=models.Q(('location__isnull', True)), fields=('variation',), name='inventory_stock_unique_no_location'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorymovement',
+            index=models.Index(fields=['variation', 'location', 'created_at'], name='movement_variation_idx'),
+        ),
+    ]
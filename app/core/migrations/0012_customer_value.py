@@ -0,0 +1,118 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Quintile scores are ordered by customer_id within ties so refreshes are
+# stable. Segments are the first matching rule, top to bottom.
+CUSTOMER_VALUE = '''
+CREATE MATERIALIZED VIEW core_customervalue AS
+WITH totals AS (
+    SELECT customer_id,
+           count(*) AS transaction_count,
+           sum(amount_money) AS spend_money,
+           sum(tip_money) AS tip_money,
+           sum(amount_money + tip_money) AS lifetime_value,
+           min(created_at) AS first_purchase_at,
+           max(created_at) AS last_purchase_at
+    FROM core_transaction
+    GROUP BY customer_id
+), scored AS (
+    SELECT totals.*,
+           round(lifetime_value / transaction_count, 2) AS average_money,
+           ntile(5) OVER (ORDER BY last_purchase_at, customer_id)
+               AS recency_score,
+           ntile(5) OVER (ORDER BY transaction_count, customer_id)
+               AS frequency_score,
+           ntile(5) OVER (ORDER BY lifetime_value, customer_id)
+               AS monetary_score
+    FROM totals
+)
+SELECT scored.*,
+       CASE
+           WHEN recency_score >= 4 AND frequency_score >= 4
+               THEN 'champions'
+           WHEN recency_score <= 2 AND frequency_score >= 3 THEN 'at_risk'
+           WHEN frequency_score >= 4 THEN 'loyal'
+           WHEN recency_score >= 4 AND frequency_score = 1 THEN 'new'
+           WHEN recency_score >= 4 THEN 'promising'
+           WHEN recency_score <= 2 THEN 'hibernating'
+           ELSE 'needs_attention'
+       END AS segment,
+       now() AS refreshed_at
+FROM scored;
+
+-- REFRESH ... CONCURRENTLY needs a unique index
+CREATE UNIQUE INDEX customervalue_customer_idx
+    ON core_customervalue (customer_id);
+CREATE INDEX customervalue_segment_idx
+    ON core_customervalue (segment, lifetime_value DESC, customer_id DESC);
+'''
+
+CUSTOMER_SEGMENT = '''
+CREATE MATERIALIZED VIEW core_customersegment AS
+SELECT segment,
+       count(*) AS customers,
+       sum(lifetime_value) AS lifetime_value,
+       round(avg(lifetime_value), 2) AS average_value,
+       round(avg(transaction_count), 2) AS average_transactions,
+       max(refreshed_at) AS refreshed_at
+FROM core_customervalue
+GROUP BY segment;
+
+CREATE UNIQUE INDEX customersegment_segment_idx
+    ON core_customersegment (segment);
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_stock_alerts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerSegment',
+            fields=[
+                ('segment', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('customers', models.IntegerField()),
+                ('lifetime_value', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('average_value', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('average_transactions', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'core_customersegment',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CustomerValue',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='value', serialize=False, to='core.customer')),
+                ('transaction_count', models.IntegerField()),
+                ('spend_money', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('tip_money', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('lifetime_value', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('average_money', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('first_purchase_at', models.DateTimeField()),
+                ('last_purchase_at', models.DateTimeField()),
+                ('recency_score', models.SmallIntegerField()),
+                ('frequency_score', models.SmallIntegerField()),
+                ('monetary_score', models.SmallIntegerField()),
+                ('segment', models.CharField(max_length=32)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'core_customervalue',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(
+            CUSTOMER_VALUE, 'DROP MATERIALIZED VIEW core_customervalue'
+        ),
+        migrations.RunSQL(
+            CUSTOMER_SEGMENT, 'DROP MATERIALIZED VIEW core_customersegment'
+        ),
+    ]
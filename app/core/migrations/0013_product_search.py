@@ -0,0 +1,97 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+BATCH_SIZE = 10000
+
+# Case insensitive SKU prefixes, matches sku__istartswith
+SKU_PREFIX_INDEX = '''
+CREATE INDEX CONCURRENTLY IF NOT EXISTS variation_sku_prefix_idx
+ON core_variation (UPPER(sku::text) text_pattern_ops)
+'''
+
+# Only built where the database offers pg_trgm, see catalog/search.py
+TRIGRAM_INDEXES = [
+    '''
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS product_name_trgm
+    ON core_product USING gin (name gin_trgm_ops)
+    ''',
+    '''
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS variation_sku_trgm
+    ON core_variation USING gin (sku gin_trgm_ops)
+    ''',
+]
+
+
+def backfill_search_vectors(apps, schema_editor):
+    # In batches, each committed on its own so rows are not locked for long.
+    # The expression is copied from catalog.search.search_vector() as it
+    # was written, so later changes there do not alter this migration.
+    Product = apps.get_model('core', 'Product')
+    last = 0
+    while True:
+        ids = list(
+            Product.objects.filter(pk__gt=last)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:BATCH_SIZE]
+        )
+        if not ids:
+            return
+        Product.objects.filter(pk__gte=ids[0], pk__lte=ids[-1]).update(
+            search_vector=(
+                SearchVector('name', 'UPC', weight='A', config='english')
+                + SearchVector('description', weight='B', config='english')
+            )
+        )
+        last = ids[-1]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+        )
+        if cursor.fetchone() is None:
+            return
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for sql in TRIGRAM_INDEXES:
+            cursor.execute(sql)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP INDEX CONCURRENTLY IF EXISTS product_name_trgm')
+        cursor.execute('DROP INDEX CONCURRENTLY IF EXISTS variation_sku_trgm')
+
+
+class Migration(migrations.Migration):
+    # Indexes are built without locking writes on the catalog
+    atomic = False
+
+    dependencies = [
+        ('core', '0012_customer_value'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            backfill_search_vectors, migrations.RunPython.noop
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_gin'),
+        ),
+        migrations.RunSQL(
+            SKU_PREFIX_INDEX,
+            'DROP INDEX CONCURRENTLY IF EXISTS variation_sku_prefix_idx',
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:20
+
+from django.db import migrations, models
+
+# Row triggers append one core_outboxevent per changed row, in the
+# changing transaction. Arguments: aggregate type, primary key column,
+# then columns left out of the payload (derived or bookkeeping columns,
+# an update touching only those is not an event).
+CAPTURE_FUNCTION = '''
+CREATE OR REPLACE FUNCTION core_outbox_capture() RETURNS trigger AS $$
+DECLARE
+    old_row jsonb;
+    new_row jsonb;
+    changed jsonb;
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        old_row := to_jsonb(OLD) - TG_ARGV[2:];
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        new_row := to_jsonb(NEW) - TG_ARGV[2:];
+    END IF;
+    IF TG_OP = 'UPDATE' AND old_row = new_row THEN
+        RETURN NULL;
+    END IF;
+    changed := COALESCE(new_row, old_row);
+    INSERT INTO core_outboxevent
+        (txid, aggregate_type, aggregate_id, event_type, payload, created_at)
+    VALUES
+        (txid_current(), TG_ARGV[0], changed ->> TG_ARGV[1], lower(TG_OP),
+         changed, now());
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+'''
+
+# table: (aggregate type, primary key, columns left out)
+CAPTURED = {
+    'core_order': ('order', 'order_id', ['items_normalized']),
+    'core_transaction': ('transaction', 'transaction_id', []),
+    'core_product': ('product', 'product_id', ['search_vector']),
+    'core_customer': ('customer', 'customer_id', []),
+}
+
+
+def trigger_name(table):
+    return f'{table}_outbox'
+
+
+def create_triggers():
+    statements = [CAPTURE_FUNCTION]
+    for table, (aggregate, key, ignored) in CAPTURED.items():
+        arguments = ', '.join(f"'{value}'" for value in [aggregate, key, *ignored])
+        # Created on the parent of a partitioned table, partitions inherit it
+        statements.append(
+            f'CREATE TRIGGER {trigger_name(table)} '
+            f'AFTER INSERT OR UPDATE OR DELETE ON {table} '
+            f'FOR EACH ROW EXECUTE FUNCTION core_outbox_capture({arguments})'
+        )
+    return statements
+
+
+def drop_triggers():
+    return [
+        f'DROP TRIGGER IF EXISTS {trigger_name(table)} ON {table}'
+        for table in CAPTURED
+    ] + ['DROP FUNCTION IF EXISTS core_outbox_capture()']
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_product_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('txid', models.BigIntegerField()),
+                ('aggregate_type', models.CharField(max_length=32)),
+                ('aggregate_id', models.CharField(max_length=64)),
+                ('event_type', models.CharField(max_length=8)),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['txid', 'id'], name='outbox_txid_idx'),
+                    models.Index(fields=['aggregate_type', 'aggregate_id', 'id'], name='outbox_aggregate_idx'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='OutboxOffset',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('cursor', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunSQL(create_triggers(), drop_triggers()),
+    ]
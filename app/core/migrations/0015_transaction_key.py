@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# Claim the keys of recent transactions, so an upload retried across the
+# deploy is not written twice
+BACKFILL_KEYS = '''
+INSERT INTO core_transactionkey (client_id, reference_id, created_at)
+SELECT client_id, reference_id, now()
+FROM core_transaction
+WHERE client_id <> '' AND reference_id <> ''
+  AND created_at >= now() - interval '1 day'
+ON CONFLICT (client_id, reference_id) DO NOTHING
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_id', models.CharField(max_length=255)),
+                ('reference_id', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='transaction_key_age_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='transactionkey',
+            constraint=models.UniqueConstraint(fields=('client_id', 'reference_id'), name='transaction_key_unique'),
+        ),
+        migrations.RunSQL(BACKFILL_KEYS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.2.25 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+BATCH_SIZE = 10000
+
+# The fact's revenue was priced when the sale was recorded, so it is the
+# best record of the price sold at; the variation's price is the fallback
+BACKFILL_PRICES = '''
+UPDATE core_itemsold i
+SET price_money = COALESCE(
+    (SELECT round(f.revenue_money / i.quantity, 2)
+     FROM core_salefact f
+     WHERE f.item_sold_id = i.item_sold_id AND i.quantity <> 0),
+    (SELECT v.price_money FROM core_variation v
+     WHERE v.variation_id = i.variation_id)
+)
+WHERE i.item_sold_id BETWEEN %s AND %s AND i.price_money IS NULL
+'''
+
+
+def backfill_prices(apps, schema_editor):
+    # In batches, each committed on its own so rows are not locked for long
+    ItemSold = apps.get_model('core', 'ItemSold')
+    last = 0
+    while True:
+        ids = list(
+            ItemSold.objects.filter(pk__gt=last)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:BATCH_SIZE]
+        )
+        if not ids:
+            return
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(BACKFILL_PRICES, [ids[0], ids[-1]])
+        last = ids[-1]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('core', '0015_transaction_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemsold',
+            name='price_money',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(backfill_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 3.2.25 on 2026-10-18 22:05
+
+from django.db import migrations
+
+# refreshed_at gave every row a new value on every refresh, so REFRESH ...
+# CONCURRENTLY rewrote the whole view each time. The refresh time is kept
+# in the customer_value JobWatermark instead. {refreshed} and
+# {segment_refreshed} restore the column when migrating backwards.
+CUSTOMER_VALUE = '''
+CREATE MATERIALIZED VIEW core_customervalue AS
+WITH totals AS (
+    SELECT customer_id,
+           count(*) AS transaction_count,
+           sum(amount_money) AS spend_money,
+           sum(tip_money) AS tip_money,
+           sum(amount_money + tip_money) AS lifetime_value,
+           min(created_at) AS first_purchase_at,
+           max(created_at) AS last_purchase_at
+    FROM core_transaction
+    GROUP BY customer_id
+), scored AS (
+    SELECT totals.*,
+           round(lifetime_value / transaction_count, 2) AS average_money,
+           ntile(5) OVER (ORDER BY last_purchase_at, customer_id)
+               AS recency_score,
+           ntile(5) OVER (ORDER BY transaction_count, customer_id)
+               AS frequency_score,
+           ntile(5) OVER (ORDER BY lifetime_value, customer_id)
+               AS monetary_score
+    FROM totals
+)
+SELECT scored.*,
+       CASE
+           WHEN recency_score >= 4 AND frequency_score >= 4
+               THEN 'champions'
+           WHEN recency_score <= 2 AND frequency_score >= 3 THEN 'at_risk'
+           WHEN frequency_score >= 4 THEN 'loyal'
+           WHEN recency_score >= 4 AND frequency_score = 1 THEN 'new'
+           WHEN recency_score >= 4 THEN 'promising'
+           WHEN recency_score <= 2 THEN 'hibernating'
+           ELSE 'needs_attention'
+       END AS segment{refreshed}
+FROM scored;
+
+CREATE UNIQUE INDEX customervalue_customer_idx
+    ON core_customervalue (customer_id);
+CREATE INDEX customervalue_segment_idx
+    ON core_customervalue (segment, lifetime_value DESC, customer_id DESC);
+
+CREATE MATERIALIZED VIEW core_customersegment AS
+SELECT segment,
+       count(*) AS customers,
+       sum(lifetime_value) AS lifetime_value,
+       round(avg(lifetime_value), 2) AS average_value,
+       round(avg(transaction_count), 2) AS average_transactions{segment_refreshed}
+FROM core_customervalue
+GROUP BY segment;
+
+CREATE UNIQUE INDEX customersegment_segment_idx
+    ON core_customersegment (segment);
+'''
+
+DROP_VIEWS = '''
+DROP MATERIALIZED VIEW core_customersegment;
+DROP MATERIALIZED VIEW core_customervalue;
+'''
+
+# The views are populated when created
+RECORD_REFRESH = '''
+INSERT INTO core_jobwatermark (name, value) VALUES ('customer_value', now())
+ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_itemsold_price'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='customersegment',
+            name='refreshed_at',
+        ),
+        migrations.RemoveField(
+            model_name='customervalue',
+            name='refreshed_at',
+        ),
+        migrations.RunSQL(
+            DROP_VIEWS
+            + CUSTOMER_VALUE.format(refreshed='', segment_refreshed='')
+            + RECORD_REFRESH,
+            DROP_VIEWS
+            + CUSTOMER_VALUE.format(
+                refreshed=',\n       now() AS refreshed_at',
+                segment_refreshed=',\n       max(refreshed_at) AS refreshed_at',
+            ),
+        ),
+    ]
@@ -1,8 +1,13 @@
 # DB Models
 
+import datetime
+
 # Allows us to define new models
 from django.db import models  # noqa
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.conf import settings
+from django.utils import timezone
 
 # Base user defines all of the fields and methods
 # needed for the predef user model
@@ -60,28 +65,6 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
 
 
-class Product(models.Model):
-    # Product in the system
-    name = models.CharField(max_length=255)
-    # category = models.ForeignKey(Category, on_delete=models.CASCADE)
-    UPC = models.CharField(max_length=255)
-    description = models.TextField(blank=True)
-    price = models.DecimalField(max_digits=10, decimal_places=2)
-    cost = models.DecimalField(max_digits=10, decimal_places=2, null=True)
-    available_online = models.BooleanField(default=True)
-    available_for_pickup = models.BooleanField(default=True)
-    available_electronically = models.BooleanField(default=True)
-    is_service = models.BooleanField(default=False)
-    track_inventory = models.BooleanField(default=True)
-    inventory_alert_type = models.CharField(max_length=255, blank=True)
-    inventory_alert_threshold = models.PositiveIntegerField(null=True, blank=True)
-    # variation = models.ForeignKey(Variation, on_delete=models.CASCADE, null=True, blank=True)
-    product_data = models.TextField(blank=True)
-
-    def __str__(self):
-        return self.name
-
-
 class Category(models.Model):
     category_id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=255)
@@ -98,7 +81,7 @@ class Variation(models.Model):
     variation_id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=255)
     product = models.ForeignKey(
-        Product, related_name="variations", on_delete=models.CASCADE
+        "Product", related_name="variations", on_delete=models.CASCADE
     )
     sku = models.CharField(max_length=255)
     upc = models.CharField(max_length=255)
@@ -110,6 +93,11 @@ class Variation(models.Model):
     inventory_alert_threshold = models.IntegerField()
     item_option_values = models.JSONField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["sku"], name="variation_sku_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -139,6 +127,14 @@ class Product(models.Model):
         on_delete=models.SET_NULL,
     )
     product_data = models.JSONField()
+    # Weighted name, UPC and description, see catalog/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["UPC"], name="product_upc_idx"),
+            GinIndex(fields=["search_vector"], name="product_search_gin"),
+        ]
 
     def __str__(self):
         return self.name
@@ -187,6 +183,11 @@ class Customer(models.Model):
     created_at = models.DateTimeField()
     updated_at = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["email_address"], name="customer_email_idx"),
+        ]
+
     def __str__(self):
         return f"{self.given_name} {self.family_name}"
 
@@ -208,9 +209,167 @@ class Order(models.Model):
     refunds = models.JSONField()
     created_at = models.DateTimeField()
     updated_at = models.DateTimeField()
+    # The JSON collections have been copied into the Order* child tables,
+    # see core.order_items
+    items_normalized = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination and date range reads
+            models.Index(
+                fields=["created_at", "order_id"], name="order_created_idx"
+            ),
+            # Orders still waiting for normalize_orders
+            models.Index(
+                fields=["order_id"],
+                condition=models.Q(items_normalized=False),
+                name="order_not_normalized_idx",
+            ),
+            models.Index(fields=["buyer_email"], name="order_buyer_email_idx"),
+            models.Index(fields=["state"], name="order_state_idx"),
+            # Open orders are a small, hot slice of the table
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(state="OPEN"),
+                name="order_open_created_idx",
+            ),
+            GinIndex(
+                fields=["line_items"],
+                opclasses=["jsonb_path_ops"],
+                name="order_line_items_gin",
+            ),
+        ]
 
     def __str__(self):
-        return self.order_id
+        return str(self.order_id)
+
+
+class OrderEntry(models.Model):
+    # One element of an Order JSON collection, kept in list position order
+    # The relational columns are extracted from data, which keeps the whole
+    # element so nothing is lost while the JSON is still the source of truth
+    position = models.PositiveIntegerField()
+    uid = models.CharField(max_length=255, blank=True)
+    data = models.JSONField()
+
+    class Meta:
+        abstract = True
+        ordering = ["order", "position"]
+
+    def __str__(self):
+        return f"{self.order_id} #{self.position}"
+
+
+class OrderLineItem(OrderEntry):
+    order = models.ForeignKey(
+        Order, related_name="line_item_rows", on_delete=models.CASCADE
+    )
+    name = models.CharField(max_length=255, blank=True)
+    sku = models.CharField(max_length=255, blank=True)
+    quantity = models.DecimalField(max_digits=12, decimal_places=3)
+    base_price_money = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True
+    )
+    total_money = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True
+    )
+
+    class Meta(OrderEntry.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["order", "position"], name="order_line_item_unique"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["sku"], name="order_line_item_sku_idx"),
+        ]
+
+
+class OrderAdjustment(OrderEntry):
+    # Shared columns of taxes, discounts and service charges
+    name = models.CharField(max_length=255, blank=True)
+    percentage = models.DecimalField(
+        max_digits=9, decimal_places=4, null=True
+    )
+    applied_money = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True
+    )
+
+    class Meta(OrderEntry.Meta):
+        abstract = True
+
+
+class OrderTax(OrderAdjustment):
+    order = models.ForeignKey(
+        Order, related_name="tax_rows", on_delete=models.CASCADE
+    )
+
+    class Meta(OrderAdjustment.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["order", "position"], name="order_tax_unique"
+            ),
+        ]
+
+
+class OrderDiscount(OrderAdjustment):
+    order = models.ForeignKey(
+        Order, related_name="discount_rows", on_delete=models.CASCADE
+    )
+
+    class Meta(OrderAdjustment.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["order", "position"], name="order_discount_unique"
+            ),
+        ]
+
+
+class OrderServiceCharge(OrderAdjustment):
+    order = models.ForeignKey(
+        Order, related_name="service_charge_rows", on_delete=models.CASCADE
+    )
+
+    class Meta(OrderAdjustment.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["order", "position"],
+                name="order_service_charge_unique",
+            ),
+        ]
+
+
+class OrderFulfillment(OrderEntry):
+    order = models.ForeignKey(
+        Order, related_name="fulfillment_rows", on_delete=models.CASCADE
+    )
+    type = models.CharField(max_length=255, blank=True)
+    state = models.CharField(max_length=255, blank=True)
+
+    class Meta(OrderEntry.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["order", "position"], name="order_fulfillment_unique"
+            ),
+        ]
+
+
+class OrderRefund(OrderEntry):
+    order = models.ForeignKey(
+        Order, related_name="refund_rows", on_delete=models.CASCADE
+    )
+    reason = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=255, blank=True)
+    amount_money = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True
+    )
+
+    class Meta(OrderEntry.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["order", "position"], name="order_refund_unique"
+            ),
+        ]
 
 
 class Transaction(models.Model):
@@ -237,8 +396,35 @@ class Transaction(models.Model):
     reference_id = models.CharField(max_length=255)
     product = models.JSONField()
 
+    # The table is range partitioned by month on created_at (see
+    # core.partitions): unique constraints must include created_at and new
+    # indexes cannot be added with AddIndexConcurrently.
+    class Meta:
+        indexes = [
+            # Keyset pagination and date range reads
+            models.Index(
+                fields=["created_at", "transaction_id"],
+                name="transaction_created_idx",
+            ),
+            # Time range by location
+            models.Index(
+                fields=["location", "created_at"],
+                name="transaction_location_idx",
+            ),
+            # Customer purchase history
+            models.Index(
+                fields=["customer", "created_at"],
+                name="transaction_customer_idx",
+            ),
+            GinIndex(
+                fields=["tender"],
+                opclasses=["jsonb_path_ops"],
+                name="transaction_tender_gin",
+            ),
+        ]
+
     def __str__(self):
-        return self.transaction_id
+        return str(self.transaction_id)
 
 
 class ItemSold(models.Model):
@@ -254,10 +440,21 @@ class ItemSold(models.Model):
     )
     quantity = models.IntegerField()
     note = models.TextField(blank=True)
+    # Unit price when sold, copied from the variation on the first save so
+    # later price changes do not rewrite sales history. Rows sold before
+    # it existed hold the price at the time of migration 0016
+    price_money = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True
+    )
 
     def __str__(self):
         return f"{self.item.name} ({self.variation.name}) - {self.quantity}"
 
+    def save(self, *args, **kwargs):
+        if self.price_money is None:
+            self.price_money = self.variation.price_money
+        super().save(*args, **kwargs)
+
 
 class Discount(models.Model):
     discount_id = models.AutoField(primary_key=True)
@@ -272,3 +469,378 @@ class Discount(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class SaleFact(models.Model):
+    # One compact row per ItemSold with the dimensions reports group by
+    item_sold = models.OneToOneField(
+        ItemSold,
+        primary_key=True,
+        related_name="fact",
+        on_delete=models.CASCADE,
+    )
+    product = models.ForeignKey(
+        Product, related_name="sale_facts", on_delete=models.CASCADE
+    )
+    variation = models.ForeignKey(
+        Variation, related_name="sale_facts", on_delete=models.CASCADE
+    )
+    location = models.ForeignKey(
+        Location,
+        null=True,
+        related_name="sale_facts",
+        on_delete=models.SET_NULL,
+    )
+    order = models.ForeignKey(
+        Order, related_name="sale_facts", on_delete=models.CASCADE
+    )
+    sold_on = models.DateField()
+    quantity = models.IntegerField()
+    revenue_money = models.DecimalField(max_digits=12, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.sold_on} {self.variation_id} x{self.quantity}"
+
+
+class SalesRollup(models.Model):
+    # Pre-aggregated sales per product, variation, location and period
+    product = models.ForeignKey(
+        Product, related_name="+", on_delete=models.CASCADE
+    )
+    variation = models.ForeignKey(
+        Variation, related_name="+", on_delete=models.CASCADE
+    )
+    location = models.ForeignKey(
+        Location, null=True, related_name="+", on_delete=models.CASCADE
+    )
+    period_start = models.DateField()
+    units = models.IntegerField(default=0)
+    revenue_money = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0
+    )
+    line_count = models.IntegerField(default=0)
+
+    # Name of the date_trunc() kind the period is aligned to
+    period = None
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.period} {self.period_start} {self.variation_id}"
+
+    @classmethod
+    def truncate(cls, day):
+        # Return the first day of the period containing day
+        if cls.period == "week":
+            # Weeks start on Monday, like PostgreSQL's date_trunc
+            return day - datetime.timedelta(days=day.weekday())
+        if cls.period == "month":
+            return day.replace(day=1)
+        return day
+
+
+class DailySalesRollup(SalesRollup):
+    period = "day"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period_start", "product", "variation", "location"],
+                name="daily_rollup_unique",
+            ),
+            models.UniqueConstraint(
+                fields=["period_start", "product", "variation"],
+                condition=models.Q(location__isnull=True),
+                name="daily_rollup_unique_no_location",
+            ),
+        ]
+
+
+class WeeklySalesRollup(SalesRollup):
+    period = "week"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period_start", "product", "variation", "location"],
+                name="weekly_rollup_unique",
+            ),
+            models.UniqueConstraint(
+                fields=["period_start", "product", "variation"],
+                condition=models.Q(location__isnull=True),
+                name="weekly_rollup_unique_no_location",
+            ),
+        ]
+
+
+class MonthlySalesRollup(SalesRollup):
+    period = "month"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period_start", "product", "variation", "location"],
+                name="monthly_rollup_unique",
+            ),
+            models.UniqueConstraint(
+                fields=["period_start", "product", "variation"],
+                condition=models.Q(location__isnull=True),
+                name="monthly_rollup_unique_no_location",
+            ),
+        ]
+
+
+class InventoryStock(models.Model):
+    # Units on hand of a variation at a location, see core.inventory
+    #
+    # Only ever changed with relative UPDATEs. Sales not yet placed at a
+    # location are counted against the row without one.
+    variation = models.ForeignKey(
+        Variation, related_name="stock", on_delete=models.CASCADE
+    )
+    location = models.ForeignKey(
+        Location, null=True, related_name="stock", on_delete=models.CASCADE
+    )
+    quantity = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["variation", "location"],
+                name="inventory_stock_unique",
+            ),
+            models.UniqueConstraint(
+                fields=["variation"],
+                condition=models.Q(location__isnull=True),
+                name="inventory_stock_unique_no_location",
+            ),
+        ]
+        indexes = [
+            # Low stock alerts only re-check rows changed since their last run
+            models.Index(
+                fields=["updated_at"], name="inventory_stock_updated_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.variation_id}@{self.location_id}: {self.quantity}"
+
+
+class InventoryMovement(models.Model):
+    # Append-only ledger of every stock change
+
+    SALE = "SALE"
+    RETURN = "RETURN"
+    RECEIPT = "RECEIPT"
+    ADJUSTMENT = "ADJUSTMENT"
+    RELOCATION = "RELOCATION"
+    REASONS = [
+        (SALE, "Sale"),
+        (RETURN, "Return"),
+        (RECEIPT, "Receipt"),
+        (ADJUSTMENT, "Adjustment"),
+        (RELOCATION, "Relocation"),
+    ]
+
+    variation = models.ForeignKey(
+        Variation, related_name="movements", on_delete=models.CASCADE
+    )
+    location = models.ForeignKey(
+        Location,
+        null=True,
+        related_name="movements",
+        on_delete=models.CASCADE,
+    )
+    # Signed change in units
+    quantity = models.IntegerField()
+    reason = models.CharField(max_length=16, choices=REASONS)
+    item_sold = models.ForeignKey(
+        ItemSold,
+        null=True,
+        blank=True,
+        related_name="movements",
+        on_delete=models.SET_NULL,
+    )
+    order = models.ForeignKey(
+        Order,
+        null=True,
+        blank=True,
+        related_name="movements",
+        on_delete=models.SET_NULL,
+    )
+    note = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["variation", "location", "created_at"],
+                name="movement_variation_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.reason} {self.variation_id} {self.quantity:+d}"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("Inventory movements cannot be changed")
+        super().save(*args, **kwargs)
+
+
+class StockAlert(models.Model):
+    # A stock row found at or under its low quantity threshold, see
+    # core.alerts
+    #
+    # At most one alert per row is open (unresolved) at a time.
+    stock = models.ForeignKey(
+        InventoryStock, related_name="alerts", on_delete=models.CASCADE
+    )
+    quantity = models.IntegerField()
+    threshold = models.IntegerField()
+    created_at = models.DateTimeField()
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["stock"],
+                condition=models.Q(resolved_at__isnull=True),
+                name="stock_alert_open_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.stock_id}: {self.quantity} <= {self.threshold}"
+
+
+class JobWatermark(models.Model):
+    # Up to when a periodic job has processed its input
+    name = models.CharField(max_length=64, primary_key=True)
+    value = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class CustomerValue(models.Model):
+    # Lifetime value and RFM scores per customer with transactions
+    #
+    # A materialized view (see core.customer_value), read only and as
+    # fresh as its last refresh, whose time customer_value.refreshed_at()
+    # returns. Scores are quintiles from 1 to 5, 5 being
+    # the most recent, most frequent or highest spending customers.
+    customer = models.OneToOneField(
+        Customer,
+        primary_key=True,
+        related_name="value",
+        on_delete=models.DO_NOTHING,
+    )
+    transaction_count = models.IntegerField()
+    spend_money = models.DecimalField(max_digits=14, decimal_places=2)
+    tip_money = models.DecimalField(max_digits=14, decimal_places=2)
+    lifetime_value = models.DecimalField(max_digits=14, decimal_places=2)
+    average_money = models.DecimalField(max_digits=14, decimal_places=2)
+    first_purchase_at = models.DateTimeField()
+    last_purchase_at = models.DateTimeField()
+    recency_score = models.SmallIntegerField()
+    frequency_score = models.SmallIntegerField()
+    monetary_score = models.SmallIntegerField()
+    segment = models.CharField(max_length=32)
+
+    class Meta:
+        managed = False
+        db_table = "core_customervalue"
+
+    def __str__(self):
+        return f"{self.customer_id}: {self.segment} {self.lifetime_value}"
+
+
+class CustomerSegment(models.Model):
+    # Totals per RFM segment, a materialized view over CustomerValue
+    segment = models.CharField(max_length=32, primary_key=True)
+    customers = models.IntegerField()
+    lifetime_value = models.DecimalField(max_digits=16, decimal_places=2)
+    average_value = models.DecimalField(max_digits=14, decimal_places=2)
+    average_transactions = models.DecimalField(
+        max_digits=10, decimal_places=2
+    )
+
+    class Meta:
+        managed = False
+        db_table = "core_customersegment"
+
+    def __str__(self):
+        return self.segment
+
+
+class OutboxEvent(models.Model):
+    # One change to an order, transaction, product or customer row
+    #
+    # Append only, written by database triggers in the transaction making
+    # the change (see core.outbox). txid is that transaction's id, cursors
+    # use it to tell committed events from ones still in flight.
+    INSERT = "insert"
+    UPDATE = "update"
+    DELETE = "delete"
+
+    id = models.BigAutoField(primary_key=True)
+    txid = models.BigIntegerField()
+    aggregate_type = models.CharField(max_length=32)
+    aggregate_id = models.CharField(max_length=64)
+    event_type = models.CharField(max_length=8)
+    payload = models.JSONField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["txid", "id"], name="outbox_txid_idx"),
+            # History of one order, product, ...
+            models.Index(
+                fields=["aggregate_type", "aggregate_id", "id"],
+                name="outbox_aggregate_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.id} {self.event_type} "
+            f"{self.aggregate_type} {self.aggregate_id}"
+        )
+
+
+class OutboxOffset(models.Model):
+    # How far a relay has delivered the outbox, an encoded core.outbox
+    # cursor
+    name = models.CharField(max_length=64, primary_key=True)
+    cursor = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.updated_at}"
+
+
+class TransactionKey(models.Model):
+    # Idempotency key of a written transaction, see core/idempotency.py
+    client_id = models.CharField(max_length=255)
+    reference_id = models.CharField(max_length=255)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["client_id", "reference_id"],
+                name="transaction_key_unique",
+            ),
+        ]
+        indexes = [
+            # Purging expired keys
+            models.Index(
+                fields=["created_at"], name="transaction_key_age_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.client_id}/{self.reference_id}"
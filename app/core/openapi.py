@@ -0,0 +1,165 @@
+# Precomputed OpenAPI schema
+#
+# Generating the schema introspects every view and serializer, so it is
+# built once into versioned artifacts (YAML and JSON, each also gzipped)
+# in settings.OPENAPI_SCHEMA_DIR and then served as bytes. An artifact is
+# named after a fingerprint of the project's source files and API
+# settings, so it is only rebuilt once code changes. build_schema does it
+# at build time; otherwise the first schema request of a process does.
+
+import gzip
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import drf_spectacular
+import rest_framework
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+
+RENDERERS = {"yaml": OpenApiYamlRenderer, "json": OpenApiJsonRenderer}
+
+# Never part of the served API
+EXCLUDED_DIRS = {"tests", "migrations", "benchmarks", "__pycache__"}
+
+_lock = threading.Lock()
+_loaded = {}
+
+
+def fingerprint():
+    # Hash of everything the schema is generated from
+    digest = hashlib.sha256()
+    digest.update(drf_spectacular.__version__.encode())
+    digest.update(rest_framework.VERSION.encode())
+    for name in ["ROOT_URLCONF", "REST_FRAMEWORK", "SPECTACULAR_SETTINGS"]:
+        digest.update(repr(getattr(settings, name, None)).encode())
+    base = Path(settings.BASE_DIR)
+    for root, dirs, files in os.walk(base):
+        dirs[:] = sorted(name for name in dirs if name not in EXCLUDED_DIRS)
+        for name in sorted(files):
+            if name.endswith(".py"):
+                path = Path(root, name)
+                digest.update(str(path.relative_to(base)).encode())
+                digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def artifact_path(version, format):
+    return Path(settings.OPENAPI_SCHEMA_DIR, f"openapi-{version}.{format}")
+
+
+def _write(path, content):
+    # Atomically, other workers may be reading or writing it too
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f".{path.name}.{os.getpid()}")
+    temporary.write_bytes(content)
+    os.replace(temporary, path)
+
+
+def build(version=None, force=False):
+    # Write the artifacts for version unless present, returns their paths
+    version = version or fingerprint()
+    paths = [artifact_path(version, format) for format in RENDERERS]
+    if not force and all(path.exists() for path in paths):
+        return paths
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS(
+        urlconf="app.urls"
+    )
+    schema = generator.get_schema(request=None, public=True)
+    for (format, renderer), path in zip(RENDERERS.items(), paths):
+        content = renderer().render(schema, renderer_context={})
+        _write(path.with_name(path.name + ".gz"), gzip.compress(content, 9))
+        _write(path, content)
+    return paths
+
+
+def prune(version):
+    # Delete the artifacts of every other version
+    directory = Path(settings.OPENAPI_SCHEMA_DIR)
+    removed = []
+    for path in directory.glob("openapi-*"):
+        if not path.name.startswith(f"openapi-{version}."):
+            path.unlink()
+            removed.append(path)
+    return removed
+
+
+def load():
+    # (version, {format: (content, gzipped content)}), built if needed
+    with _lock:
+        if not _loaded:
+            version = fingerprint()
+            build(version)
+            _loaded["version"] = version
+            _loaded["artifacts"] = {
+                format: (
+                    artifact_path(version, format).read_bytes(),
+                    artifact_path(version, format + ".gz").read_bytes(),
+                )
+                for format in RENDERERS
+            }
+        return _loaded["version"], _loaded["artifacts"]
+
+
+def accepts_gzip(header):
+    # Whether an Accept-Encoding header allows gzip: its q-value (or that
+    # of "*" when gzip is not listed) must be above 0
+    qualities = {}
+    for item in header.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+class cachedSchemaView(SpectacularAPIView):
+    # SpectacularAPIView serving the precomputed schema with ETags and gzip
+
+    def get(self, request, *args, **kwargs):
+        if settings.USE_I18N and request.GET.get("lang"):
+            # Artifacts are built in the default language only
+            return super().get(request, *args, **kwargs)
+
+        renderer = request.accepted_renderer
+        version, artifacts = load()
+        content, gzipped = artifacts[renderer.format]
+        use_gzip = accepts_gzip(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        etag = f'"{version}-{renderer.format}{"-gzip" if use_gzip else ""}"'
+
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match and (
+            etag in parse_etags(if_none_match) or if_none_match == "*"
+        ):
+            response = HttpResponseNotModified()
+        else:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type += f"; charset={renderer.charset}"
+            response = HttpResponse(
+                gzipped if use_gzip else content, content_type=content_type
+            )
+            if use_gzip:
+                response["Content-Encoding"] = "gzip"
+        # On every response, 304s included, so shared caches key the plain
+        # and the gzipped body apart
+        patch_vary_headers(response, ["Accept", "Accept-Encoding"])
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+        return response
@@ -0,0 +1,197 @@
+# Relational copies of the Order JSON collections
+#
+# Order.line_items, taxes, discounts, service_charges, fulfillments and
+# refunds are lists of JSON objects. Every element is also stored as a row
+# of the matching Order* child table with the fields aggregates need pulled
+# out into columns, so those aggregates run as SQL.
+#
+# While the JSON is still the source of truth:
+#   - saving an Order rewrites its child rows (dual-write, core.signals);
+#     queryset.update() and bulk_create() bypass this and leave
+#     items_normalized alone, so normalize_orders can catch up later
+#   - normalize_orders converts the remaining orders in small batches,
+#     each committed separately, so it can be stopped and resumed and only
+#     ever locks one batch of rows
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from core.models import (
+    Order,
+    OrderDiscount,
+    OrderFulfillment,
+    OrderLineItem,
+    OrderRefund,
+    OrderServiceCharge,
+    OrderTax,
+)
+
+
+def _text(element, *keys):
+    # First string value found under keys, cut to the column size
+    for key in keys:
+        value = element.get(key)
+        if isinstance(value, str):
+            return value[:255]
+    return ""
+
+
+def _decimal(value, max_digits, places):
+    # Decimal for the column, or None if missing, invalid or too large
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        number = Decimal(str(value)).quantize(Decimal(1).scaleb(-places))
+    except (InvalidOperation, ValueError):
+        return None
+    if not number.is_finite() or abs(number) >= 10 ** (max_digits - places):
+        return None
+    return number
+
+
+def _money(value, max_digits=12):
+    # Money is either a plain amount or {"amount": minor units, ...}
+    if isinstance(value, dict):
+        amount = _decimal(value.get("amount"), max_digits + 2, 0)
+        if amount is None:
+            return None
+        return _decimal(amount / 100, max_digits, 2)
+    return _decimal(value, max_digits, 2)
+
+
+def _line_item(element):
+    # A line item without a quantity is a single unit
+    quantity = _decimal(element.get("quantity", 1), 12, 3)
+    return {
+        "name": _text(element, "name"),
+        "sku": _text(element, "sku", "catalog_object_id"),
+        "quantity": Decimal(0) if quantity is None else quantity,
+        "base_price_money": _money(element.get("base_price_money"), 10),
+        "total_money": _money(element.get("total_money")),
+    }
+
+
+def _adjustment(element):
+    return {
+        "name": _text(element, "name"),
+        "percentage": _decimal(element.get("percentage"), 9, 4),
+        "applied_money": _money(
+            element.get("applied_money", element.get("amount_money"))
+        ),
+    }
+
+
+def _fulfillment(element):
+    return {
+        "type": _text(element, "type"),
+        "state": _text(element, "state"),
+    }
+
+
+def _refund(element):
+    return {
+        "reason": _text(element, "reason"),
+        "status": _text(element, "status"),
+        "amount_money": _money(element.get("amount_money")),
+    }
+
+
+# Order JSON field -> (child model, element -> column values)
+COLLECTIONS = {
+    "line_items": (OrderLineItem, _line_item),
+    "taxes": (OrderTax, _adjustment),
+    "discounts": (OrderDiscount, _adjustment),
+    "service_charges": (OrderServiceCharge, _adjustment),
+    "fulfillments": (OrderFulfillment, _fulfillment),
+    "refunds": (OrderRefund, _refund),
+}
+
+
+def build_entries(order, field):
+    # Unsaved child rows for one JSON collection of order
+    model, columns = COLLECTIONS[field]
+    elements = getattr(order, field)
+    if not isinstance(elements, list):
+        return []
+    rows = []
+    for position, element in enumerate(elements):
+        # Malformed elements are kept in data with empty columns
+        fields = element if isinstance(element, dict) else {}
+        rows.append(
+            model(
+                order_id=order.pk,
+                position=position,
+                uid=_text(fields, "uid"),
+                data=element,
+                **columns(fields),
+            )
+        )
+    return rows
+
+
+def write_entries(orders, replace=True):
+    # Rewrite the child rows of orders and mark them normalized
+    #
+    # replace=False skips the deletes for orders known to have no rows yet.
+    order_ids = [order.pk for order in orders]
+    with transaction.atomic():
+        for field, (model, _) in COLLECTIONS.items():
+            if replace:
+                model.objects.filter(order_id__in=order_ids).delete()
+            rows = [
+                row for order in orders for row in build_entries(order, field)
+            ]
+            if rows:
+                model.objects.bulk_create(rows, batch_size=2000)
+
+        pending = [order.pk for order in orders if not order.items_normalized]
+        if pending:
+            Order.objects.filter(pk__in=pending).update(items_normalized=True)
+    for order in orders:
+        order.items_normalized = True
+
+
+def normalize_batch(batch_size):
+    # Convert the next batch of orders, returns how many were converted
+    #
+    # Rows another transaction is saving right now are skipped rather than
+    # waited for: that save dual-writes them anyway.
+    with transaction.atomic():
+        orders = list(
+            Order.objects.filter(items_normalized=False)
+            .only("order_id", "items_normalized", *COLLECTIONS)
+            .order_by("order_id")
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        if orders:
+            write_entries(orders)
+    return len(orders)
+
+
+def normalize_orders(batch_size=500, max_batches=None):
+    # Convert orders batch by batch until none are left (or max_batches)
+    converted = batches = 0
+    while max_batches is None or batches < max_batches:
+        count = normalize_batch(batch_size)
+        if not count:
+            break
+        converted += count
+        batches += 1
+    return converted
+
+
+def line_item_totals(**filters):
+    # Units, revenue and order count per SKU, aggregated in SQL
+    # filters apply to OrderLineItem, e.g. order__created_at__gte=...
+    return (
+        OrderLineItem.objects.filter(**filters)
+        .values("sku")
+        .annotate(
+            units=Sum("quantity"),
+            revenue_money=Sum("total_money"),
+            orders=Count("order", distinct=True),
+        )
+        .order_by("-units", "sku")
+    )
@@ -0,0 +1,304 @@
+# Transactional outbox and change stream for core models
+#
+# Triggers (migration 0014) append an OutboxEvent for every insert, update
+# and delete of an order, transaction, product or customer row, in the
+# transaction making the change: events exist exactly when their change
+# committed, whatever wrote it (ORM saves, queryset updates, COPY loads).
+#
+# Events are read with cursors rather than by id. Ids are handed out when
+# a row changes but become visible when its transaction commits, so a
+# reader going by "id > last seen" would skip an event whose transaction
+# committed after a later id was read. A cursor holds two PostgreSQL
+# snapshots instead: events are read a window at a time, a window being
+# the transactions committed as of the newer snapshot but not the older
+# one, in id order. Windows never overlap and no later commit can land in
+# a window already read.
+#
+# Within a window events are in id order, which for one aggregate is the
+# order its changes committed: a change waits for the row lock of the
+# previous one, so its trigger fires (and takes an id) after that commit.
+#
+# follow() streams events to consumers as they commit (see
+# core.views.outboxEventsView), each with the cursor to resume after it.
+#
+# relay_once() delivers a batch of events to a sink and saves its cursor
+# once the sink accepted them: delivery is at least once, a crash in
+# between resends the batch. The relay_outbox command runs it in a loop.
+# Sinks are any class with send(events) and close(), see FileSink and
+# SocketSink; OUTBOX["SINK"] and OUTBOX["SINK_OPTIONS"] pick one.
+#
+# purge() deletes events older than RETENTION_DAYS that every relay has
+# delivered (the purge_outbox command). Stream consumers resuming from a
+# cursor older than that miss the purged events.
+
+import base64
+import datetime
+import json
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.models import OutboxEvent, OutboxOffset
+
+DEFAULTS = {
+    "SINK": "core.outbox.FileSink",
+    "SINK_OPTIONS": {"path": "outbox.ndjson"},
+    "BATCH_SIZE": 500,
+    "POLL_INTERVAL": 1.0,
+    "RETENTION_DAYS": 7,
+    "PURGE_BATCH_SIZE": 10000,
+}
+
+AGGREGATE_TYPES = ["order", "transaction", "product", "customer"]
+
+# Longest a change stream request follows the outbox, in seconds. Each
+# stream holds a worker meanwhile, consumers reconnect with their cursor.
+MAX_WAIT = 25
+
+
+def config():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, "OUTBOX", {}))
+    return options
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Cursor:
+    # Position in the outbox: events committed as of snapshot but not as
+    # of previous, after event after_id. snapshot None takes a new one on
+    # the next read, previous None starts from the first event.
+
+    def __init__(self, previous=None, snapshot=None, after_id=0):
+        self.previous = previous
+        self.snapshot = snapshot
+        self.after_id = after_id
+
+    def encode(self):
+        key = json.dumps([self.previous, self.snapshot, self.after_id])
+        return base64.urlsafe_b64encode(key.encode()).decode()
+
+    @classmethod
+    def decode(cls, value):
+        try:
+            previous, snapshot, after_id = json.loads(
+                base64.urlsafe_b64decode(value)
+            )
+        except (TypeError, ValueError):
+            raise InvalidCursor(value)
+        for part in (previous, snapshot):
+            if part is not None and not isinstance(part, str):
+                raise InvalidCursor(value)
+        if not isinstance(after_id, int):
+            raise InvalidCursor(value)
+        return cls(previous, snapshot, after_id)
+
+    def __eq__(self, other):
+        return isinstance(other, Cursor) and vars(self) == vars(other)
+
+
+def current_snapshot():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT txid_current_snapshot()::text")
+        return cursor.fetchone()[0]
+
+
+def latest():
+    # Cursor skipping every event committed so far
+    return Cursor(previous=current_snapshot())
+
+
+def read(cursor, limit, aggregate_types=None):
+    # Up to limit events after cursor and the cursor following them
+    snapshot = cursor.snapshot or current_snapshot()
+    conditions = [
+        "id > %s",
+        "txid_visible_in_snapshot(txid, %s::txid_snapshot)",
+    ]
+    params = [cursor.after_id, snapshot]
+    if cursor.previous is not None:
+        conditions += [
+            "txid >= txid_snapshot_xmin(%s::txid_snapshot)",
+            "NOT txid_visible_in_snapshot(txid, %s::txid_snapshot)",
+        ]
+        params += [cursor.previous, cursor.previous]
+    if aggregate_types:
+        conditions.append("aggregate_type = ANY(%s)")
+        params.append(list(aggregate_types))
+    events = list(
+        OutboxEvent.objects.raw(
+            f"SELECT * FROM {OutboxEvent._meta.db_table} "
+            f"WHERE {' AND '.join(conditions)} ORDER BY id LIMIT %s",
+            params + [limit],
+        )
+    )
+    if len(events) < limit:
+        # Window done, the next read opens a new one
+        return events, Cursor(previous=snapshot)
+    return events, Cursor(cursor.previous, snapshot, events[-1].id)
+
+
+def follow(cursor, wait, aggregate_types=None, poll_interval=None):
+    # Yield (event, cursor after it) as events commit, for about wait
+    # seconds, then (None, cursor to resume from)
+    options = config()
+    poll_interval = poll_interval or options["POLL_INTERVAL"]
+    deadline = time.monotonic() + wait
+    while True:
+        window = Cursor(
+            cursor.previous,
+            cursor.snapshot or current_snapshot(),
+            cursor.after_id,
+        )
+        events, cursor = read(window, options["BATCH_SIZE"], aggregate_types)
+        for event in events:
+            yield event, Cursor(window.previous, window.snapshot, event.id)
+        if time.monotonic() >= deadline:
+            break
+        if not events:
+            if not connection.in_atomic_block:
+                # Hand the connection back while idle, the next poll
+                # opens one again
+                connection.close()
+            time.sleep(poll_interval)
+    yield None, cursor
+
+
+def serialize(event):
+    return {
+        "id": event.id,
+        "aggregate_type": event.aggregate_type,
+        "aggregate_id": event.aggregate_id,
+        "event_type": event.event_type,
+        "payload": event.payload,
+        "created_at": event.created_at,
+    }
+
+
+def encode_lines(events):
+    encoder = JSONEncoder()
+    return "".join(
+        encoder.encode(serialize(event)) + "\n" for event in events
+    ).encode()
+
+
+class FileSink:
+    # Appends events as NDJSON lines to a file, synced to disk per batch
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, events):
+        with open(self.path, "ab") as sink:
+            sink.write(encode_lines(events))
+            sink.flush()
+            os.fsync(sink.fileno())
+
+    def close(self):
+        pass
+
+
+class SocketSink:
+    # Writes events as NDJSON lines to a TCP ("host:port") or Unix socket,
+    # reconnecting after errors
+
+    def __init__(self, address, timeout=10):
+        self.address = address
+        self.timeout = timeout
+        self.socket = None
+
+    def connect(self):
+        host, _, port = self.address.rpartition(":")
+        if port.isdigit():
+            return socket.create_connection(
+                (host, int(port)), timeout=self.timeout
+            )
+        sink = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sink.settimeout(self.timeout)
+        sink.connect(self.address)
+        return sink
+
+    def send(self, events):
+        if self.socket is None:
+            self.socket = self.connect()
+        try:
+            self.socket.sendall(encode_lines(events))
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+
+def make_sink(options=None):
+    options = options or config()
+    return import_string(options["SINK"])(**options["SINK_OPTIONS"])
+
+
+def relay_once(sink, name="relay", batch_size=None):
+    # Deliver one batch to sink, returns the number of events sent
+    batch_size = batch_size or config()["BATCH_SIZE"]
+    with transaction.atomic():
+        offset, _ = OutboxOffset.objects.select_for_update().get_or_create(
+            name=name, defaults={"cursor": Cursor().encode()}
+        )
+        events, cursor = read(Cursor.decode(offset.cursor), batch_size)
+        if events:
+            sink.send(events)
+        # Only once the sink has the batch, a crash before resends it
+        offset.cursor = cursor.encode()
+        offset.save()
+    return len(events)
+
+
+def delivered_txid():
+    # Events with a lower txid were delivered by every relay, None when
+    # there is no relay. A cursor's previous snapshot holds every
+    # transaction before its xmin.
+    bounds = []
+    for offset in OutboxOffset.objects.all():
+        previous = Cursor.decode(offset.cursor).previous
+        bounds.append(int(previous.split(":")[0]) if previous else 0)
+    return min(bounds) if bounds else None
+
+
+def purge(before=None, batch_size=None):
+    # Delete events created before `before` and delivered by every relay,
+    # a batch per statement, returns the number deleted
+    options = config()
+    if before is None:
+        before = timezone.now() - datetime.timedelta(
+            days=options["RETENTION_DAYS"]
+        )
+    batch_size = batch_size or options["PURGE_BATCH_SIZE"]
+    conditions = ["created_at < %s"]
+    params = [before]
+    txid = delivered_txid()
+    if txid is not None:
+        conditions.append("txid < %s")
+        params.append(txid)
+    table = OutboxEvent._meta.db_table
+    # Oldest first along the primary key, old events have the low ids
+    sql = (
+        f"DELETE FROM {table} WHERE id IN (SELECT id FROM {table} "
+        f"WHERE {' AND '.join(conditions)} ORDER BY id LIMIT %s)"
+    )
+    purged = 0
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params + [batch_size])
+            deleted = cursor.rowcount
+        if not deleted:
+            return purged
+        purged += deleted
@@ -0,0 +1,130 @@
+# Row counts for large tables that avoid COUNT(*) where they can
+#
+# estimated_count() first asks the planner how many rows a queryset has:
+#   - unfiltered, the table's row estimate (pg_class.reltuples, summed over
+#     the partitions of a partitioned table), as fresh as the last
+#     (auto)ANALYZE
+#   - otherwise the row estimate of EXPLAIN for the query
+# At or above THRESHOLD rows that estimate is the count, below it the
+# queryset is counted exactly, which is cheap there and keeps small lists
+# exact. Estimates can be off by the planner's error, use them where an
+# approximate total is fine (page links, "about N results").
+#
+# Counts, estimated or exact, are cached per query for TIMEOUT seconds, so
+# paging through a filtered list counts it once.
+#
+# EstimatedCountPaginator uses it for Django paginators (the admin, see
+# core/admin.py); DRF pagination classes can call it directly (see
+# sales.pagination.KeysetPagination).
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+DEFAULTS = {
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": 60,
+    "THRESHOLD": 100000,
+}
+
+
+def config():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, "ESTIMATED_COUNT", {}))
+    return options
+
+
+def table_estimate(model, using):
+    # Planner's row estimate of model's table, None if never analyzed
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT c.reltuples, "
+            "(SELECT sum(GREATEST(p.reltuples, 0)) FROM pg_inherits i "
+            "JOIN pg_class p ON p.oid = i.inhrelid "
+            "WHERE i.inhparent = c.oid) "
+            "FROM pg_class c WHERE c.oid = %s::regclass",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    reltuples, partitions = row
+    estimate = partitions if partitions is not None else reltuples
+    # -1 (PostgreSQL 14+) or 0 with no pages until the first ANALYZE
+    if estimate is None or estimate <= 0:
+        return None
+    return int(estimate)
+
+
+def is_unfiltered(queryset):
+    # Whether queryset has every row of its table, once each
+    query = queryset.query
+    return not (
+        query.where
+        or query.distinct
+        or query.combinator
+        or query.low_mark
+        or query.high_mark is not None
+    )
+
+
+def count_key(queryset):
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        sql, params = "", ()
+    key = f"{queryset.db}:{sql}:{params!r}"
+    return f"estimated-count:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def explain_estimate(queryset):
+    # Planner's row estimate for queryset
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def planner_estimate(queryset):
+    if is_unfiltered(queryset):
+        estimate = table_estimate(queryset.model, queryset.db)
+        if estimate is not None:
+            return estimate
+    return explain_estimate(queryset)
+
+
+def estimated_count(queryset):
+    # Rows in queryset, estimated at or above THRESHOLD, cached
+    options = config()
+    cache = caches[options["CACHE_ALIAS"]]
+    queryset = queryset.order_by()
+    key = count_key(queryset)
+    count = cache.get(key)
+    if count is None:
+        count = planner_estimate(queryset)
+        if count < options["THRESHOLD"]:
+            count = queryset.count()
+        cache.set(key, count, options["TIMEOUT"])
+    return count
+
+
+class EstimatedCountPaginator(Paginator):
+    # Paginator counting with estimated_count()
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, "query"):
+            return super().count
+        return estimated_count(self.object_list)
@@ -0,0 +1,288 @@
+# Monthly range partitions for append-mostly tables (PostgreSQL only)
+#
+# Partitioned tables are listed in PARTITIONED_TABLES with their partition
+# key. Each has one partition per calendar month (UTC) named
+# <table>_pYYYY_MM, a DEFAULT partition catching rows outside every month
+# created so far, and possibly a <table>_legacy partition holding the rows
+# that existed when the table was converted.
+#
+# core_order is deliberately not partitioned: it is the target of foreign
+# keys from Transaction, ItemSold and SaleFact and PostgreSQL requires the
+# referenced unique key of a partitioned table to include the partition key.
+
+import datetime
+import re
+
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+PARTITIONED_TABLES = {
+    "core_transaction": "created_at",
+}
+
+
+def month_start(day):
+    # Return midnight UTC on the first day of day's month
+    return datetime.datetime(
+        day.year, day.month, 1, tzinfo=datetime.timezone.utc
+    )
+
+
+def add_months(start, months):
+    # Return the first of the month `months` after start
+    index = start.year * 12 + start.month - 1 + months
+    return start.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table, start):
+    return f"{table}_p{start:%Y_%m}"
+
+
+def default_partition_name(table):
+    return f"{table}_default"
+
+
+def legacy_partition_name(table):
+    return f"{table}_legacy"
+
+
+def is_partitioned(table, cursor):
+    cursor.execute(
+        "SELECT c.relkind = 'p' FROM pg_class c "
+        "WHERE c.oid = to_regclass(%s)",
+        [table],
+    )
+    row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+def list_partitions(table, cursor):
+    # Return [(name, bound expression)] for the attached partitions
+    cursor.execute(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _parse_bound(value):
+    # MINVALUE/MAXVALUE become None, quoted timestamps datetimes
+    value = value.strip()
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return parse_datetime(value.strip("'"))
+
+
+def partition_ranges(table, cursor):
+    # Return [(name, start, end)] for the range partitions, None = unbounded
+    ranges = []
+    for name, bound in list_partitions(table, cursor):
+        match = re.match(r"FOR VALUES FROM \((.*)\) TO \((.*)\)", bound)
+        if match:
+            ranges.append(
+                (name, _parse_bound(match[1]), _parse_bound(match[2]))
+            )
+    return ranges
+
+
+def covering_partition(table, start, end, cursor):
+    # Return the name of a partition overlapping [start, end), if any
+    for name, lower, upper in partition_ranges(table, cursor):
+        if (lower is None or lower < end) and (upper is None or start < upper):
+            return name
+    return None
+
+
+def create_partition(table, start, cursor):
+    # Create the monthly partition starting at start, returns its name
+    # or the name of the partition already covering that month
+    #
+    # Rows already sitting in the DEFAULT partition for that month would
+    # make CREATE ... PARTITION OF fail, so they are moved into a detached
+    # table that is then attached as the new partition.
+    key = PARTITIONED_TABLES[table]
+    quote = connection.ops.quote_name
+    name = partition_name(table, start)
+    end = add_months(start, 1)
+    default = default_partition_name(table)
+
+    existing = covering_partition(table, start, end, cursor)
+    if existing:
+        return existing
+
+    with transaction.atomic():
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {quote(default)} "
+            f"WHERE {quote(key)} >= %s AND {quote(key)} < %s)",
+            [start, end],
+        )
+        if not cursor.fetchone()[0]:
+            cursor.execute(
+                f"CREATE TABLE {quote(name)} PARTITION OF {quote(table)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [start, end],
+            )
+            return name
+
+        cursor.execute(
+            f"CREATE TABLE {quote(name)} (LIKE {quote(table)} "
+            f"INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)"
+        )
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {quote(default)} "
+            f"WHERE {quote(key)} >= %s AND {quote(key)} < %s RETURNING *) "
+            f"INSERT INTO {quote(name)} SELECT * FROM moved",
+            [start, end],
+        )
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} ATTACH PARTITION {quote(name)} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [start, end],
+        )
+    return name
+
+
+def ensure_partitions(table, today, months_ahead, cursor):
+    # Create this month's partition and the next months_ahead ones
+    start = month_start(today)
+    names = [
+        create_partition(table, add_months(start, offset), cursor)
+        for offset in range(months_ahead + 1)
+    ]
+    return list(dict.fromkeys(names))
+
+
+def expired_partitions(table, before, cursor):
+    # Return monthly partitions whose whole range ends on or before before
+    expired = []
+    for name, _ in list_partitions(table, cursor):
+        prefix = f"{table}_p"
+        if not name.startswith(prefix):
+            continue
+        start = datetime.datetime.strptime(name[len(prefix):], "%Y_%m")
+        start = start.replace(tzinfo=datetime.timezone.utc)
+        if add_months(start, 1) <= before:
+            expired.append(name)
+    return expired
+
+
+def detach_partition(table, name, cursor, drop=False):
+    # Detach a partition, leaving it as a standalone archive table
+    quote = connection.ops.quote_name
+    cursor.execute(
+        f"ALTER TABLE {quote(table)} DETACH PARTITION {quote(name)}"
+    )
+    if drop:
+        cursor.execute(f"DROP TABLE {quote(name)}")
+
+
+def convert_to_partitioned(table, today, months_ahead, cursor):
+    # Turn an ordinary table into a monthly range partitioned one
+    #
+    # The existing table is attached as a single legacy partition covering
+    # everything before the first monthly partition, so no rows are copied.
+    # A CHECK constraint validated up front lets ATTACH skip its own scan.
+    key = PARTITIONED_TABLES[table]
+    quote = connection.ops.quote_name
+    legacy = legacy_partition_name(table)
+
+    cursor.execute(f"SELECT max({quote(key)}) FROM {quote(table)}")
+    newest = cursor.fetchone()[0]
+    boundary = add_months(month_start(today), 1)
+    if newest is not None and newest >= boundary:
+        boundary = add_months(month_start(newest), 1)
+
+    cursor.execute(
+        "SELECT a.attname FROM pg_index i "
+        "JOIN pg_attribute a ON a.attrelid = i.indrelid "
+        "AND a.attnum = ANY(i.indkey) "
+        "WHERE i.indrelid = to_regclass(%s) AND i.indisprimary",
+        [table],
+    )
+    pk = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype = 'p'",
+        [table],
+    )
+    pk_name = cursor.fetchone()[0]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [table],
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute(
+        "SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x "
+        "JOIN pg_class i ON i.oid = x.indexrelid "
+        "WHERE x.indrelid = to_regclass(%s) AND NOT x.indisprimary",
+        [table],
+    )
+    indexes = cursor.fetchall()
+    cursor.execute(
+        "SELECT a.attname, pg_get_serial_sequence(%s, a.attname) "
+        "FROM pg_attribute a WHERE a.attrelid = to_regclass(%s) "
+        "AND a.attnum > 0 AND NOT a.attisdropped "
+        "AND pg_get_serial_sequence(%s, a.attname) IS NOT NULL",
+        [table, table, table],
+    )
+    sequences = cursor.fetchall()
+
+    # Move the old table and its index names out of the way
+    cursor.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(legacy)}")
+    for index, _ in indexes:
+        cursor.execute(
+            f"ALTER INDEX {quote(index)} "
+            f"RENAME TO {quote(index[:50] + '_legacy')}"
+        )
+
+    # The partition key has to be part of the primary key
+    primary_key = pk + [key] if key not in pk else pk
+    columns = ", ".join(quote(column) for column in primary_key)
+    cursor.execute(
+        f"ALTER TABLE {quote(legacy)} "
+        f"DROP CONSTRAINT {quote(pk_name)}, "
+        f"ADD CONSTRAINT {quote(legacy + '_pkey')} PRIMARY KEY ({columns})"
+    )
+    cursor.execute(
+        f"ALTER TABLE {quote(legacy)} ADD CONSTRAINT "
+        f"{quote(legacy + '_range')} CHECK ({quote(key)} < %s)",
+        [boundary],
+    )
+
+    cursor.execute(
+        f"CREATE TABLE {quote(table)} (LIKE {quote(legacy)} "
+        f"INCLUDING DEFAULTS INCLUDING STORAGE INCLUDING COMMENTS) "
+        f"PARTITION BY RANGE ({quote(key)})"
+    )
+    for column, sequence in sequences:
+        cursor.execute(
+            f"ALTER SEQUENCE {sequence} "
+            f"OWNED BY {quote(table)}.{quote(column)}"
+        )
+    cursor.execute(
+        f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(pk_name)} "
+        f"PRIMARY KEY ({columns})"
+    )
+    for _, definition in indexes:
+        # Read before the rename, so these name the new parent table
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} "
+            f"ADD CONSTRAINT {quote(name)} {definition}"
+        )
+
+    cursor.execute(
+        f"ALTER TABLE {quote(table)} ATTACH PARTITION {quote(legacy)} "
+        f"FOR VALUES FROM (MINVALUE) TO (%s)",
+        [boundary],
+    )
+    cursor.execute(
+        f"CREATE TABLE {quote(default_partition_name(table))} "
+        f"PARTITION OF {quote(table)} DEFAULT"
+    )
+    for offset in range(months_ahead + 1):
+        create_partition(table, add_months(boundary, offset), cursor)
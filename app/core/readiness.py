@@ -0,0 +1,122 @@
+# Readiness probes for the services the app depends on
+#
+# Each dependency is probed with a cheap round trip (SELECT 1 for a
+# database, a set and get for a cache) and retried with jittered
+# exponential backoff: the n-th retry waits a random time up to
+# min(MAX_DELAY, BASE_DELAY * 2 ** n), so pods starting together do not
+# probe in lockstep. All dependencies are probed at once, in threads, so
+# startup waits for the slowest one rather than the sum of them.
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+BASE_DELAY = 0.05
+MAX_DELAY = 2.0
+
+
+class NotReady(Exception):
+    # Raised with {name: last error} of the dependencies still down
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(
+            ", ".join(f"{name}: {error}" for name, error in errors.items())
+        )
+
+
+def probe_database(alias):
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    finally:
+        # Probes run in throwaway threads
+        connection.close()
+
+
+def probe_cache(alias):
+    cache = caches[alias]
+    cache.set("readiness-probe", 1, timeout=10)
+    if cache.get("readiness-probe") != 1:
+        raise ConnectionError(f"cache {alias} did not store a value")
+
+
+def default_probes():
+    # {name: probe} for every configured database and cache
+    probes = {
+        f"database:{alias}": (probe_database, alias) for alias in connections
+    }
+    for alias in settings.CACHES:
+        probes[f"cache:{alias}"] = (probe_cache, alias)
+    return probes
+
+
+def backoff(attempt, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+    # Seconds to wait before retry number attempt (from 0), full jitter
+    return random.uniform(0, min(max_delay, base_delay * 2**attempt))
+
+
+def wait_for(probe, deadline, cancelled, base_delay, max_delay, on_retry):
+    # Call probe until it succeeds, returns (seconds, attempts)
+    func, arg = probe
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            func(arg)
+            return time.monotonic() - start, attempt + 1
+        except Exception as exc:
+            delay = backoff(attempt, base_delay, max_delay)
+            if cancelled.is_set() or time.monotonic() + delay > deadline:
+                raise
+            on_retry(exc, delay)
+            attempt += 1
+            time.sleep(delay)
+
+
+def wait_until_ready(
+    probes,
+    timeout=60,
+    base_delay=BASE_DELAY,
+    max_delay=MAX_DELAY,
+    on_ready=lambda name, seconds, attempts: None,
+    on_retry=lambda name, exc, delay: None,
+):
+    # Probe every dependency concurrently until all respond
+    #
+    # Returns {name: seconds until it responded}, raises NotReady once
+    # timeout seconds pass with some still down.
+    deadline = time.monotonic() + timeout
+    cancelled = threading.Event()
+    ready, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=len(probes) or 1) as executor:
+        futures = {
+            name: executor.submit(
+                wait_for,
+                probe,
+                deadline,
+                cancelled,
+                base_delay,
+                max_delay,
+                lambda exc, delay, name=name: on_retry(name, exc, delay),
+            )
+            for name, probe in probes.items()
+        }
+        for name, future in futures.items():
+            try:
+                seconds, attempts = future.result()
+            except Exception as exc:
+                errors[name] = exc
+                # Nothing left to wait for, stop the other probes early
+                cancelled.set()
+                continue
+            ready[name] = seconds
+            on_ready(name, seconds, attempts)
+    if errors:
+        raise NotReady(errors)
+    return ready
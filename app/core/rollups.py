@@ -0,0 +1,231 @@
+# Incrementally maintained sales rollups
+#
+# Every ItemSold gets a SaleFact row carrying the dimensions reports group
+# by (product, variation, location, day). Each fact is added to the daily,
+# weekly and monthly rollup tables with in-place F() updates, so revenue and
+# units-sold questions read a handful of pre-aggregated rows. Revenue is the
+# price captured on the ItemSold, never the variation's current price.
+
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Trunc
+
+from core.models import (
+    DailySalesRollup,
+    ItemSold,
+    MonthlySalesRollup,
+    SaleFact,
+    Transaction,
+    WeeklySalesRollup,
+)
+
+ROLLUPS = (DailySalesRollup, WeeklySalesRollup, MonthlySalesRollup)
+
+ROLLUPS_BY_PERIOD = {rollup.period: rollup for rollup in ROLLUPS}
+
+
+def order_location_id(order_id):
+    # Location of the first transaction paying for the order, if any
+    return (
+        Transaction.objects.filter(order_id=order_id)
+        .order_by("created_at")
+        .values_list("location_id", flat=True)
+        .first()
+    )
+
+
+def sale_price(item_sold):
+    # Unit price of the sale, the variation's for rows loaded raw
+    if item_sold.price_money is not None:
+        return item_sold.price_money
+    return item_sold.variation.price_money
+
+
+def build_fact(item_sold):
+    # Return an unsaved SaleFact for the ItemSold
+    order = item_sold.order
+    return SaleFact(
+        item_sold=item_sold,
+        product_id=item_sold.item_id,
+        variation_id=item_sold.variation_id,
+        location_id=order_location_id(order.pk),
+        order_id=order.pk,
+        sold_on=order.created_at.date(),
+        quantity=item_sold.quantity,
+        revenue_money=sale_price(item_sold) * item_sold.quantity,
+    )
+
+
+def _bump(rollup, key, units, revenue, lines):
+    # Add to the rollup row for key, creating it on first sale
+    changes = {
+        "units": F("units") + units,
+        "revenue_money": F("revenue_money") + revenue,
+        "line_count": F("line_count") + lines,
+    }
+    if rollup.objects.filter(**key).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            rollup.objects.create(
+                units=units, revenue_money=revenue, line_count=lines, **key
+            )
+    except IntegrityError:
+        # Another writer created the row first
+        rollup.objects.filter(**key).update(**changes)
+
+
+def _apply(fact, sign):
+    for rollup in ROLLUPS:
+        key = {
+            "product_id": fact.product_id,
+            "variation_id": fact.variation_id,
+            "location_id": fact.location_id,
+            "period_start": rollup.truncate(fact.sold_on),
+        }
+        _bump(
+            rollup,
+            key,
+            sign * fact.quantity,
+            sign * fact.revenue_money,
+            sign,
+        )
+
+
+def record_sale(item_sold):
+    # Add a new or changed ItemSold to the fact and rollup tables
+    with transaction.atomic():
+        previous = (
+            SaleFact.objects.select_for_update()
+            .filter(item_sold_id=item_sold.pk)
+            .first()
+        )
+        if previous is not None:
+            _apply(previous, -1)
+        fact = build_fact(item_sold)
+        fact.save()
+        _apply(fact, 1)
+
+
+def remove_sale(item_sold):
+    # Take a deleted ItemSold back out of the rollup tables
+    with transaction.atomic():
+        fact = (
+            SaleFact.objects.select_for_update()
+            .filter(item_sold_id=item_sold.pk)
+            .first()
+        )
+        if fact is not None:
+            _apply(fact, -1)
+            fact.delete()
+
+
+def relocate_order(order_id):
+    # Move an order's facts to the location of its first transaction
+    location_id = order_location_id(order_id)
+    with transaction.atomic():
+        facts = SaleFact.objects.select_for_update().filter(
+            order_id=order_id
+        )
+        for fact in facts.exclude(location_id=location_id):
+            _apply(fact, -1)
+            fact.location_id = location_id
+            fact.save(update_fields=["location"])
+            _apply(fact, 1)
+
+
+def relocate_orders(order_ids):
+    # Relocate the facts of orders that were sold before being paid
+    unplaced = (
+        SaleFact.objects.filter(order_id__in=order_ids, location__isnull=True)
+        .values_list("order_id", flat=True)
+        .distinct()
+    )
+    for order_id in list(unplaced):
+        relocate_order(order_id)
+
+
+def backfill_facts(chunk_size=2000):
+    # Rebuild every SaleFact from ItemSold history, returns rows written
+    SaleFact.objects.all().delete()
+    first_location = (
+        Transaction.objects.filter(order_id=OuterRef("order_id"))
+        .order_by("created_at")
+        .values("location_id")[:1]
+    )
+    rows = (
+        ItemSold.objects.annotate(
+            first_location_id=Subquery(first_location),
+            sale_price=Coalesce("price_money", "variation__price_money"),
+        )
+        .values_list(
+            "pk",
+            "item_id",
+            "variation_id",
+            "first_location_id",
+            "order_id",
+            "order__created_at",
+            "quantity",
+            "sale_price",
+        )
+        .order_by("pk")
+    )
+
+    written = 0
+    chunk = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        pk, product, variation, location, order, sold_at, quantity, price = row
+        chunk.append(
+            SaleFact(
+                item_sold_id=pk,
+                product_id=product,
+                variation_id=variation,
+                location_id=location,
+                order_id=order,
+                sold_on=sold_at.date(),
+                quantity=quantity,
+                revenue_money=price * quantity,
+            )
+        )
+        if len(chunk) >= chunk_size:
+            SaleFact.objects.bulk_create(chunk)
+            written += len(chunk)
+            chunk = []
+    SaleFact.objects.bulk_create(chunk)
+    return written + len(chunk)
+
+
+def backfill_rollup(rollup):
+    # Rebuild one rollup table from the facts with a single GROUP BY
+    rollup.objects.all().delete()
+    groups = (
+        SaleFact.objects.annotate(
+            period_start=Trunc("sold_on", rollup.period)
+        )
+        .values("product_id", "variation_id", "location_id", "period_start")
+        .annotate(
+            units=Sum("quantity"),
+            revenue_money=Sum("revenue_money"),
+            line_count=Count("pk"),
+        )
+        .order_by()
+    )
+    rows = [rollup(**group) for group in groups.iterator()]
+    rollup.objects.bulk_create(rows, batch_size=2000)
+    return len(rows)
+
+
+def sales_totals(period, start, end, **filters):
+    # Return {"units", "revenue_money"} for periods starting in [start, end]
+    rollup = ROLLUPS_BY_PERIOD[period]
+    totals = rollup.objects.filter(
+        period_start__gte=start,
+        period_start__lte=end,
+        **filters,
+    ).aggregate(units=Sum("units"), revenue_money=Sum("revenue_money"))
+    return {
+        "units": totals["units"] or 0,
+        "revenue_money": totals["revenue_money"] or Decimal("0.00"),
+    }
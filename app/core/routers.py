@@ -0,0 +1,143 @@
+# Database router sending reporting reads to read replicas
+#
+# Reads of the models listed in REPLICA_ROUTING["MODELS"] ("app_label" or
+# "app_label.model_name") go to a randomly picked replica from
+# REPLICA_ROUTING["REPLICAS"], any DATABASES aliases, e.g. streaming
+# replicas of the primary or sqlite stand-ins in development. Everything
+# else, and every write, goes to default. Reads stay on the primary:
+#   - inside a transaction on the primary, which may hold their writes
+#   - for the rest of a request (or command) once it has written, so a
+#     request reads its own writes; request_started resets this
+#   - while no replica is within MAX_LAG seconds of the primary, as
+#     measured at most every LAG_CHECK_INTERVAL seconds per process
+#
+# Caches filled from a replica can hold data up to MAX_LAG seconds older
+# than the write that invalidated them.
+
+import contextvars
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+DEFAULTS = {
+    "REPLICAS": [],
+    "MODELS": [],
+    "MAX_LAG": 5,
+    "LAG_CHECK_INTERVAL": 1,
+}
+
+# Lag in seconds of a replica that cannot be reached
+UNAVAILABLE = float("inf")
+
+# Set once the current request has written to the primary
+_pinned = contextvars.ContextVar("replica_pinned", default=False)
+
+# {alias: (checked at, lag)} of this process
+_lag = {}
+_lag_lock = threading.Lock()
+
+
+def _config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "REPLICA_ROUTING", {}))
+    return config
+
+
+def pin_to_primary():
+    # Read from the primary until reset_stickiness()
+    _pinned.set(True)
+
+
+def reset_stickiness(**kwargs):
+    # Connected to request_started, each request starts unpinned
+    _pinned.set(False)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+def measure_lag(alias):
+    # Replication lag of alias in seconds, 0 if it is not a replica and
+    # UNAVAILABLE if it never replayed a transaction and is not receiving
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return 0.0
+    with connection.cursor() as cursor:
+        # A replica that replayed everything it received is up to date,
+        # however old the last replayed transaction is, but only while its
+        # WAL receiver runs: a disconnected replica stops receiving too.
+        # pg_stat_wal_receiver has a row only while the receiver runs, its
+        # other columns need pg_read_all_stats. Without a receiver the lag
+        # is the age of the last replayed transaction, NULL if none was.
+        cursor.execute(
+            "SELECT CASE "
+            "WHEN NOT pg_is_in_recovery() THEN 0 "
+            "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+            "AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver) THEN 0 "
+            "ELSE EXTRACT(EPOCH FROM "
+            "now() - pg_last_xact_replay_timestamp()) END"
+        )
+        lag = cursor.fetchone()[0]
+    return UNAVAILABLE if lag is None else float(lag)
+
+
+def replica_lag(alias):
+    # Lag of alias, measured at most every LAG_CHECK_INTERVAL seconds
+    now = time.monotonic()
+    with _lag_lock:
+        checked = _lag.get(alias)
+    if checked and now - checked[0] < _config()["LAG_CHECK_INTERVAL"]:
+        return checked[1]
+    try:
+        lag = measure_lag(alias)
+    except DatabaseError:
+        lag = UNAVAILABLE
+    with _lag_lock:
+        _lag[alias] = (now, lag)
+    return lag
+
+
+class ReplicaRouter:
+    def _routed(self, model, config):
+        meta = model._meta
+        return (
+            meta.app_label in config["MODELS"]
+            or meta.label_lower in config["MODELS"]
+        )
+
+    def db_for_read(self, model, **hints):
+        config = _config()
+        if (
+            not config["REPLICAS"]
+            or not self._routed(model, config)
+            or is_pinned()
+            or connections["default"].in_atomic_block
+        ):
+            return None
+        replicas = [
+            alias
+            for alias in config["REPLICAS"]
+            if replica_lag(alias) <= config["MAX_LAG"]
+        ]
+        return random.choice(replicas) if replicas else "default"
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {"default", *_config()["REPLICAS"]}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        if db in _config()["REPLICAS"]:
+            return False
+        return None
@@ -0,0 +1,14 @@
+# Lazily imported OpenAPI schema class
+#
+# DRF resolves DEFAULT_SCHEMA_CLASS while some views are defined (e.g.
+# ObtainAuthToken), which would import drf_spectacular's generator in
+# every worker. This stand-in only imports it once a schema is built.
+
+from rest_framework.schemas.inspectors import ViewInspector
+
+
+class AutoSchema(ViewInspector):
+    def __new__(cls, *args, **kwargs):
+        from drf_spectacular.openapi import AutoSchema
+
+        return AutoSchema(*args, **kwargs)
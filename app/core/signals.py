@@ -0,0 +1,48 @@
+# Signal handlers keeping derived tables in sync with the core models
+
+from django.core.signals import request_started
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from core import inventory, order_items, rollups, routers
+from core.models import ItemSold, Order, Transaction
+
+
+@receiver(post_save, sender=ItemSold)
+def record_item_sold(sender, instance, created, raw=False, **kwargs):
+    # Fixtures are loaded raw, their facts come from backfill_rollups
+    if not raw:
+        rollups.record_sale(instance)
+        inventory.record_sale(instance, created=created)
+
+
+@receiver(pre_delete, sender=ItemSold)
+def remove_item_sold(sender, instance, **kwargs):
+    rollups.remove_sale(instance)
+    inventory.remove_sale(instance)
+
+
+@receiver(post_save, sender=Transaction)
+def relocate_order_sales(sender, instance, created, raw=False, **kwargs):
+    # Sales recorded before the order was paid have no location yet
+    if created and not raw:
+        rollups.relocate_order(instance.order_id)
+        inventory.relocate_order(instance.order_id)
+
+
+@receiver(post_save, sender=Order)
+def write_order_items(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    # Dual-write the JSON collections to the Order* child tables, unless
+    # the save only touched other fields
+    if raw or (
+        update_fields is not None
+        and update_fields.isdisjoint(order_items.COLLECTIONS)
+    ):
+        return
+    order_items.write_entries([instance], replace=not created)
+
+
+# Read-your-writes stickiness only lasts for the request, see core.routers
+request_started.connect(routers.reset_stickiness)
@@ -0,0 +1,119 @@
+# Startup profiling
+#
+# profile() starts a fresh interpreter running measure() under
+# `python -X importtime` and reports how long each startup phase took and
+# which modules it imported. measure() writes a marker line to stderr as
+# each phase ends, so the import-time lines in between belong to it.
+
+import collections
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+PHASES = ["interpreter", "settings", "apps", "urlconf", "first_request"]
+
+MARKER = "startup-phase:"
+
+
+def _end_phase(name, started, timings):
+    timings[name] = time.perf_counter() - started
+    print(f"{MARKER}{name}", file=sys.stderr, flush=True)
+    return time.perf_counter()
+
+
+def measure(path, spawned_at):
+    # Run in the child: time each phase, print them to stdout as JSON
+    timings = {"interpreter": time.time() - spawned_at}
+    print(f"{MARKER}interpreter", file=sys.stderr, flush=True)
+    started = time.perf_counter()
+
+    from django.conf import settings
+
+    settings.INSTALLED_APPS
+    started = _end_phase("settings", started, timings)
+
+    import django
+
+    django.setup(set_prefix=False)
+    started = _end_phase("apps", started, timings)
+
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+    started = _end_phase("urlconf", started, timings)
+
+    from django.core.handlers.wsgi import WSGIHandler
+
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+    }
+    status = []
+    b"".join(
+        WSGIHandler()(environ, lambda code, headers: status.append(code))
+    )
+    _end_phase("first_request", started, timings)
+    print(json.dumps({"timings": timings, "status": status[0]}))
+
+
+def parse_importtime(lines):
+    # {phase: [(module, self us, cumulative us)]} from -X importtime output
+    imports = collections.defaultdict(list)
+    phase = 0
+    for line in lines:
+        if line.startswith(MARKER):
+            phase = PHASES.index(line[len(MARKER):].strip()) + 1
+            continue
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, module = line[len("import time:"):].split("|")
+        imports[PHASES[min(phase, len(PHASES) - 1)]].append(
+            (module.strip(), int(own), int(cumulative))
+        )
+    return imports
+
+
+def profile(path="/", settings_module=None):
+    # Start a fresh interpreter and return its startup profile
+    env = dict(os.environ)
+    if settings_module:
+        env["DJANGO_SETTINGS_MODULE"] = settings_module
+    spawned_at = time.time()
+    child = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"from core.startup import measure; "
+            f"measure({path!r}, {spawned_at!r})",
+        ],
+        env=env,
+        # The directory holding the project packages
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+    )
+    if child.returncode:
+        raise RuntimeError(child.stderr.strip().splitlines()[-1])
+    result = json.loads(child.stdout.strip().splitlines()[-1])
+    result["imports"] = parse_importtime(child.stderr.splitlines())
+    return result
+
+
+def by_package(imports):
+    # Self import time per top level package, in microseconds
+    totals = collections.Counter()
+    for module, own, _ in imports:
+        totals[module.split(".")[0]] += own
+    return totals
@@ -0,0 +1,53 @@
+# Query budget assertions for the API tests
+#
+#   class PrivateUserApiTests(QueryBudgetMixin, TestCase):
+#       def test_get_profile(self):
+#           with self.assertQueryBudget("user:me"):
+#               self.client.get(ME_URL)
+#
+# Budgets come from REQUEST_METRICS["BUDGETS"], the same numbers the
+# request metrics middleware checks in production (core/metrics.py).
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+from core import metrics
+
+
+class _AssertQueryBudgetContext(CaptureQueriesContext):
+    def __init__(self, test_case, route, connection):
+        self.test_case = test_case
+        self.route = route
+        super().__init__(connection)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        limit = metrics.budget(self.route)
+        self.test_case.assertIsNotNone(
+            limit, f"{self.route} has no query budget in REQUEST_METRICS"
+        )
+        executed = len(self)
+        self.test_case.assertLessEqual(
+            executed,
+            limit,
+            "%s ran %d queries, its budget is %d\n%s"
+            % (
+                self.route,
+                executed,
+                limit,
+                "\n".join(
+                    "%d. %s" % (i, query["sql"])
+                    for i, query in enumerate(self.captured_queries, 1)
+                ),
+            ),
+        )
+
+
+class QueryBudgetMixin:
+    # Adds assertQueryBudget() to a TestCase
+
+    def assertQueryBudget(self, route, using=DEFAULT_DB_ALIAS):
+        # Fail if the block runs more queries than route's budget
+        return _AssertQueryBudgetContext(self, route, connections[using])
@@ -0,0 +1,173 @@
+# Helpers creating sample core objects for tests
+# Every model field is required, so each helper fills in sane defaults
+# that can be overridden with keyword arguments.
+
+import itertools
+from decimal import Decimal
+
+from django.utils import timezone
+
+from core import models
+
+# Keeps unique fields unique across helper calls
+_sequence = itertools.count(1)
+
+
+def create_category(**params):
+    now = timezone.now()
+    defaults = {
+        "name": "Drinks",
+        "sub_categories": [],
+        "items": [],
+        "created_at": now,
+        "updated_at": now,
+    }
+    defaults.update(params)
+    return models.Category.objects.create(**defaults)
+
+
+def create_product(**params):
+    defaults = {
+        "name": "Coffee",
+        "UPC": "000000000001",
+        "description": "",
+        "price": Decimal("3.00"),
+        "cost": Decimal("1.00"),
+        "available_online": True,
+        "available_for_pickup": True,
+        "available_electronically": False,
+        "is_service": False,
+        "track_inventory": True,
+        "inventory_alert_type": "NONE",
+        "inventory_alert_threshold": 0,
+        "product_data": {},
+    }
+    defaults.update(params)
+    if "category" not in defaults:
+        defaults["category"] = create_category()
+    return models.Product.objects.create(**defaults)
+
+
+def create_variation(**params):
+    defaults = {
+        "name": "Regular",
+        "sku": "COF-REG",
+        "upc": "000000000002",
+        "cost_money": Decimal("1.00"),
+        "price_money": Decimal("3.00"),
+        "pricing_type": "FIXED_PRICING",
+        "track_inventory": True,
+        "inventory_alert_type": "NONE",
+        "inventory_alert_threshold": 0,
+        "item_option_values": [],
+    }
+    defaults.update(params)
+    if "product" not in defaults:
+        defaults["product"] = create_product()
+    return models.Variation.objects.create(**defaults)
+
+
+def create_location(**params):
+    defaults = {
+        "name": "Store A",
+        "address": "1 Main St",
+        "phone": "555-0101",
+        "time_zone": "UTC",
+        "business_name": "DataPointNow",
+        "type": "PHYSICAL",
+        "website": "https://example.com",
+        "business_hours": {},
+    }
+    defaults.update(params)
+    return models.Location.objects.create(**defaults)
+
+
+def create_employee(**params):
+    defaults = {
+        "first_name": "John",
+        "last_name": "Doe",
+        "nick_name": "",
+        "email_address": f"employee{next(_sequence)}@example.com",
+        "phone": "",
+        "role_id": "CASHIER",
+        "status": "ACTIVE",
+    }
+    defaults.update(params)
+    return models.Employee.objects.create(**defaults)
+
+
+def create_customer(**params):
+    now = timezone.now()
+    defaults = {
+        "given_name": "Jane",
+        "family_name": "Smith",
+        "company_name": "",
+        "nickname": "",
+        "email_address": "jane@example.com",
+        "address": "",
+        "phone_number": "",
+        "reference_id": "",
+        "group_id": "",
+        "created_at": now,
+        "updated_at": now,
+    }
+    defaults.update(params)
+    return models.Customer.objects.create(**defaults)
+
+
+def create_order(**params):
+    now = timezone.now()
+    defaults = {
+        "buyer_email": "buyer@example.com",
+        "recipient_name": "Buyer",
+        "recipient_phone_number": "555-0100",
+        "state": "OPEN",
+        "shipping_address": {},
+        "billing_address": {},
+        "line_items": [],
+        "taxes": [],
+        "discounts": [],
+        "service_charges": [],
+        "fulfillments": [],
+        "refunds": [],
+        "created_at": now,
+        "updated_at": now,
+    }
+    defaults.update(params)
+    return models.Order.objects.create(**defaults)
+
+
+def create_transaction(**params):
+    defaults = {
+        "created_at": timezone.now(),
+        "tender": [],
+        "amount_money": Decimal("10.00"),
+        "tip_money": Decimal("0.00"),
+        "processing_fee_money": Decimal("0.30"),
+        "client_id": "",
+        "refunds": [],
+        "reference_id": "",
+        "product": {},
+    }
+    defaults.update(params)
+    if "order" not in defaults:
+        defaults["order"] = create_order()
+    if "location" not in defaults:
+        defaults["location"] = create_location()
+    if "customer" not in defaults:
+        defaults["customer"] = create_customer()
+    if "employee" not in defaults:
+        defaults["employee"] = create_employee()
+    return models.Transaction.objects.create(**defaults)
+
+
+def create_item_sold(**params):
+    defaults = {"quantity": 1, "note": ""}
+    defaults.update(params)
+    if "variation" not in defaults:
+        defaults["variation"] = create_variation()
+    if "item" not in defaults:
+        defaults["item"] = defaults["variation"].product
+    if "order" not in defaults:
+        defaults["order"] = create_order()
+    return models.ItemSold.objects.create(**defaults)
@@ -1,10 +1,33 @@
 # Test for the Django Admin mods
 
+import datetime
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import Client
 
+from core.admin import IndexedDatesQuerySet
+from core.models import Order
+from core.tests.factories import (
+    create_item_sold,
+    create_order,
+    create_transaction,
+)
+
+
+ORDER_TIMES = [
+    datetime.datetime(2023, 5, 1, 9, tzinfo=datetime.timezone.utc),
+    datetime.datetime(2023, 5, 1, 18, tzinfo=datetime.timezone.utc),
+    datetime.datetime(2023, 5, 3, 10, tzinfo=datetime.timezone.utc),
+    datetime.datetime(2023, 6, 10, 12, tzinfo=datetime.timezone.utc),
+    datetime.datetime(2024, 1, 2, 8, tzinfo=datetime.timezone.utc),
+]
+
 
 class AdminSiteTests(TestCase):
     # Test Django admin
@@ -50,3 +73,105 @@ class AdminSiteTests(TestCase):
         res = self.client.get(url)
 
         self.assertEqual(res.status_code, 200)
+
+
+class LargeTableAdminTests(TestCase):
+    # Test the order, transaction and item sold changelists
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = Client()
+        self.admin_user = get_user_model().objects.create_superuser(
+            email="admin@example.com",
+            password="test123",
+        )
+        self.client.force_login(self.admin_user)
+
+    def assertConstantQueries(self, model_name, create):
+        # The changelist runs as many queries for 5 rows as for 1
+        url = reverse(f"admin:core_{model_name}_changelist")
+        create()
+        with CaptureQueriesContext(connection) as one_row:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+
+        for _ in range(4):
+            create()
+        cache.clear()
+        with CaptureQueriesContext(connection) as more_rows:
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(more_rows), len(one_row))
+
+    def test_order_changelist_queries(self):
+        self.assertConstantQueries("order", create_order)
+
+    def test_transaction_changelist_queries(self):
+        self.assertConstantQueries("transaction", create_transaction)
+
+    def test_item_sold_changelist_queries(self):
+        self.assertConstantQueries("itemsold", create_item_sold)
+
+    def test_unfiltered_count_is_estimated(self):
+        create_order()
+        url = reverse("admin:core_order_changelist")
+
+        with patch("core.pagination.table_estimate", return_value=123456):
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.get(url)
+
+        self.assertContains(res, "123456")
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_counts_are_cached(self):
+        create_order()
+        url = reverse("admin:core_order_changelist")
+        self.client.get(url, {"state": "OPEN"})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {"state": "OPEN"})
+
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_search_by_exact_values(self):
+        order = create_order(buyer_email="someone@example.com")
+        create_order()
+        url = reverse("admin:core_order_changelist")
+
+        by_email = self.client.get(url, {"q": "someone@example.com"})
+        by_id = self.client.get(url, {"q": str(order.pk)})
+        partial = self.client.get(url, {"q": "someone"})
+
+        self.assertEqual(list(by_email.context["cl"].result_list), [order])
+        self.assertEqual(list(by_id.context["cl"].result_list), [order])
+        self.assertEqual(list(partial.context["cl"].result_list), [])
+
+    def test_search_words_skip_id_fields(self):
+        create_transaction()
+        url = reverse("admin:core_transaction_changelist")
+
+        res = self.client.get(url, {"q": "coffee"})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(list(res.context["cl"].result_list), [])
+
+    def test_date_hierarchy_matches_distinct_dates(self):
+        for created_at in ORDER_TIMES:
+            create_order(created_at=created_at)
+        queryset = IndexedDatesQuerySet(Order)
+
+        for kind in ["year", "month", "day"]:
+            self.assertEqual(
+                queryset.datetimes("created_at", kind),
+                list(Order.objects.datetimes("created_at", kind)),
+            )
+        self.assertEqual(
+            queryset.datetimes("created_at", "year", order="DESC"),
+            list(Order.objects.datetimes("created_at", "year", "DESC")),
+        )
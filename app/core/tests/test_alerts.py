@@ -0,0 +1,146 @@
+# Test the batched low stock alerts
+
+import datetime
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core import alerts, inventory
+from core.models import InventoryStock, JobWatermark, StockAlert
+from core.tests.factories import (
+    create_location,
+    create_product,
+    create_variation,
+)
+
+
+class StockAlertTests(TestCase):
+    # Test alerts are opened once, resolved and checked incrementally
+
+    def setUp(self):
+        self.location = create_location()
+        self.variation = create_variation(
+            inventory_alert_type="LOW_QUANTITY", inventory_alert_threshold=5
+        )
+
+    def receive(self, quantity, variation=None):
+        inventory.move(
+            (variation or self.variation).pk,
+            self.location.pk,
+            quantity,
+            "RECEIPT",
+        )
+
+    def test_opens_alert_once_for_low_stock(self):
+        self.receive(3)
+        plenty = create_variation(
+            inventory_alert_type="LOW_QUANTITY", inventory_alert_threshold=5
+        )
+        self.receive(10, plenty)
+
+        opened, _ = alerts.evaluate()
+        again, _ = alerts.evaluate()
+
+        self.assertEqual(
+            [(a.stock.variation, a.quantity, a.threshold) for a in opened],
+            [(self.variation, 3, 5)],
+        )
+        self.assertEqual(again, [])
+        self.assertEqual(StockAlert.objects.count(), 1)
+
+    def test_product_threshold_used_without_variation_one(self):
+        product = create_product(
+            inventory_alert_type="LOW_QUANTITY", inventory_alert_threshold=2
+        )
+        variation = create_variation(product=product)
+        self.receive(2, variation)
+        untracked = create_variation(
+            product=product, track_inventory=False
+        )
+        self.receive(1, untracked)
+
+        opened, _ = alerts.evaluate()
+
+        self.assertEqual([a.stock.variation for a in opened], [variation])
+
+    def test_restock_resolves_and_new_drop_reopens(self):
+        self.receive(3)
+        alerts.evaluate()
+
+        self.receive(10)
+        _, resolved = alerts.evaluate()
+        self.assertEqual(resolved, 1)
+        self.assertFalse(
+            StockAlert.objects.filter(resolved_at__isnull=True).exists()
+        )
+
+        self.receive(-9)
+        opened, _ = alerts.evaluate()
+        self.assertEqual([a.quantity for a in opened], [4])
+        self.assertEqual(StockAlert.objects.count(), 2)
+
+    def test_only_rows_changed_since_watermark_checked(self):
+        self.receive(8)
+        alerts.evaluate()
+        watermark = JobWatermark.objects.get(name=alerts.WATERMARK).value
+        InventoryStock.objects.update(
+            updated_at=watermark - datetime.timedelta(hours=1)
+        )
+        self.variation.inventory_alert_threshold = 10
+        self.variation.save()
+
+        opened, _ = alerts.evaluate()
+        self.assertEqual(opened, [])
+
+        opened, _ = alerts.evaluate(full=True)
+        self.assertEqual([a.quantity for a in opened], [8])
+
+    def test_watermark_overlaps_run_start(self):
+        before = timezone.now()
+
+        alerts.evaluate()
+        after = timezone.now()
+
+        watermark = JobWatermark.objects.get(name=alerts.WATERMARK).value
+        self.assertGreaterEqual(watermark, before - alerts.OVERLAP)
+        self.assertLessEqual(watermark, after - alerts.OVERLAP)
+
+    def test_signal_sent_with_new_alerts(self):
+        self.receive(1)
+        received = []
+
+        def handler(sender, alerts, **kwargs):
+            received.extend(alerts)
+
+        alerts.alerts_opened.connect(handler)
+        self.addCleanup(alerts.alerts_opened.disconnect, handler)
+        alerts.evaluate()
+        alerts.evaluate()
+
+        self.assertEqual([a.quantity for a in received], [1])
+
+    def test_command_reports_alerts(self):
+        self.receive(3)
+        out = StringIO()
+
+        call_command("check_stock_alerts", stdout=out)
+
+        self.assertIn(f"Low stock: {self.variation.name}", out.getvalue())
+        self.assertIn("1 alerts opened, 0 resolved", out.getvalue())
+
+    # The test's connection has to survive between runs
+    @patch(
+        "core.management.commands.check_stock_alerts.close_old_connections"
+    )
+    @patch("time.sleep", side_effect=[None, KeyboardInterrupt])
+    def test_command_worker_loop(self, patched_sleep, patched_close):
+        out = StringIO()
+
+        call_command("check_stock_alerts", "--interval", "30", stdout=out)
+
+        self.assertEqual(out.getvalue().count("alerts opened"), 2)
+        patched_sleep.assert_called_with(30.0)
+        patched_close.assert_called_once_with()
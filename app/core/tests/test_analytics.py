@@ -0,0 +1,175 @@
+# Test the vectorized analytics reports
+
+import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+from django.core.cache import cache
+from django.test import TestCase
+
+from core import analytics
+from core.tests.factories import (
+    create_employee,
+    create_item_sold,
+    create_location,
+    create_order,
+    create_transaction,
+    create_variation,
+)
+
+
+def at(day, hour):
+    return datetime.datetime(
+        2023, 5, day, hour, 30, tzinfo=datetime.timezone.utc
+    )
+
+
+class AnalyticsTests(TestCase):
+    # Test the reports against hand computed totals
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.employees = [create_employee(), create_employee()]
+        self.locations = [create_location(), create_location()]
+        rows = [
+            # day, hour, employee, location, amount, tip, fee
+            (1, 9, 0, 0, "10.00", "1.00", "0.30"),
+            (1, 9, 1, 1, "20.00", "4.00", "0.60"),
+            (1, 17, 0, 0, "5.50", "0.00", "0.16"),
+            (8, 9, 1, 0, "4.50", "0.50", "0.14"),
+        ]
+        for day, hour, employee, location, amount, tip, fee in rows:
+            create_transaction(
+                created_at=at(day, hour),
+                employee=self.employees[employee],
+                location=self.locations[location],
+                amount_money=Decimal(amount),
+                tip_money=Decimal(tip),
+                processing_fee_money=Decimal(fee),
+            )
+
+    def test_load_reads_int64_columns_in_chunks(self):
+        with patch.dict(analytics.DEFAULTS, CHUNK_SIZE=3):
+            data = analytics.load(
+                analytics.transactions(),
+                {"amount": analytics.cents("amount_money")},
+            )
+
+        self.assertEqual(data["amount"].dtype, np.int64)
+        self.assertEqual(
+            sorted(data["amount"].tolist()), [450, 550, 1000, 2000]
+        )
+
+    def test_revenue_by_hour(self):
+        results = analytics.revenue(bucket="hour")
+
+        self.assertEqual(
+            [
+                (row["bucket"], row["transactions"], row["amount_money"])
+                for row in results
+            ],
+            [
+                (at(1, 9).replace(minute=0), 2, Decimal("30.00")),
+                (at(1, 17).replace(minute=0), 1, Decimal("5.50")),
+                (at(8, 9).replace(minute=0), 1, Decimal("4.50")),
+            ],
+        )
+        self.assertEqual(results[0]["tip_money"], Decimal("5.00"))
+
+    def test_revenue_by_hour_of_day_and_week(self):
+        by_hour = analytics.revenue(bucket="hour_of_day")
+        by_week = analytics.revenue(bucket="week")
+
+        self.assertEqual(
+            [(row["bucket"], row["transactions"]) for row in by_hour],
+            [(9, 3), (17, 1)],
+        )
+        # 2023-05-01 and 2023-05-08 are Mondays
+        self.assertEqual(
+            [(row["bucket"].date(), row["transactions"]) for row in by_week],
+            [(datetime.date(2023, 5, 1), 3), (datetime.date(2023, 5, 8), 1)],
+        )
+
+    def test_revenue_within_range(self):
+        results = analytics.revenue(
+            start=at(1, 12), end=at(8, 0), bucket="day"
+        )
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["amount_money"], Decimal("5.50"))
+
+    def test_tips_by_employee(self):
+        results = analytics.tips_by_employee()
+
+        self.assertEqual(
+            [
+                (row["employee"], row["tip_money"], row["tip_percentage"])
+                for row in results
+            ],
+            [
+                (self.employees[0].pk, Decimal("1.00"), 6.45),
+                (self.employees[1].pk, Decimal("4.50"), 18.37),
+            ],
+        )
+
+    def test_fees_by_location(self):
+        results = analytics.fees_by_location()
+
+        self.assertEqual(
+            [(row["location"], row["fee_ratio"]) for row in results],
+            [(self.locations[0].pk, 0.03), (self.locations[1].pk, 0.03)],
+        )
+        self.assertEqual(
+            results[0]["processing_fee_money"], Decimal("0.60")
+        )
+
+    def test_items_by_variation(self):
+        variation = create_variation(price_money=Decimal("2.50"))
+        order = create_order(created_at=at(2, 10))
+        create_item_sold(variation=variation, order=order, quantity=3)
+        create_item_sold(variation=variation, order=order, quantity=1)
+
+        results = analytics.items_by_variation()
+
+        self.assertEqual(
+            results,
+            [
+                {
+                    "variation": variation.pk,
+                    "line_count": 2,
+                    "units": 4,
+                    "revenue_money": Decimal("10.00"),
+                }
+            ],
+        )
+
+    def test_group_by_sums_exactly(self):
+        # Past 2**53 float64 sums would round off the last cents
+        big = 2**53
+        keys, counts, sums = analytics.group_by(
+            np.array([7, 7, 3], dtype=np.int64),
+            cents=np.array([big, 1, 5], dtype=np.int64),
+        )
+
+        self.assertEqual(keys.tolist(), [3, 7])
+        self.assertEqual(counts.tolist(), [1, 2])
+        self.assertEqual(sums["cents"].tolist(), [5, big + 1])
+        self.assertEqual(
+            analytics.money(sums["cents"][1]),
+            Decimal(big + 1).scaleb(-2),
+        )
+
+    def test_empty_report(self):
+        self.assertEqual(analytics.revenue(start=at(20, 0)), [])
+
+    def test_run_caches_per_signature(self):
+        first = analytics.run("revenue", bucket="day")
+
+        with self.assertNumQueries(0):
+            again = analytics.run("revenue", bucket="day")
+        with self.assertNumQueries(1):
+            analytics.run("revenue", bucket="week")
+
+        self.assertEqual(again, first)
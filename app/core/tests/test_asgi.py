@@ -0,0 +1,92 @@
+# Test requests through the ASGI application of app/asgi.py
+#
+# The settings are loaded before app.asgi is imported, so ROOT_URLCONF is
+# switched to app.asgi_urls as app.asgi does at startup. The async views
+# use their own database connections, so these tests commit their data.
+
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from app import asgi
+from catalog.cache import catalog_cache
+from core.tests.factories import create_category
+
+
+async def request(path, headers=()):
+    # GET path through app.asgi.application, returns (status, headers, body)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"testserver"), *headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    communicator = ApplicationCommunicator(asgi.application, scope)
+    await communicator.send_input({"type": "http.request", "body": b""})
+    start = await communicator.receive_output(10)
+    body = b""
+    while True:
+        message = await communicator.receive_output(10)
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    headers = {name.lower(): value for name, value in start["headers"]}
+    return start["status"], headers, body
+
+
+@override_settings(ROOT_URLCONF="app.asgi_urls")
+class AsgiApplicationTests(TransactionTestCase):
+    # Test the prefix routing and the async API handler
+
+    def setUp(self):
+        cache.clear()
+        catalog_cache.local.clear()
+        user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+        token = Token.objects.create(user=user)
+        self.auth = [(b"authorization", f"Token {token.key}".encode())]
+        create_category(name="Coffee")
+
+    async def test_async_api_served_by_api_handler(self):
+        code, headers, body = await request(
+            "/api/catalog/categories/", self.auth
+        )
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertIn(b"Coffee", body)
+        # Only ASYNC_API_MIDDLEWARE ran, not the clickjacking middleware
+        self.assertNotIn(b"x-frame-options", headers)
+        self.assertIn(b"x-content-type-options", headers)
+
+    async def test_other_routes_served_by_django(self):
+        code, headers, _ = await request("/api/sales/orders/", self.auth)
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertEqual(headers[b"x-frame-options"], b"DENY")
+
+    async def test_async_api_requires_token(self):
+        code, _, _ = await request("/api/catalog/categories/")
+
+        self.assertEqual(code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_api_handler_leaves_settings_alone(self):
+        middleware = list(settings.MIDDLEWARE)
+
+        handler = asgi.AsyncAPIHandler()
+
+        self.assertEqual(settings.MIDDLEWARE, middleware)
+        self.assertIsNotNone(handler._middleware_chain)
@@ -1,5 +1,8 @@
 # Test custom Django management commands
 
+import time
+from io import StringIO
+
 # Mocks behavior of db
 from unittest.mock import patch
 
@@ -7,7 +10,7 @@ from unittest.mock import patch
 from psycopg2 import OperationalError as Psycopg2Error
 
 # lets us call command by name
-from django.core.management import call_command
+from django.core.management import CommandError, call_command
 
 # another exception that may be called when connecting to db
 from django.db.utils import OperationalError
@@ -15,28 +18,80 @@ from django.db.utils import OperationalError
 # type of test we will be running
 from django.test import SimpleTestCase
 
+from core import readiness
+
 
-@patch("core.management.commands.wait_for_db.Command.check")
+@patch("core.readiness.probe_cache")
+@patch("core.readiness.probe_database")
 class CommandTest(SimpleTestCase):
     # Test commands
 
-    def test_wait_for_db_ready(self, patched_check):
+    def test_wait_for_db_ready(self, patched_probe, patched_cache):
         # Test waiting for db if db ready
-        patched_check.return_value = True
+        out = StringIO()
 
-        call_command("wait_for_db")
+        call_command("wait_for_db", stdout=out)
 
-        patched_check.assert_called_once_with(databases=["default"])
+        patched_probe.assert_called_once_with("default")
+        patched_cache.assert_called_once_with("default")
+        self.assertIn("time_to_ready=", out.getvalue())
 
     @patch("time.sleep")
-    def test_wait_for_db_delay(self, patched_sleep, patched_check):
+    def test_wait_for_db_delay(
+        self, patched_sleep, patched_probe, patched_cache
+    ):
         # Test waiting for db when getting Op Error
 
-        patched_check.side_effect = (
-            [Psycopg2Error] * 2 + [OperationalError] * 3 + [True]
+        patched_probe.side_effect = (
+            [Psycopg2Error] * 2 + [OperationalError] * 3 + [None]
         )
 
-        call_command("wait_for_db")
+        call_command("wait_for_db", stdout=StringIO())
+
+        self.assertEqual(patched_probe.call_count, 6)
+        self.assertEqual(patched_sleep.call_count, 5)
+        patched_probe.assert_called_with("default")
+
+    def test_wait_for_db_timeout(self, patched_probe, patched_cache):
+        # Test giving up once the timeout passes
+        patched_probe.side_effect = OperationalError("connection refused")
+
+        with self.assertRaises(CommandError):
+            call_command("wait_for_db", "--timeout", "0", stdout=StringIO())
+
+
+class ReadinessTest(SimpleTestCase):
+    # Test the readiness probes
+
+    def test_backoff_grows_exponentially_with_jitter(self):
+        with patch("random.uniform", side_effect=lambda low, high: high):
+            delays = [readiness.backoff(n, 0.1, 1.0) for n in range(6)]
+
+        self.assertEqual(delays, [0.1, 0.2, 0.4, 0.8, 1.0, 1.0])
+        for _ in range(100):
+            self.assertLessEqual(readiness.backoff(3, 0.1, 1.0), 0.8)
+
+    def test_probes_run_concurrently(self):
+        def slow_probe(seconds):
+            time.sleep(seconds)
+
+        start = time.monotonic()
+        ready = readiness.wait_until_ready(
+            {"a": (slow_probe, 0.2), "b": (slow_probe, 0.2)}
+        )
+
+        self.assertLess(time.monotonic() - start, 0.35)
+        self.assertEqual(set(ready), {"a", "b"})
+
+    def test_reports_dependencies_still_down(self):
+        def down(arg):
+            raise ConnectionError("refused")
+
+        with self.assertRaises(readiness.NotReady) as raised:
+            readiness.wait_until_ready(
+                {"up": (lambda arg: None, None), "down": (down, None)},
+                timeout=0.2,
+                base_delay=0.01,
+            )
 
-        self.assertEqual(patched_check.call_count, 6)
-        patched_check.assert_called_with(databases=["default"])
+        self.assertEqual(list(raised.exception.errors), ["down"])
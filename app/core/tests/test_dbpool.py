@@ -0,0 +1,253 @@
+# Test the pooling, health checked database backend
+
+import threading
+import time
+from unittest import mock
+
+import psycopg2
+from django.contrib.auth import get_user_model
+from django.db import InterfaceError, connections
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from psycopg2 import extensions
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.dbpool import pool
+
+DB_POOL_URL = reverse("db-pool-stats")
+
+
+class FakeInfo:
+    transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakeConnection:
+    # Just enough of a psycopg2 connection for the pool
+    usable = True
+
+    def __init__(self):
+        self.closed = 0
+        self.info = FakeInfo()
+        self.rollbacks = 0
+
+    def cursor(self):
+        if not self.usable:
+            raise psycopg2.OperationalError("server closed the connection")
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def execute(self, sql):
+        pass
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    # Test the pool itself with fake connections
+
+    def make_pool(self, **options):
+        return pool.ConnectionPool(**options)
+
+    def test_reuses_released_connections(self):
+        connection_pool = self.make_pool()
+        first = connection_pool.acquire(FakeConnection)
+        connection_pool.release(first)
+        second = connection_pool.acquire(FakeConnection)
+
+        self.assertIs(first, second)
+        stats = connection_pool.stats()
+        self.assertEqual(stats["opened"], 1)
+        self.assertEqual(stats["reused"], 1)
+        self.assertEqual(stats["checked_out"], 1)
+
+    def test_overflow_closed_when_released(self):
+        connection_pool = self.make_pool(MAX_SIZE=1, MAX_OVERFLOW=1)
+        first = connection_pool.acquire(FakeConnection)
+        second = connection_pool.acquire(FakeConnection)
+        connection_pool.release(first)
+        connection_pool.release(second)
+
+        self.assertFalse(first.closed)
+        self.assertTrue(second.closed)
+        self.assertEqual(connection_pool.stats()["idle"], 1)
+
+    def test_times_out_when_exhausted(self):
+        connection_pool = self.make_pool(
+            MAX_SIZE=1, MAX_OVERFLOW=0, TIMEOUT=0.05
+        )
+        connection_pool.acquire(FakeConnection)
+
+        with self.assertRaises(pool.PoolTimeout):
+            connection_pool.acquire(FakeConnection)
+        stats = connection_pool.stats()
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertGreater(stats["wait_time"], 0)
+
+    def test_waiter_gets_released_connection(self):
+        connection_pool = self.make_pool(MAX_SIZE=1, MAX_OVERFLOW=0)
+        first = connection_pool.acquire(FakeConnection)
+        acquired = []
+        waiter = threading.Thread(
+            target=lambda: acquired.append(
+                connection_pool.acquire(FakeConnection)
+            )
+        )
+        waiter.start()
+        while not connection_pool.stats()["waiters"]:
+            time.sleep(0.01)
+        connection_pool.release(first)
+        waiter.join()
+
+        self.assertEqual(acquired, [first])
+        self.assertEqual(connection_pool.stats()["waits"], 1)
+
+    def test_rolls_back_open_transaction_on_release(self):
+        connection_pool = self.make_pool()
+        conn = connection_pool.acquire(FakeConnection)
+        conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+        connection_pool.release(conn)
+
+        self.assertEqual(conn.rollbacks, 1)
+        self.assertIs(connection_pool.acquire(FakeConnection), conn)
+
+    def test_discards_broken_connections(self):
+        connection_pool = self.make_pool()
+        conn = connection_pool.acquire(FakeConnection)
+        conn.closed = 2
+        connection_pool.release(conn)
+
+        self.assertEqual(connection_pool.stats()["size"], 0)
+        self.assertIsNot(connection_pool.acquire(FakeConnection), conn)
+
+    def test_replaces_idle_connection_failing_health_check(self):
+        connection_pool = self.make_pool(HEALTH_CHECK_INTERVAL=0)
+        conn = connection_pool.acquire(FakeConnection)
+        connection_pool.release(conn)
+        conn.usable = False
+
+        replacement = connection_pool.acquire(FakeConnection)
+
+        self.assertIsNot(replacement, conn)
+        self.assertTrue(conn.closed)
+        stats = connection_pool.stats()
+        self.assertEqual(stats["health_checks"], 1)
+        self.assertEqual(stats["size"], 1)
+
+    def test_failed_connect_frees_its_slot(self):
+        connection_pool = self.make_pool(MAX_SIZE=1, MAX_OVERFLOW=0)
+
+        def connect():
+            raise psycopg2.OperationalError("connection refused")
+
+        with self.assertRaises(psycopg2.OperationalError):
+            connection_pool.acquire(connect)
+        self.assertEqual(connection_pool.stats()["size"], 0)
+        self.assertIsNotNone(connection_pool.acquire(FakeConnection))
+
+
+class DatabaseWrapperTests(TestCase):
+    # Test the backend against the test database
+
+    def make_wrapper(self, **settings):
+        connection = connections["default"]
+        return type(connection)(
+            {**connection.settings_dict, **settings}, alias="test-dbpool"
+        )
+
+    def tearDown(self):
+        for connection_pool in pool.pools().values():
+            connection_pool.close_idle()
+        pool._pools.clear()
+
+    def test_pooled_connection_reused_after_close(self):
+        wrapper = self.make_wrapper(
+            POOL={"MAX_SIZE": 1, "MAX_OVERFLOW": 0}, CONN_MAX_AGE=0
+        )
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.close()
+        wrapper.ensure_connection()
+
+        self.assertIs(wrapper.connection, raw)
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            self.assertEqual(cursor.fetchone(), (1,))
+        wrapper.close()
+        self.assertFalse(raw.closed)
+        self.assertEqual(wrapper.pool.stats()["idle"], 1)
+
+    def test_health_check_replaces_dropped_connection(self):
+        wrapper = self.make_wrapper(CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True)
+        wrapper.ensure_connection()
+        dropped = wrapper.connection
+        dropped.close()
+
+        # As at the start of a request
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+        self.assertIsNot(wrapper.connection, dropped)
+        wrapper.close()
+
+    def test_dropped_connection_fails_without_health_check(self):
+        wrapper = self.make_wrapper(CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=False)
+        wrapper.ensure_connection()
+        wrapper.connection.close()
+
+        wrapper.close_if_unusable_or_obsolete()
+        with self.assertRaises(InterfaceError):
+            with wrapper.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        wrapper.close()
+
+
+class DbPoolStatsApiTests(TestCase):
+    # Test the pool metrics endpoint
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_admin_only(self):
+        user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.get(DB_POOL_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def get_stats(self, pool_options):
+        admin = get_user_model().objects.create_superuser(
+            email="admin@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(admin)
+        settings_dict = connections["default"].settings_dict
+        with mock.patch.dict(settings_dict, POOL=pool_options):
+            with mock.patch.dict(pool._pools, clear=True):
+                return self.client.get(DB_POOL_URL)
+
+    def test_reports_unpooled_database(self):
+        res = self.get_stats(None)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"default": None})
+
+    def test_reports_pool_metrics(self):
+        res = self.get_stats({"MAX_SIZE": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for metric in ["checked_out", "waiters", "wait_time", "timeouts"]:
+            self.assertIn(metric, res.data["default"])
@@ -0,0 +1,58 @@
+# Test transaction idempotency keys
+
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core import idempotency
+from core.models import TransactionKey
+
+
+class IdempotencyTests(TestCase):
+    # Test claiming and purging keys
+
+    def age_keys(self, days):
+        TransactionKey.objects.update(
+            created_at=timezone.now() - datetime.timedelta(days=days)
+        )
+
+    def test_claim_returns_new_keys(self):
+        first = idempotency.claim([("pos-1", "a"), ("pos-1", "b")])
+        second = idempotency.claim([("pos-1", "b"), ("pos-2", "b")])
+
+        self.assertEqual(first, {("pos-1", "a"), ("pos-1", "b")})
+        self.assertEqual(second, {("pos-2", "b")})
+        self.assertEqual(TransactionKey.objects.count(), 3)
+
+    def test_claim_nothing(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(idempotency.claim([]), set())
+
+    def test_purge_expired_keys(self):
+        idempotency.claim([(f"pos-{i}", "ref-1") for i in range(5)])
+        self.age_keys(31)
+        idempotency.claim([("pos-new", "ref-1")])
+
+        purged = idempotency.purge(batch_size=2)
+
+        self.assertEqual(purged, 5)
+        self.assertEqual(
+            list(TransactionKey.objects.values_list("client_id", flat=True)),
+            ["pos-new"],
+        )
+
+    def test_purge_command(self):
+        idempotency.claim([("pos-1", "ref-1")])
+        self.age_keys(3)
+        out = StringIO()
+
+        call_command("purge_transaction_keys", stdout=out)
+        call_command("purge_transaction_keys", "--days", "2", stdout=out)
+
+        self.assertEqual(
+            out.getvalue().splitlines(), ["0 keys purged", "1 keys purged"]
+        )
+        self.assertFalse(TransactionKey.objects.exists())
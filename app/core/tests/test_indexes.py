@@ -0,0 +1,189 @@
+# Test the reporting access paths are served by indexes
+#
+# The seeded tables are small enough that the planner could honestly pick
+# a sequential scan, so sequential scans are disabled for each EXPLAIN:
+# a plan still containing one means no index can serve the query.
+
+import datetime
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+
+from core import models
+from core.tests.factories import (
+    create_customer,
+    create_employee,
+    create_location,
+    create_product,
+    create_variation,
+)
+
+START = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+
+SEED_ORDERS = 2000
+
+
+class IndexUsageTests(TestCase):
+    # Test hot queries do not regress to sequential scans
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.locations = [create_location(name=f"Store {i}") for i in range(5)]
+        cls.customers = [
+            create_customer(email_address=f"customer{i}@example.com")
+            for i in range(50)
+        ]
+        employee = create_employee()
+        product = create_product()
+        for i in range(20):
+            create_variation(product=product, sku=f"SKU-{i}")
+
+        states = ["OPEN", "COMPLETED", "COMPLETED", "COMPLETED", "CANCELED"]
+        orders = models.Order.objects.bulk_create(
+            [
+                models.Order(
+                    buyer_email=f"buyer{i % 300}@example.com",
+                    recipient_name="Buyer",
+                    recipient_phone_number="",
+                    state=states[i % len(states)],
+                    shipping_address={},
+                    billing_address={},
+                    line_items=[{"sku": f"SKU-{i % 20}", "quantity": "1"}],
+                    taxes=[],
+                    discounts=[],
+                    service_charges=[],
+                    fulfillments=[],
+                    refunds=[],
+                    created_at=START + datetime.timedelta(hours=i),
+                    updated_at=START + datetime.timedelta(hours=i),
+                )
+                for i in range(SEED_ORDERS)
+            ]
+        )
+        models.Transaction.objects.bulk_create(
+            [
+                models.Transaction(
+                    order=order,
+                    location=cls.locations[i % len(cls.locations)],
+                    customer=cls.customers[i % len(cls.customers)],
+                    employee=employee,
+                    created_at=order.created_at,
+                    tender=[{"type": "CARD" if i % 3 else "CASH"}],
+                    amount_money=Decimal("10.00"),
+                    tip_money=Decimal("1.00"),
+                    processing_fee_money=Decimal("0.30"),
+                    client_id=f"client-{i}",
+                    refunds=[],
+                    reference_id="",
+                    product={},
+                )
+                for i, order in enumerate(orders)
+            ]
+        )
+        with connection.cursor() as cursor:
+            for model in [
+                models.Order,
+                models.Transaction,
+                models.Customer,
+                models.Product,
+                models.Variation,
+            ]:
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    def assertIndexed(self, queryset):
+        # Fail if the plan for queryset still needs a sequential scan
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        try:
+            plan = queryset.explain()
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = on")
+        self.assertNotIn("Seq Scan", plan, msg=f"\n{queryset.query}\n{plan}")
+
+    def test_unindexed_query_is_detected(self):
+        with self.assertRaises(AssertionError):
+            self.assertIndexed(
+                models.Order.objects.filter(recipient_name="Buyer")
+            )
+
+    def test_transactions_by_location_and_time(self):
+        self.assertIndexed(
+            models.Transaction.objects.filter(
+                location=self.locations[0],
+                created_at__gte=START,
+                created_at__lt=START + datetime.timedelta(days=7),
+            )
+        )
+
+    def test_customer_history(self):
+        self.assertIndexed(
+            models.Transaction.objects.filter(
+                customer=self.customers[0]
+            ).order_by("-created_at")
+        )
+
+    def test_transaction_time_range(self):
+        self.assertIndexed(
+            models.Transaction.objects.filter(
+                created_at__gte=START,
+                created_at__lt=START + datetime.timedelta(days=1),
+            )
+        )
+
+    def test_transaction_keyset_page(self):
+        # The same filter sales.pagination.KeysetPagination builds
+        cursor = START + datetime.timedelta(days=30)
+        self.assertIndexed(
+            models.Transaction.objects.filter(
+                Q(created_at__lt=cursor) | Q(created_at=cursor, pk__lt=500),
+                created_at__lte=cursor,
+            ).order_by("-created_at", "-pk")[:100]
+        )
+
+    def test_transaction_tender_contains(self):
+        self.assertIndexed(
+            models.Transaction.objects.filter(
+                tender__contains=[{"type": "CASH"}]
+            )
+        )
+
+    def test_open_orders(self):
+        self.assertIndexed(
+            models.Order.objects.filter(state="OPEN").order_by("created_at")
+        )
+
+    def test_orders_by_state(self):
+        self.assertIndexed(models.Order.objects.filter(state="CANCELED"))
+
+    def test_orders_by_buyer_email(self):
+        self.assertIndexed(
+            models.Order.objects.filter(buyer_email="buyer1@example.com")
+        )
+
+    def test_order_keyset_page(self):
+        self.assertIndexed(
+            models.Order.objects.order_by("-created_at", "-pk")[:100]
+        )
+
+    def test_order_line_items_contains(self):
+        self.assertIndexed(
+            models.Order.objects.filter(
+                line_items__contains=[{"sku": "SKU-3"}]
+            )
+        )
+
+    def test_customer_by_email(self):
+        self.assertIndexed(
+            models.Customer.objects.filter(
+                email_address="customer1@example.com"
+            )
+        )
+
+    def test_product_by_upc(self):
+        self.assertIndexed(models.Product.objects.filter(UPC="000000000001"))
+
+    def test_variation_by_sku(self):
+        self.assertIndexed(models.Variation.objects.filter(sku="SKU-1"))
@@ -0,0 +1,177 @@
+# Test stock levels and the inventory ledger
+
+import threading
+
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+
+from core import inventory
+from core.models import InventoryMovement, InventoryStock
+from core.tests.factories import (
+    create_item_sold,
+    create_location,
+    create_order,
+    create_transaction,
+    create_variation,
+)
+
+
+def stock(variation, location=None):
+    row = InventoryStock.objects.filter(
+        variation=variation, location=location
+    ).first()
+    return row.quantity if row else None
+
+
+def ledger_total(variation, location=None):
+    return InventoryMovement.objects.filter(
+        variation=variation, location=location
+    ).aggregate(total=Sum("quantity"))["total"]
+
+
+class InventoryTests(TestCase):
+    # Test sales move stock and every change is in the ledger
+
+    def setUp(self):
+        self.variation = create_variation()
+        self.location = create_location()
+        self.order = create_order()
+        create_transaction(order=self.order, location=self.location)
+        inventory.move(
+            self.variation.pk, self.location.pk, 10, InventoryMovement.RECEIPT
+        )
+
+    def test_sale_decrements_stock_at_order_location(self):
+        item = create_item_sold(
+            variation=self.variation, order=self.order, quantity=3
+        )
+
+        self.assertEqual(stock(self.variation, self.location), 7)
+        movement = InventoryMovement.objects.get(item_sold=item)
+        self.assertEqual(movement.reason, InventoryMovement.SALE)
+        self.assertEqual(movement.quantity, -3)
+        self.assertEqual(movement.order, self.order)
+
+    def test_changed_quantity_moves_difference(self):
+        item = create_item_sold(
+            variation=self.variation, order=self.order, quantity=3
+        )
+        item.quantity = 1
+        item.save()
+        item.note = "gift"
+        item.save()
+
+        self.assertEqual(stock(self.variation, self.location), 9)
+        self.assertEqual(
+            list(
+                item.movements.order_by("pk").values_list(
+                    "reason", "quantity"
+                )
+            ),
+            [(InventoryMovement.SALE, -3), (InventoryMovement.RETURN, 2)],
+        )
+
+    def test_deleted_sale_returns_stock(self):
+        item = create_item_sold(
+            variation=self.variation, order=self.order, quantity=3
+        )
+
+        item.delete()
+
+        self.assertEqual(stock(self.variation, self.location), 10)
+        self.assertEqual(ledger_total(self.variation, self.location), 10)
+
+    def test_untracked_variation_ignored(self):
+        untracked = create_variation(track_inventory=False)
+
+        create_item_sold(variation=untracked, order=self.order)
+
+        self.assertIsNone(stock(untracked, self.location))
+
+    def test_unpaid_sale_relocated_when_paid(self):
+        order = create_order()
+        create_item_sold(variation=self.variation, order=order, quantity=4)
+        self.assertEqual(stock(self.variation), -4)
+
+        create_transaction(order=order, location=self.location)
+
+        self.assertEqual(stock(self.variation), 0)
+        self.assertEqual(stock(self.variation, self.location), 6)
+        self.assertEqual(
+            InventoryMovement.objects.filter(
+                reason=InventoryMovement.RELOCATION
+            ).count(),
+            2,
+        )
+        for location in [None, self.location]:
+            self.assertEqual(
+                stock(self.variation, location),
+                ledger_total(self.variation, location),
+            )
+
+    def test_movements_are_append_only(self):
+        movement = InventoryMovement.objects.get()
+        movement.quantity = 100
+
+        with self.assertRaises(ValueError):
+            movement.save()
+
+    def test_below_threshold(self):
+        low = create_variation(
+            inventory_alert_type="LOW_QUANTITY", inventory_alert_threshold=5
+        )
+        plenty = create_variation(
+            inventory_alert_type="LOW_QUANTITY", inventory_alert_threshold=5
+        )
+        inventory.move(low.pk, self.location.pk, 5, "RECEIPT")
+        inventory.move(plenty.pk, self.location.pk, 6, "RECEIPT")
+
+        self.assertEqual(
+            [row.variation for row in inventory.below_threshold()], [low]
+        )
+
+
+class ConcurrentDecrementTests(TransactionTestCase):
+    # Test no update is lost when many checkouts sell the same variation
+
+    THREADS = 16
+    SALES_PER_THREAD = 20
+
+    def test_parallel_sales_lose_no_updates(self):
+        variation = create_variation()
+        location = create_location()
+        order = create_order()
+        create_transaction(order=order, location=location)
+        start = self.THREADS * self.SALES_PER_THREAD * 2
+        inventory.move(variation.pk, location.pk, start, "RECEIPT")
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def checkout():
+            try:
+                barrier.wait()
+                for _ in range(self.SALES_PER_THREAD):
+                    create_item_sold(
+                        variation=variation, order=order, quantity=2
+                    )
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=checkout) for _ in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(stock(variation, location), 0)
+        self.assertEqual(ledger_total(variation, location), 0)
+        self.assertEqual(
+            InventoryMovement.objects.filter(reason="SALE").count(),
+            self.THREADS * self.SALES_PER_THREAD,
+        )
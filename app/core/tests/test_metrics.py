@@ -0,0 +1,110 @@
+# Test the request metrics middleware and endpoint
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import serializers, status
+from rest_framework.test import APIClient
+
+from catalog.cache import catalog_cache
+from core import metrics
+from core.tests.factories import create_product, create_variation
+
+METRICS_URL = reverse("request-metrics")
+PRODUCTS_URL = reverse("catalog:product-list")
+
+
+class NameSerializer(serializers.Serializer):
+    name = serializers.CharField()
+
+
+class HistogramTests(SimpleTestCase):
+    # Test the histograms and serializer timing on their own
+
+    def test_buckets_are_cumulative(self):
+        histogram = metrics.Histogram([1, 5])
+        for value in [0, 1, 3, 9]:
+            histogram.observe(value)
+
+        self.assertEqual(
+            histogram.as_dict(),
+            {
+                "count": 4,
+                "sum": 13,
+                "max": 9,
+                "buckets": [
+                    {"le": 1, "count": 2},
+                    {"le": 5, "count": 3},
+                    {"le": None, "count": 4},
+                ],
+            },
+        )
+
+    def test_serializer_data_is_timed_once(self):
+        request_metrics = metrics.RequestMetrics()
+        token = metrics._current.set(request_metrics)
+        try:
+            data = NameSerializer([{"name": "a"}, {"name": "b"}], many=True)
+            self.assertEqual(len(data.data), 2)
+        finally:
+            metrics._current.reset(token)
+
+        self.assertGreater(request_metrics.serializer_time, 0)
+        self.assertFalse(request_metrics.serializing)
+
+
+class RequestMetricsTests(TestCase):
+    # Test metrics recorded through the middleware
+
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        catalog_cache.invalidate()
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        create_variation(product=create_product())
+
+    def test_records_queries_and_times_per_route(self):
+        self.client.get(PRODUCTS_URL)
+        self.client.get(PRODUCTS_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        stats = res.data["catalog:product-list"]
+        self.assertEqual(stats["latency_ms"]["count"], 2)
+        # Products and their variations, then served from the cache
+        self.assertEqual(stats["queries"]["sum"], 2)
+        self.assertEqual(stats["queries"]["max"], 2)
+        self.assertGreater(stats["db_time_ms"]["sum"], 0)
+        self.assertGreater(stats["serializer_time_ms"]["sum"], 0)
+        self.assertEqual(stats["query_budget"], 3)
+        self.assertEqual(stats["over_budget"], 0)
+
+    def test_unresolved_requests(self):
+        self.client.get("/api/missing/")
+
+        self.assertIn(metrics.UNRESOLVED, metrics.snapshot())
+
+    @override_settings(
+        REQUEST_METRICS={"BUDGETS": {"catalog:product-list": 1}}
+    )
+    def test_counts_requests_over_budget(self):
+        with self.assertLogs("core.metrics", "WARNING"):
+            self.client.get(PRODUCTS_URL)
+
+        stats = metrics.snapshot()["catalog:product-list"]
+        self.assertEqual(stats["over_budget"], 1)
+
+    def test_admin_only(self):
+        user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=user)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
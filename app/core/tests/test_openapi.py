@@ -0,0 +1,107 @@
+# Test the precomputed OpenAPI schema
+
+import gzip
+import json
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import openapi
+
+SCHEMA_URL = reverse("api-schema")
+
+
+class OpenApiSchemaTests(TestCase):
+    # Test building and serving the schema artifacts
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(OPENAPI_SCHEMA_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        openapi._loaded.clear()
+        self.addCleanup(openapi._loaded.clear)
+        self.client = APIClient()
+
+    def test_serves_yaml_with_etag(self):
+        res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.content.startswith(b"openapi:"))
+        self.assertIn("application/vnd.oai.openapi", res["Content-Type"])
+        self.assertIn("ETag", res)
+        self.assertIn("Accept-Encoding", res["Vary"])
+
+    def test_not_modified_for_matching_etag(self):
+        etag = self.client.get(SCHEMA_URL)["ETag"]
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+
+    def test_serves_json_gzipped(self):
+        plain = self.client.get(SCHEMA_URL, HTTP_ACCEPT="application/json")
+        res = self.client.get(
+            SCHEMA_URL,
+            HTTP_ACCEPT="application/json",
+            HTTP_ACCEPT_ENCODING="gzip, deflate",
+        )
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertNotEqual(res["ETag"], plain["ETag"])
+        self.assertIn("/api/user/me/", json.loads(plain.content)["paths"])
+
+    def test_gzip_refused_or_not_asked_for(self):
+        for header in ("gzip;q=0", "gzipped", "deflate, *;q=0", "br"):
+            res = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING=header)
+
+            self.assertNotIn("Content-Encoding", res, header)
+            self.assertIn("Accept-Encoding", res["Vary"])
+
+    def test_accepts_gzip(self):
+        self.assertTrue(openapi.accepts_gzip("deflate, GZIP;q=0.5"))
+        self.assertTrue(openapi.accepts_gzip("br, *"))
+        self.assertFalse(openapi.accepts_gzip("*, gzip;q=0"))
+        self.assertFalse(openapi.accepts_gzip(""))
+
+    def test_not_modified_varies_on_encoding(self):
+        etag = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING="gzip")["ETag"]
+
+        res = self.client.get(
+            SCHEMA_URL, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertIn("Accept-Encoding", res["Vary"])
+
+    def test_built_once_per_version(self):
+        with mock.patch.object(
+            openapi.spectacular_settings,
+            "DEFAULT_GENERATOR_CLASS",
+            wraps=openapi.spectacular_settings.DEFAULT_GENERATOR_CLASS,
+        ) as generator:
+            openapi.build("v1")
+            openapi.build("v1")
+            openapi.build("v1", force=True)
+
+        self.assertEqual(generator.call_count, 2)
+
+    def test_prune_removes_other_versions(self):
+        old = openapi.build("v1")
+        new = openapi.build("v2")
+
+        removed = openapi.prune("v2")
+
+        self.assertEqual(len(removed), 4)
+        self.assertFalse(any(path.exists() for path in old))
+        self.assertTrue(all(path.exists() for path in new))
+
+    def test_fingerprint_is_stable(self):
+        self.assertEqual(openapi.fingerprint(), openapi.fingerprint())
@@ -0,0 +1,171 @@
+# Test the relational copies of the Order JSON collections
+
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core import models, order_items
+from core.tests.factories import create_order
+
+LINE_ITEMS = [
+    {
+        "uid": "li-1",
+        "name": "Coffee",
+        "catalog_object_id": "COF-REG",
+        "quantity": "2",
+        "base_price_money": {"amount": 300, "currency": "USD"},
+        "total_money": {"amount": 600, "currency": "USD"},
+    },
+    {"name": "Bagel", "sku": "BAG", "total_money": "2.50"},
+]
+
+
+def legacy_orders(count, **params):
+    # Orders written around save(), as before dual-write existed
+    now = timezone.now()
+    fields = {
+        "buyer_email": "buyer@example.com",
+        "recipient_name": "Buyer",
+        "recipient_phone_number": "",
+        "state": "COMPLETED",
+        "shipping_address": {},
+        "billing_address": {},
+        "line_items": LINE_ITEMS,
+        "taxes": [{"name": "VAT", "percentage": "8.5"}],
+        "discounts": [],
+        "service_charges": [],
+        "fulfillments": [{"type": "PICKUP", "state": "COMPLETED"}],
+        "refunds": [],
+        "created_at": now,
+        "updated_at": now,
+    }
+    fields.update(params)
+    return models.Order.objects.bulk_create(
+        [models.Order(**fields) for _ in range(count)]
+    )
+
+
+class OrderItemTests(TestCase):
+    # Test dual-write, batched normalization and SQL aggregates
+
+    def test_save_writes_child_rows(self):
+        order = create_order(
+            line_items=LINE_ITEMS,
+            refunds=[{"reason": "Spilled", "amount_money": {"amount": 300}}],
+        )
+
+        coffee, bagel = order.line_item_rows.all()
+        self.assertEqual(coffee.uid, "li-1")
+        self.assertEqual(coffee.sku, "COF-REG")
+        self.assertEqual(coffee.quantity, Decimal("2"))
+        self.assertEqual(coffee.base_price_money, Decimal("3.00"))
+        self.assertEqual(coffee.total_money, Decimal("6.00"))
+        self.assertEqual(coffee.data, LINE_ITEMS[0])
+        self.assertEqual(bagel.quantity, Decimal("1"))
+        self.assertEqual(bagel.total_money, Decimal("2.50"))
+        self.assertEqual(
+            order.refund_rows.get().amount_money, Decimal("3.00")
+        )
+        order.refresh_from_db()
+        self.assertTrue(order.items_normalized)
+
+    def test_save_replaces_child_rows(self):
+        order = create_order(line_items=LINE_ITEMS)
+
+        order.line_items = [{"name": "Tea", "quantity": "1"}]
+        order.save()
+
+        self.assertEqual(
+            [row.name for row in order.line_item_rows.all()], ["Tea"]
+        )
+
+    def test_save_of_other_fields_keeps_child_rows(self):
+        order = create_order(line_items=LINE_ITEMS)
+        order.state = "COMPLETED"
+
+        # Only the UPDATE of the order itself
+        with self.assertNumQueries(1):
+            order.save(update_fields=["state"])
+
+        self.assertEqual(order.line_item_rows.count(), 2)
+
+    def test_save_of_collection_fields_replaces_child_rows(self):
+        order = create_order(line_items=LINE_ITEMS)
+
+        order.line_items = [{"name": "Tea", "quantity": "1"}]
+        order.save(update_fields=["line_items", "updated_at"])
+
+        self.assertEqual(
+            [row.name for row in order.line_item_rows.all()], ["Tea"]
+        )
+
+    def test_malformed_elements_are_kept(self):
+        order = create_order(
+            line_items=["oops", {"quantity": "lots", "total_money": 1e20}],
+            taxes={"not": "a list"},
+        )
+
+        first, second = order.line_item_rows.all()
+        self.assertEqual(first.data, "oops")
+        self.assertEqual(second.quantity, Decimal(0))
+        self.assertIsNone(second.total_money)
+        self.assertFalse(order.tax_rows.exists())
+
+    def test_normalize_orders_in_resumable_batches(self):
+        orders = legacy_orders(5)
+
+        converted = order_items.normalize_orders(batch_size=2, max_batches=1)
+
+        self.assertEqual(converted, 2)
+        self.assertEqual(
+            models.Order.objects.filter(items_normalized=False).count(), 3
+        )
+
+        converted = order_items.normalize_orders(batch_size=2)
+
+        self.assertEqual(converted, 3)
+        self.assertEqual(models.OrderLineItem.objects.count(), 10)
+        self.assertEqual(models.OrderTax.objects.count(), 5)
+        self.assertEqual(
+            models.OrderFulfillment.objects.filter(
+                order=orders[0], type="PICKUP"
+            ).count(),
+            1,
+        )
+        self.assertEqual(order_items.normalize_orders(), 0)
+
+    def test_normalize_orders_command(self):
+        legacy_orders(3)
+        out = StringIO()
+
+        call_command("normalize_orders", "--batch-size", "2", stdout=out)
+
+        self.assertIn("Normalized 3 orders", out.getvalue())
+
+    def test_line_item_totals_in_sql(self):
+        legacy_orders(3)
+        order_items.normalize_orders()
+
+        with self.assertNumQueries(1):
+            totals = list(order_items.line_item_totals())
+
+        self.assertEqual(
+            totals,
+            [
+                {
+                    "sku": "COF-REG",
+                    "units": Decimal("6"),
+                    "revenue_money": Decimal("18.00"),
+                    "orders": 3,
+                },
+                {
+                    "sku": "BAG",
+                    "units": Decimal("3"),
+                    "revenue_money": Decimal("7.50"),
+                    "orders": 3,
+                },
+            ],
+        )
@@ -0,0 +1,328 @@
+# Test the transactional outbox, its relay and the change stream
+
+import datetime
+import json
+import os
+import tempfile
+import threading
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import outbox
+from core.models import OutboxEvent
+from core.tests.factories import (
+    create_customer,
+    create_order,
+    create_product,
+)
+
+EVENTS_URL = reverse("outbox-events")
+
+
+class ListSink:
+    # Sink keeping what it was sent, failing while broken is set
+    broken = False
+
+    def __init__(self):
+        self.events = []
+
+    def send(self, events):
+        if self.broken:
+            raise OSError("sink down")
+        self.events.extend(event.id for event in events)
+
+    def close(self):
+        pass
+
+
+class OutboxTests(TransactionTestCase):
+    # Test capturing and reading events
+
+    def events(self):
+        return list(
+            OutboxEvent.objects.order_by("id").values_list(
+                "aggregate_type", "event_type", "aggregate_id"
+            )
+        )
+
+    def test_changes_append_events(self):
+        customer = create_customer()
+        # Deleting clears the pk
+        key = str(customer.pk)
+        customer.given_name = "Janet"
+        customer.save()
+        customer.delete()
+
+        self.assertEqual(
+            self.events(),
+            [
+                ("customer", "insert", key),
+                ("customer", "update", key),
+                ("customer", "delete", key),
+            ],
+        )
+        deleted = OutboxEvent.objects.latest("id")
+        self.assertEqual(deleted.payload["given_name"], "Janet")
+
+    def test_derived_column_changes_are_not_events(self):
+        # Saving a product also refreshes its search vector
+        product = create_product()
+        order = create_order()
+        order.items_normalized = True
+        order.save()
+
+        self.assertEqual(
+            self.events(),
+            [
+                ("product", "insert", str(product.pk)),
+                ("order", "insert", str(order.pk)),
+            ],
+        )
+        payload = OutboxEvent.objects.get(aggregate_type="product").payload
+        self.assertNotIn("search_vector", payload)
+
+    def test_rolled_back_changes_leave_no_events(self):
+        try:
+            with transaction.atomic():
+                create_customer()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        self.assertEqual(self.events(), [])
+
+    def test_read_in_batches(self):
+        customers = [create_customer() for _ in range(3)]
+
+        first, cursor = outbox.read(outbox.Cursor(), 2)
+        second, cursor = outbox.read(cursor, 2)
+        third, cursor = outbox.read(cursor, 2)
+        new = create_customer()
+        fourth, cursor = outbox.read(cursor, 2)
+
+        self.assertEqual(
+            [event.aggregate_id for event in first + second],
+            [str(customer.pk) for customer in customers],
+        )
+        self.assertEqual(third, [])
+        self.assertEqual(
+            [event.aggregate_id for event in fourth], [str(new.pk)]
+        )
+
+    def test_late_commit_with_smaller_id_is_read(self):
+        # An event whose transaction commits after a later event was read
+        # comes in the next window instead of being skipped
+        written = threading.Event()
+        release = threading.Event()
+
+        def slow_writer():
+            try:
+                with transaction.atomic():
+                    create_customer(given_name="Slow")
+                    written.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        writer = threading.Thread(target=slow_writer)
+        writer.start()
+        written.wait(10)
+        fast = create_customer(given_name="Fast")
+
+        before, cursor = outbox.read(outbox.Cursor(), 100)
+        release.set()
+        writer.join()
+        after, cursor = outbox.read(cursor, 100)
+
+        self.assertEqual(
+            [event.aggregate_id for event in before], [str(fast.pk)]
+        )
+        self.assertEqual(
+            [event.payload["given_name"] for event in after], ["Slow"]
+        )
+        self.assertLess(after[0].id, before[0].id)
+
+    def test_latest_and_type_filter(self):
+        create_customer()
+        cursor = outbox.latest()
+        create_product()
+        customer = create_customer()
+
+        events, _ = outbox.read(cursor, 100, ["customer"])
+
+        self.assertEqual(
+            [event.aggregate_id for event in events], [str(customer.pk)]
+        )
+
+    def test_cursor_round_trip(self):
+        cursor = outbox.Cursor("10:12:11", "10:14:", 7)
+
+        self.assertEqual(outbox.Cursor.decode(cursor.encode()), cursor)
+        with self.assertRaises(outbox.InvalidCursor):
+            outbox.Cursor.decode("garbage")
+
+
+class RelayTests(TransactionTestCase):
+    # Test delivering events to sinks
+
+    def test_relay_delivers_once_in_batches(self):
+        for _ in range(3):
+            create_customer()
+        sink = ListSink()
+
+        sent = [outbox.relay_once(sink, batch_size=2) for _ in range(3)]
+
+        self.assertEqual(sent, [2, 1, 0])
+        ids = OutboxEvent.objects.order_by("id").values_list("id", flat=True)
+        self.assertEqual(sink.events, list(ids))
+
+    def test_failed_batch_is_resent(self):
+        create_customer()
+        sink = ListSink()
+        sink.broken = True
+
+        with self.assertRaises(OSError):
+            outbox.relay_once(sink)
+        sink.broken = False
+        outbox.relay_once(sink)
+
+        self.assertEqual(len(sink.events), 1)
+
+    def test_relay_command_writes_ndjson(self):
+        customer = create_customer()
+        path = os.path.join(tempfile.mkdtemp(), "events.ndjson")
+        out = StringIO()
+
+        with override_settings(
+            OUTBOX={
+                "SINK": "core.outbox.FileSink",
+                "SINK_OPTIONS": {"path": path},
+            }
+        ):
+            call_command("relay_outbox", "--once", stdout=out)
+
+        with open(path) as sink:
+            lines = [json.loads(line) for line in sink]
+        self.assertEqual(lines[0]["aggregate_id"], str(customer.pk))
+        self.assertEqual(lines[0]["event_type"], "insert")
+        self.assertIn("1 events delivered", out.getvalue())
+
+    def age_events(self, days):
+        OutboxEvent.objects.update(
+            created_at=timezone.now() - datetime.timedelta(days=days)
+        )
+
+    def test_purge_keeps_undelivered_events(self):
+        for _ in range(3):
+            create_customer()
+        self.age_events(8)
+        sink = ListSink()
+        outbox.relay_once(sink, "slow", batch_size=2)
+        while outbox.relay_once(sink, "fast"):
+            pass
+
+        kept = outbox.purge()
+
+        # The slow relay is still in the first window
+        self.assertEqual(kept, 0)
+        while outbox.relay_once(sink, "slow"):
+            pass
+        create_customer()
+        self.assertEqual(outbox.purge(batch_size=2), 3)
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+    def test_purge_command_keeps_recent_events(self):
+        create_customer()
+        self.age_events(3)
+        create_customer()
+        out = StringIO()
+
+        call_command("purge_outbox", stdout=out)
+        call_command("purge_outbox", "--days", "2", stdout=out)
+
+        self.assertEqual(
+            out.getvalue().splitlines(), ["0 events purged", "1 events purged"]
+        )
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+
+class OutboxApiTests(TransactionTestCase):
+    # Test the change stream API
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def stream(self, **params):
+        res = self.client.get(EVENTS_URL, {"wait": 0, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [
+            json.loads(line)
+            for line in b"".join(res.streaming_content).splitlines()
+        ]
+
+    def test_stream_and_resume(self):
+        customers = [create_customer() for _ in range(2)]
+
+        lines = self.stream(types="customer")
+        create_customer(given_name="Later")
+        resumed = self.stream(cursor=lines[-1]["cursor"])
+
+        self.assertEqual(
+            [line["event"]["aggregate_id"] for line in lines[:-1]],
+            [str(customer.pk) for customer in customers],
+        )
+        self.assertNotIn("event", lines[-1])
+        self.assertEqual(
+            [line["event"]["payload"]["given_name"] for line in resumed[:-1]],
+            ["Later"],
+        )
+
+    def test_resume_after_an_event(self):
+        create_customer()
+        second = create_customer()
+
+        lines = self.stream(types="customer")
+        resumed = self.stream(cursor=lines[0]["cursor"], types="customer")
+
+        self.assertEqual(
+            [line["event"]["aggregate_id"] for line in resumed[:-1]],
+            [str(second.pk)],
+        )
+
+    def test_latest(self):
+        create_customer()
+
+        lines = self.stream(cursor="latest")
+
+        self.assertEqual(len(lines), 1)
+
+    def test_invalid_params(self):
+        res = self.client.get(
+            EVENTS_URL, {"cursor": "garbage", "types": "refund", "wait": -1}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(res.data), {"cursor", "types", "wait"})
+
+    def test_admin_only(self):
+        self.client.force_authenticate(
+            user=get_user_model().objects.create_user(
+                email="test@example.com", password="testpass123"
+            )
+        )
+
+        res = self.client.get(EVENTS_URL, {"wait": 0})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,84 @@
+# Test estimated counts for large table pagination
+
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core import pagination
+from core.models import Order, Transaction
+from core.tests.factories import create_order
+
+
+class EstimatedCountTests(TestCase):
+    # Test estimated_count() and EstimatedCountPaginator
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        for state in ["OPEN", "OPEN", "COMPLETED"]:
+            create_order(state=state)
+
+    def test_small_counts_are_exact(self):
+        self.assertEqual(pagination.estimated_count(Order.objects.all()), 3)
+        self.assertEqual(
+            pagination.estimated_count(Order.objects.filter(state="OPEN")), 2
+        )
+
+    @override_settings(ESTIMATED_COUNT={"THRESHOLD": 1000})
+    def test_large_unfiltered_counts_use_table_estimate(self):
+        with patch.object(pagination, "table_estimate", return_value=5000):
+            with CaptureQueriesContext(connection) as queries:
+                count = pagination.estimated_count(Order.objects.all())
+
+        self.assertEqual(count, 5000)
+        self.assertEqual(len(queries), 0)
+
+    @override_settings(ESTIMATED_COUNT={"THRESHOLD": 1000})
+    def test_large_filtered_counts_use_explain(self):
+        queryset = Order.objects.filter(state="OPEN")
+
+        with patch.object(pagination, "explain_estimate", return_value=2000):
+            count = pagination.estimated_count(queryset)
+
+        self.assertEqual(count, 2000)
+
+    def test_explain_estimate(self):
+        estimate = pagination.explain_estimate(
+            Order.objects.filter(state="OPEN")
+        )
+
+        self.assertIsInstance(estimate, int)
+        self.assertGreaterEqual(estimate, 1)
+
+    def test_partitioned_table_estimate(self):
+        # Never analyzed in the test database, or summed over partitions
+        estimate = pagination.table_estimate(Transaction, "default")
+
+        self.assertTrue(estimate is None or estimate >= 0)
+
+    def test_empty_queryset(self):
+        self.assertEqual(pagination.estimated_count(Order.objects.none()), 0)
+        self.assertEqual(
+            pagination.estimated_count(Order.objects.filter(pk__in=[])), 0
+        )
+
+    def test_counts_are_cached(self):
+        pagination.estimated_count(Order.objects.order_by("pk"))
+        create_order()
+
+        with self.assertNumQueries(0):
+            count = pagination.estimated_count(Order.objects.all())
+
+        self.assertEqual(count, 3)
+
+    def test_paginator(self):
+        paginator = pagination.EstimatedCountPaginator(
+            Order.objects.order_by("pk"), 2
+        )
+
+        self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.num_pages, 2)
+        self.assertEqual(len(paginator.page(2)), 1)
@@ -0,0 +1,118 @@
+# Test the monthly partitioning of core_transaction
+
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from core import models, partitions
+from core.tests.factories import create_transaction
+
+TABLE = "core_transaction"
+
+# Far enough ahead to never be covered by the migration's partitions
+FUTURE = datetime.datetime(2040, 3, 15, tzinfo=datetime.timezone.utc)
+
+
+def partition_names():
+    with connection.cursor() as cursor:
+        return [name for name, _ in partitions.list_partitions(TABLE, cursor)]
+
+
+class PartitionTests(TestCase):
+    # Test partition maintenance and pruning
+
+    def test_table_is_partitioned(self):
+        with connection.cursor() as cursor:
+            self.assertTrue(partitions.is_partitioned(TABLE, cursor))
+
+        names = partition_names()
+        self.assertIn(partitions.default_partition_name(TABLE), names)
+        self.assertIn(partitions.legacy_partition_name(TABLE), names)
+
+    def test_command_creates_partitions_ahead(self):
+        call_command(
+            "manage_partitions", "--months-ahead", "6", stdout=StringIO()
+        )
+
+        start = partitions.add_months(
+            partitions.month_start(timezone.now()), 6
+        )
+        name = partitions.partition_name(TABLE, start)
+        self.assertIn(name, partition_names())
+
+    def test_orm_round_trip(self):
+        # Models keep addressing rows by transaction_id alone
+        transaction = create_transaction(created_at=FUTURE)
+        transaction.tip_money = 2
+        transaction.save()
+
+        fetched = models.Transaction.objects.get(pk=transaction.pk)
+        self.assertEqual(fetched.tip_money, 2)
+
+        fetched.delete()
+        self.assertFalse(models.Transaction.objects.exists())
+
+    def test_rows_in_default_move_to_new_partition(self):
+        transaction = create_transaction(created_at=FUTURE)
+
+        with connection.cursor() as cursor:
+            name = partitions.create_partition(
+                TABLE, partitions.month_start(FUTURE), cursor
+            )
+            cursor.execute(
+                "SELECT tableoid::regclass::text FROM core_transaction "
+                "WHERE transaction_id = %s",
+                [transaction.pk],
+            )
+            self.assertEqual(cursor.fetchone()[0], name)
+
+        self.assertEqual(
+            models.Transaction.objects.get(pk=transaction.pk).created_at,
+            FUTURE,
+        )
+
+    def test_date_range_is_pruned(self):
+        start = partitions.month_start(FUTURE)
+        with connection.cursor() as cursor:
+            for offset in range(3):
+                partitions.create_partition(
+                    TABLE, partitions.add_months(start, offset), cursor
+                )
+
+        plan = models.Transaction.objects.filter(
+            created_at__gte=start,
+            created_at__lt=partitions.add_months(start, 1),
+        ).explain()
+
+        self.assertIn(partitions.partition_name(TABLE, start), plan)
+        self.assertNotIn(
+            partitions.partition_name(
+                TABLE, partitions.add_months(start, 1)
+            ),
+            plan,
+        )
+        self.assertNotIn(partitions.legacy_partition_name(TABLE), plan)
+        self.assertNotIn(partitions.default_partition_name(TABLE), plan)
+
+    def test_expired_partitions_are_detached(self):
+        start = partitions.month_start(FUTURE)
+        with connection.cursor() as cursor:
+            old = partitions.create_partition(TABLE, start, cursor)
+            kept = partitions.create_partition(
+                TABLE, partitions.add_months(start, 1), cursor
+            )
+
+            expired = partitions.expired_partitions(
+                TABLE, partitions.add_months(start, 1), cursor
+            )
+            self.assertIn(old, expired)
+            self.assertNotIn(kept, expired)
+
+            partitions.detach_partition(TABLE, old, cursor, drop=True)
+
+        self.assertNotIn(old, partition_names())
+        self.assertIn(kept, partition_names())
@@ -0,0 +1,152 @@
+# Test the incrementally maintained sales rollups
+
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import models, rollups
+from core.tests.factories import (
+    create_item_sold,
+    create_location,
+    create_order,
+    create_transaction,
+    create_variation,
+)
+
+# A Wednesday, so the week starts on the 3rd and the month on the 1st
+SOLD_AT = datetime.datetime(2023, 5, 3, 12, tzinfo=datetime.timezone.utc)
+SOLD_ON = SOLD_AT.date()
+
+
+class RollupTests(TestCase):
+    # Test facts and rollups follow ItemSold changes
+
+    def setUp(self):
+        self.variation = create_variation(price_money=Decimal("2.50"))
+        self.location = create_location()
+        self.order = create_order(created_at=SOLD_AT)
+        create_transaction(
+            order=self.order, location=self.location, created_at=SOLD_AT
+        )
+
+    def sell(self, quantity=1, order=None):
+        return create_item_sold(
+            variation=self.variation,
+            order=order or self.order,
+            quantity=quantity,
+        )
+
+    def test_sale_creates_fact(self):
+        item = self.sell(quantity=2)
+
+        fact = models.SaleFact.objects.get(item_sold=item)
+        self.assertEqual(fact.sold_on, SOLD_ON)
+        self.assertEqual(fact.location, self.location)
+        self.assertEqual(fact.revenue_money, Decimal("5.00"))
+
+    def test_sales_roll_up_per_period(self):
+        self.sell(quantity=2)
+        self.sell(quantity=3)
+        next_week = SOLD_AT + datetime.timedelta(days=7)
+        later = create_order(created_at=next_week)
+        create_transaction(
+            order=later, location=self.location, created_at=next_week
+        )
+        self.sell(quantity=1, order=later)
+
+        daily = models.DailySalesRollup.objects.get(period_start=SOLD_ON)
+        self.assertEqual(daily.units, 5)
+        self.assertEqual(daily.line_count, 2)
+        self.assertEqual(daily.revenue_money, Decimal("12.50"))
+        self.assertEqual(models.WeeklySalesRollup.objects.count(), 2)
+        monthly = models.MonthlySalesRollup.objects.get()
+        self.assertEqual(monthly.period_start, datetime.date(2023, 5, 1))
+        self.assertEqual(monthly.units, 6)
+
+    def test_quantity_change_and_delete(self):
+        item = self.sell(quantity=2)
+        item.quantity = 4
+        item.save()
+
+        self.assertEqual(models.DailySalesRollup.objects.get().units, 4)
+
+        item.delete()
+
+        daily = models.DailySalesRollup.objects.get()
+        self.assertEqual(daily.units, 0)
+        self.assertEqual(daily.line_count, 0)
+        self.assertFalse(models.SaleFact.objects.exists())
+
+    def test_sale_before_payment_is_relocated(self):
+        order = create_order(created_at=SOLD_AT)
+        self.sell(quantity=1, order=order)
+        self.assertIsNone(models.SaleFact.objects.get(order=order).location)
+
+        create_transaction(
+            order=order, location=self.location, created_at=SOLD_AT
+        )
+
+        self.assertEqual(
+            models.SaleFact.objects.get(order=order).location, self.location
+        )
+        daily = models.DailySalesRollup.objects.get(location=self.location)
+        self.assertEqual(daily.units, 1)
+        unplaced = models.DailySalesRollup.objects.get(location=None)
+        self.assertEqual(unplaced.units, 0)
+
+    def test_price_change_keeps_past_revenue(self):
+        item = self.sell(quantity=2)
+        self.variation.price_money = Decimal("4.00")
+        self.variation.save()
+
+        item.quantity = 3
+        item.save()
+        call_command("backfill_rollups", stdout=StringIO())
+
+        item.refresh_from_db()
+        self.assertEqual(item.price_money, Decimal("2.50"))
+        self.assertEqual(
+            models.SaleFact.objects.get().revenue_money, Decimal("7.50")
+        )
+        self.assertEqual(
+            models.MonthlySalesRollup.objects.get().revenue_money,
+            Decimal("7.50"),
+        )
+
+    def test_sales_totals(self):
+        self.sell(quantity=2)
+
+        totals = rollups.sales_totals(
+            "month", datetime.date(2023, 1, 1), datetime.date(2023, 12, 31)
+        )
+
+        self.assertEqual(totals["units"], 2)
+        self.assertEqual(totals["revenue_money"], Decimal("5.00"))
+
+    def test_backfill_matches_incremental(self):
+        self.sell(quantity=2)
+        self.sell(quantity=3)
+        expected = list(
+            models.WeeklySalesRollup.objects.values(
+                "period_start", "location", "units", "revenue_money"
+            )
+        )
+        models.DailySalesRollup.objects.all().delete()
+        models.WeeklySalesRollup.objects.all().delete()
+        models.SaleFact.objects.all().delete()
+
+        call_command("backfill_rollups", stdout=StringIO())
+
+        self.assertEqual(models.SaleFact.objects.count(), 2)
+        self.assertEqual(models.DailySalesRollup.objects.get().units, 5)
+        self.assertEqual(
+            list(
+                models.WeeklySalesRollup.objects.values(
+                    "period_start", "location", "units", "revenue_money"
+                )
+            ),
+            expected,
+        )
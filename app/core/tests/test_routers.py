@@ -0,0 +1,126 @@
+# Test read replica routing
+
+from unittest import mock
+
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core import routers
+from core.models import Customer, Order, Product
+from core.tests.factories import create_product
+
+ROUTING = {
+    "REPLICAS": ["replica1", "replica2"],
+    "MODELS": ["core.order", "core.product"],
+    "MAX_LAG": 5,
+    "LAG_CHECK_INTERVAL": 60,
+}
+
+
+@override_settings(REPLICA_ROUTING=ROUTING)
+class ReplicaRouterTests(SimpleTestCase):
+    # Test routing decisions, replica lag is faked
+
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+        routers.reset_stickiness()
+        patcher = mock.patch("core.routers.replica_lag", return_value=0)
+        self.replica_lag = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_of_routed_models_go_to_replicas(self):
+        self.assertIn(self.router.db_for_read(Order), ROUTING["REPLICAS"])
+        self.assertIn(Product.objects.all().db, ROUTING["REPLICAS"])
+
+    def test_other_models_use_primary(self):
+        self.assertIsNone(self.router.db_for_read(Customer))
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(Order), "default")
+
+    def test_reads_stick_to_primary_after_write(self):
+        self.router.db_for_write(Customer)
+
+        self.assertIsNone(self.router.db_for_read(Order))
+
+        routers.reset_stickiness()
+        self.assertIn(self.router.db_for_read(Order), ROUTING["REPLICAS"])
+
+    def test_lagging_replica_skipped(self):
+        self.replica_lag.side_effect = lambda alias: {
+            "replica1": 30,
+            "replica2": 1,
+        }[alias]
+
+        for _ in range(10):
+            self.assertEqual(self.router.db_for_read(Order), "replica2")
+
+    def test_falls_back_to_primary_when_all_lag(self):
+        self.replica_lag.return_value = routers.UNAVAILABLE
+
+        self.assertEqual(self.router.db_for_read(Order), "default")
+
+    @override_settings(REPLICA_ROUTING={**ROUTING, "REPLICAS": []})
+    def test_no_replicas_configured(self):
+        self.assertIsNone(self.router.db_for_read(Order))
+
+    def test_replicas_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate("replica1", "core"))
+        self.assertIsNone(self.router.allow_migrate("default", "core"))
+
+
+@override_settings(REPLICA_ROUTING=ROUTING)
+class ReplicaLagTests(TestCase):
+    # Test lag measurement against the test database
+
+    def setUp(self):
+        routers._lag.clear()
+        self.addCleanup(routers._lag.clear)
+
+    def test_primary_has_no_lag(self):
+        self.assertEqual(routers.measure_lag("default"), 0)
+
+    def fake_replica(self, row):
+        # Patch the cursor of default to return row for the lag query
+        patcher = mock.patch.object(connection, "cursor")
+        cursor = patcher.start().return_value.__enter__.return_value
+        self.addCleanup(patcher.stop)
+        cursor.fetchone.return_value = row
+        return cursor
+
+    def test_lag_query_checks_wal_receiver(self):
+        cursor = self.fake_replica((0,))
+
+        self.assertEqual(routers.measure_lag("default"), 0)
+        self.assertIn("pg_stat_wal_receiver", cursor.execute.call_args[0][0])
+
+    def test_replica_without_replay_is_unavailable(self):
+        self.fake_replica((None,))
+
+        self.assertEqual(routers.measure_lag("default"), routers.UNAVAILABLE)
+
+    def test_lag_measured_once_per_interval(self):
+        with mock.patch(
+            "core.routers.measure_lag", return_value=2.0
+        ) as measure:
+            self.assertEqual(routers.replica_lag("replica1"), 2.0)
+            self.assertEqual(routers.replica_lag("replica1"), 2.0)
+
+        measure.assert_called_once_with("replica1")
+
+    def test_unreachable_replica_is_unavailable(self):
+        with mock.patch(
+            "core.routers.measure_lag", side_effect=DatabaseError
+        ):
+            lag = routers.replica_lag("replica1")
+
+        self.assertEqual(lag, routers.UNAVAILABLE)
+
+    def test_reads_in_transaction_use_primary(self):
+        create_product()
+        routers.reset_stickiness()
+
+        # TestCase runs every test inside a transaction
+        self.assertTrue(connection.in_atomic_block)
+        with mock.patch("core.routers.replica_lag", return_value=0):
+            self.assertEqual(Product.objects.all().db, "default")
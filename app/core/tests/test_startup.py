@@ -0,0 +1,63 @@
+# Test startup profiling and the lazily loaded modules
+
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from drf_spectacular.openapi import AutoSchema
+from rest_framework.views import APIView
+
+from core import startup
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 | site
+startup-phase:interpreter
+import time:       300 |        300 |   django.conf.global_settings
+import time:       200 |        500 | django.conf
+startup-phase:settings
+import time:      1000 |       1000 | rest_framework
+startup-phase:apps
+"""
+
+
+class StartupProfileTests(SimpleTestCase):
+    # Test the startup profile
+
+    def test_parse_importtime_splits_phases(self):
+        imports = startup.parse_importtime(IMPORTTIME.splitlines())
+
+        self.assertEqual(imports["interpreter"], [("site", 100, 100)])
+        self.assertEqual(
+            imports["settings"],
+            [
+                ("django.conf.global_settings", 300, 300),
+                ("django.conf", 200, 500),
+            ],
+        )
+        self.assertEqual(
+            startup.by_package(imports["settings"]), {"django": 500}
+        )
+        self.assertEqual(imports["apps"], [("rest_framework", 1000, 1000)])
+
+    def test_command_reports_every_phase(self):
+        out = StringIO()
+
+        call_command("profile_startup", "--json", stdout=out)
+
+        result = json.loads(out.getvalue())
+        self.assertEqual(list(result["timings"]), startup.PHASES)
+        self.assertTrue(result["status"].startswith("401"))
+
+    def test_schema_class_loaded_on_use(self):
+        self.assertIsInstance(APIView().schema, AutoSchema)
+
+    def test_analytics_loaded_on_use(self):
+        imports = startup.profile("/api/user/me/")["imports"]
+
+        modules = {
+            module for phase in imports.values() for module, *_ in phase
+        }
+        self.assertIn("sales.views", modules)
+        self.assertNotIn("numpy", modules)
@@ -1,3 +1,95 @@
-from django.shortcuts import render  # noqa
+# Operational views
 
-# Create your views here.
+from django.db import connections
+from django.http import StreamingHttpResponse
+from rest_framework import authentication, permissions, serializers
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.views import APIView
+
+from core import metrics, outbox
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class dbPoolStatsView(APIView):
+    # Connection pool metrics of this process per database alias,
+    # null for databases that are not pooled
+    authentication_classes = [authentication.TokenAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        stats = {}
+        for alias in connections:
+            connection_pool = getattr(connections[alias], "pool", None)
+            stats[alias] = connection_pool and connection_pool.stats()
+        return Response(stats)
+
+
+class requestMetricsView(APIView):
+    # Query count, DB time, serializer time and latency histograms of this
+    # process per route, with their query budgets
+    authentication_classes = [authentication.TokenAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        routes = metrics.snapshot()
+        for route, stats in routes.items():
+            stats["query_budget"] = metrics.budget(route)
+        return Response(routes)
+
+
+class OutboxQuerySerializer(serializers.Serializer):
+    # Serializer for the outbox stream query string
+    cursor = serializers.CharField(required=False)
+    types = serializers.MultipleChoiceField(
+        choices=outbox.AGGREGATE_TYPES, required=False
+    )
+    wait = serializers.FloatField(
+        min_value=0, max_value=outbox.MAX_WAIT, default=10
+    )
+
+    def validate_cursor(self, value):
+        if value == "latest":
+            return outbox.latest()
+        try:
+            return outbox.Cursor.decode(value)
+        except outbox.InvalidCursor:
+            raise serializers.ValidationError("Invalid cursor.")
+
+
+class outboxEventsView(APIView):
+    # Stream changes to orders, transactions, products and customers as
+    # NDJSON while they commit, for ?wait= seconds. Each event line
+    # carries the cursor to resume after it, the last line the cursor to
+    # resume from. Starts after ?cursor=, "latest" for new events only, or
+    # from the first event; ?types= (repeated) picks aggregate types.
+    authentication_classes = [authentication.TokenAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        query = OutboxQuerySerializer(
+            data={
+                **request.query_params.dict(),
+                "types": request.query_params.getlist("types"),
+            }
+        )
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        return StreamingHttpResponse(
+            self.stream(
+                params.get("cursor") or outbox.Cursor(),
+                params["wait"],
+                sorted(params.get("types", [])),
+            ),
+            content_type=NDJSON_MEDIA_TYPE,
+        )
+
+    def stream(self, cursor, wait, types):
+        encoder = JSONEncoder()
+        for event, position in outbox.follow(cursor, wait, types):
+            line = {"cursor": position.encode()}
+            if event is not None:
+                line["event"] = outbox.serialize(event)
+            yield encoder.encode(line) + "\n"
@@ -0,0 +1,103 @@
+# Views for the sales analytics API, loaded on first use (NumPy is only
+# imported by workers serving it, see app/urls.py)
+
+from rest_framework import (
+    authentication,
+    exceptions,
+    permissions,
+    serializers,
+)
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import analytics
+
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    # Serializer for the analytics query string
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    bucket = serializers.ChoiceField(
+        choices=list(analytics.BUCKETS), required=False
+    )
+
+    def validate(self, attrs):
+        if "bucket" in attrs and self.context["report"] != "revenue":
+            raise serializers.ValidationError(
+                {"bucket": "Only the revenue report has buckets."}
+            )
+        if attrs.get("start") and attrs.get("end"):
+            if attrs["start"] > attrs["end"]:
+                raise serializers.ValidationError(
+                    "start must not be after end."
+                )
+        return attrs
+
+
+MONEY = {"max_digits": 16, "decimal_places": 2}
+
+
+class RevenueSerializer(serializers.Serializer):
+    # Serializer for one time bucket, a datetime or an hour of the day
+    bucket = serializers.ReadOnlyField()
+    transactions = serializers.IntegerField()
+    amount_money = serializers.DecimalField(**MONEY)
+    tip_money = serializers.DecimalField(**MONEY)
+
+
+class TipsByEmployeeSerializer(serializers.Serializer):
+    # Serializer for the tips of one employee
+    employee = serializers.IntegerField()
+    transactions = serializers.IntegerField()
+    amount_money = serializers.DecimalField(**MONEY)
+    tip_money = serializers.DecimalField(**MONEY)
+    tip_percentage = serializers.FloatField(allow_null=True)
+
+
+class FeesByLocationSerializer(serializers.Serializer):
+    # Serializer for the processing fees of one location
+    location = serializers.IntegerField()
+    transactions = serializers.IntegerField()
+    amount_money = serializers.DecimalField(**MONEY)
+    processing_fee_money = serializers.DecimalField(**MONEY)
+    fee_ratio = serializers.FloatField(allow_null=True)
+
+
+class ItemsByVariationSerializer(serializers.Serializer):
+    # Serializer for the items sold of one variation
+    variation = serializers.IntegerField()
+    line_count = serializers.IntegerField()
+    units = serializers.IntegerField()
+    revenue_money = serializers.DecimalField(**MONEY)
+
+
+SERIALIZERS = {
+    "revenue": RevenueSerializer,
+    "tips_by_employee": TipsByEmployeeSerializer,
+    "fees_by_location": FeesByLocationSerializer,
+    "items_by_variation": ItemsByVariationSerializer,
+}
+
+
+class salesAnalyticsView(APIView):
+    # Run one of the analytics reports, results are cached for a while
+    authentication_classes = [authentication.TokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, report):
+        if report not in analytics.REPORTS:
+            raise exceptions.NotFound(
+                f"Unknown report, one of {list(analytics.REPORTS)}."
+            )
+        query = AnalyticsQuerySerializer(
+            data=request.query_params, context={"report": report}
+        )
+        query.is_valid(raise_exception=True)
+
+        results = analytics.run(report, **query.validated_data)
+        return Response(
+            {
+                "report": report,
+                "results": SERIALIZERS[report](results, many=True).data,
+            }
+        )
@@ -0,0 +1,328 @@
+# Bulk loading of POS transaction feeds
+#
+# Rows are validated one by one but foreign keys are resolved with a single
+# lookup per model per batch and each batch is written with one COPY
+# (PostgreSQL) or one bulk_create (other backends). Invalid rows are reported
+# back and skipped, they never abort the rest of the batch. Rows whose
+# client_id and reference_id were already written are skipped as
+# duplicates, see core/idempotency.py.
+
+import codecs
+import csv
+import datetime
+import decimal
+import io
+import json
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core import idempotency, rollups
+from core.models import Customer, Employee, Location, Order, Transaction
+
+BATCH_SIZE = 5000
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+
+# Row key -> model the id must exist in
+FOREIGN_KEYS = {
+    "order": Order,
+    "location": Location,
+    "customer": Customer,
+    "employee": Employee,
+}
+
+# CSV cells holding JSON documents
+JSON_COLUMNS = ("tender", "refunds", "product")
+
+
+def parse_ndjson(stream):
+    # Yield (row number, row, error) for every non blank line
+    reader = codecs.getreader("utf-8")(stream)
+    for number, line in enumerate(reader, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, None, {"non_field_errors": [str(exc)]}
+            continue
+        if not isinstance(row, dict):
+            yield number, None, {"non_field_errors": ["Expected an object."]}
+            continue
+        yield number, row, None
+
+
+def parse_csv(stream):
+    # Yield (row number, row, error) for every CSV record after the header
+    reader = csv.DictReader(codecs.getreader("utf-8")(stream))
+    for number, row in enumerate(reader, start=1):
+        errors = {}
+        for column in JSON_COLUMNS:
+            value = row.get(column)
+            if value is None:
+                continue
+            if value == "":
+                # Lets optional documents fall back to their default
+                del row[column]
+                continue
+            try:
+                row[column] = json.loads(value)
+            except ValueError as exc:
+                errors[column] = [str(exc)]
+        if errors:
+            yield number, None, errors
+        else:
+            yield number, row, None
+
+
+CENT = decimal.Decimal("0.01")
+# Smallest amount needing more than 10 digits with 2 decimal places
+MAX_MONEY = decimal.Decimal("100000000")
+
+
+def _to_id(value):
+    if isinstance(value, bool):
+        raise ValueError("A valid integer is required.")
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("A valid integer is required.")
+    if value < 1:
+        raise ValueError("Ensure this value is greater than or equal to 1.")
+    return value
+
+
+def _to_datetime(value):
+    if isinstance(value, datetime.datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            # Slower, but also accepts the formats Django does
+            try:
+                parsed = parse_datetime(str(value))
+            except ValueError:
+                parsed = None
+    if parsed is None:
+        raise ValueError("Datetime has wrong format.")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.utc)
+    return parsed
+
+
+def _to_money(value):
+    # Matches DecimalField(max_digits=10, decimal_places=2)
+    try:
+        amount = decimal.Decimal(str(value))
+    except decimal.InvalidOperation:
+        raise ValueError("A valid number is required.")
+    if not amount.is_finite():
+        raise ValueError("A valid number is required.")
+    if abs(amount) < MAX_MONEY:
+        amount = amount.quantize(CENT)
+    if abs(amount) >= MAX_MONEY:
+        raise ValueError("Ensure that there are no more than 10 digits.")
+    return amount
+
+
+def _to_text(value):
+    if not isinstance(value, (str, int, float, decimal.Decimal)):
+        raise ValueError("Not a valid string.")
+    value = str(value)
+    if len(value) > 255:
+        raise ValueError(
+            "Ensure this field has no more than 255 characters."
+        )
+    return value
+
+
+def _to_document(value):
+    if value is None:
+        raise ValueError("This field may not be null.")
+    return value
+
+
+# Field name -> (converter, default factory or None when required)
+#
+# A plain table of converters instead of a DRF serializer: feeds are
+# validated at tens of thousands of rows per request and the per-field
+# machinery of Serializer.run_validation costs more than the write itself.
+ROW_FIELDS = {
+    "order": (_to_id, None),
+    "location": (_to_id, None),
+    "customer": (_to_id, None),
+    "employee": (_to_id, None),
+    "created_at": (_to_datetime, None),
+    "tender": (_to_document, None),
+    "amount_money": (_to_money, None),
+    "tip_money": (_to_money, None),
+    "processing_fee_money": (_to_money, None),
+    "client_id": (_to_text, None),
+    "refunds": (_to_document, list),
+    "reference_id": (_to_text, None),
+    "product": (_to_document, None),
+}
+
+
+def validate_row(row):
+    # Return (cleaned row, None) or (None, {field: [messages]})
+    cleaned = {}
+    errors = {}
+    for name, (convert, default) in ROW_FIELDS.items():
+        if name not in row:
+            if default is None:
+                errors[name] = ["This field is required."]
+            else:
+                cleaned[name] = default()
+            continue
+        try:
+            cleaned[name] = convert(row[name])
+        except ValueError as exc:
+            errors[name] = [str(exc)]
+    if errors:
+        return None, errors
+    return cleaned, None
+
+
+PARSERS = {
+    NDJSON_MEDIA_TYPE: parse_ndjson,
+    CSV_MEDIA_TYPE: parse_csv,
+}
+
+
+def _resolve_foreign_keys(rows):
+    # Return {row key: set of existing ids} using one query per model
+    existing = {}
+    for key, model in FOREIGN_KEYS.items():
+        ids = {row[key] for _, row in rows}
+        existing[key] = set(
+            model.objects.filter(pk__in=ids).values_list("pk", flat=True)
+        )
+    return existing
+
+
+def _copy_rows(rows):
+    # Stream the rows into the table with a single COPY statement
+    fields = [
+        field
+        for field in Transaction._meta.concrete_fields
+        if not field.primary_key
+    ]
+    documents = {
+        field.name
+        for field in fields
+        if field.get_internal_type() == "JSONField"
+    }
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+    for row in rows:
+        writer.writerow(
+            [
+                json.dumps(row[field.name])
+                if field.name in documents
+                else row[field.name]
+                for field in fields
+            ]
+        )
+    buffer.seek(0)
+
+    quote = connection.ops.quote_name
+    sql = "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(
+        quote(Transaction._meta.db_table),
+        ", ".join(quote(field.column) for field in fields),
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql, buffer)
+
+
+def _create_rows(rows):
+    # Fallback for backends without COPY support
+    objs = []
+    for row in rows:
+        values = dict(row)
+        for key in FOREIGN_KEYS:
+            values[f"{key}_id"] = values.pop(key)
+        objs.append(Transaction(**values))
+    Transaction.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+
+
+def _write_batch(batch, errors, duplicates):
+    # Validate foreign keys of a batch and persist the valid, new rows
+    if not batch:
+        return 0
+
+    existing = _resolve_foreign_keys(batch)
+    valid = []
+    for number, row in batch:
+        row_errors = {
+            key: [f'Invalid pk "{row[key]}" - object does not exist.']
+            for key in FOREIGN_KEYS
+            if row[key] not in existing[key]
+        }
+        if row_errors:
+            errors.append({"row": number, "errors": row_errors})
+        else:
+            valid.append((number, row))
+
+    if not valid:
+        return 0
+
+    with transaction.atomic():
+        # Claimed with the write, so a concurrent upload of the same keys
+        # waits for this one to commit or roll back
+        keys = [
+            (number, row, idempotency.row_key(row)) for number, row in valid
+        ]
+        claimed = idempotency.claim(key for _, _, key in keys if key)
+        rows = []
+        for number, row, key in keys:
+            if key is None:
+                rows.append(row)
+            elif key in claimed:
+                # Later rows of the batch with the key are duplicates
+                claimed.discard(key)
+                rows.append(row)
+            else:
+                duplicates.append(number)
+
+        if rows:
+            if connection.vendor == "postgresql":
+                _copy_rows(rows)
+            else:
+                _create_rows(rows)
+            # Neither path sends post_save, keep the sales rollups in step
+            rollups.relocate_orders({row["order"] for row in rows})
+
+    return len(rows)
+
+
+def load_transactions(records, batch_size=BATCH_SIZE):
+    # Load (row number, row, error) records, returns (created, row numbers
+    # of duplicates, errors)
+    created = 0
+    duplicates = []
+    errors = []
+    batch = []
+
+    for number, row, error in records:
+        if error is not None:
+            errors.append({"row": number, "errors": error})
+            continue
+        cleaned, row_errors = validate_row(row)
+        if row_errors:
+            errors.append({"row": number, "errors": row_errors})
+            continue
+        batch.append((number, cleaned))
+
+        if len(batch) >= batch_size:
+            created += _write_batch(batch, errors, duplicates)
+            batch = []
+
+    created += _write_batch(batch, errors, duplicates)
+    errors.sort(key=lambda error: error["row"])
+
+    return created, duplicates, errors
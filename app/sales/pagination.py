@@ -0,0 +1,118 @@
+# Keyset pagination for append-mostly tables
+#
+# Pages are ordered newest first on (created_at, pk) and the cursor carries
+# the last row's key, so fetching page N costs the same index range scan as
+# page 1 instead of reading and discarding N * page_size rows with OFFSET.
+# Pages carry no total unless asked for with ?count=true, which is then
+# estimated on large tables (see core.pagination).
+
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from core.pagination import estimated_count
+
+
+class KeysetPagination(BasePagination):
+    # Cursor pagination on (created_at, pk), newest first
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    count_query_param = "count"
+    page_size = 100
+    max_page_size = 1000
+    invalid_cursor_message = "Invalid cursor"
+
+    def encode_cursor(self, obj):
+        key = json.dumps([obj.created_at.isoformat(), obj.pk])
+        return base64.urlsafe_b64encode(key.encode()).decode()
+
+    def decode_cursor(self, value):
+        try:
+            created_at, pk = json.loads(base64.urlsafe_b64decode(value))
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def wants_count(self, request):
+        value = request.query_params.get(self.count_query_param, "")
+        return value.lower() in ("1", "true")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by("-created_at", "-pk")
+        # Every row matching the filters, not just those after the cursor
+        self.count = (
+            estimated_count(queryset) if self.wants_count(request) else None
+        )
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            created_at, pk = self.decode_cursor(cursor)
+            # The leading bound keeps this a single index range scan
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at)
+                | Q(created_at=created_at, pk__lt=pk),
+                created_at__lte=created_at,
+            )
+
+        # One extra row tells us whether there is a next page
+        rows = list(queryset[: page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_response(self, data):
+        page = OrderedDict([("next", self.get_next_link())])
+        if self.count is not None:
+            page["count"] = self.count
+        page["results"] = data
+        return Response(page)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "count": {
+                    "type": "integer",
+                    "description": "Only with ?count=true, estimated on "
+                    "large tables",
+                },
+                "results": schema,
+            },
+        }
+
+
+class LifetimeValuePagination(CursorPagination):
+    # Cursor pagination on lifetime value, highest first
+    ordering = "-lifetime_value"
+    page_size_query_param = "page_size"
+    page_size = 100
+    max_page_size = 1000
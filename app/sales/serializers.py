@@ -0,0 +1,100 @@
+# Serializers for the sales API
+
+from rest_framework import serializers
+
+from core import rollups
+from core.models import CustomerSegment, CustomerValue, Order, Transaction
+
+
+class SalesReportQuerySerializer(serializers.Serializer):
+    # Serializer for the sales report query string
+    period = serializers.ChoiceField(choices=list(rollups.ROLLUPS_BY_PERIOD))
+    start = serializers.DateField()
+    end = serializers.DateField()
+    product = serializers.IntegerField(required=False)
+    variation = serializers.IntegerField(required=False)
+    location = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("start must not be after end.")
+        return attrs
+
+
+class SalesRollupSerializer(serializers.Serializer):
+    # Serializer for one pre-aggregated sales row
+    period_start = serializers.DateField()
+    product = serializers.IntegerField(source="product_id")
+    variation = serializers.IntegerField(source="variation_id")
+    location = serializers.IntegerField(source="location_id", allow_null=True)
+    units = serializers.IntegerField()
+    revenue_money = serializers.DecimalField(max_digits=14, decimal_places=2)
+    line_count = serializers.IntegerField()
+
+
+class SalesTotalsSerializer(serializers.Serializer):
+    # Serializer for sales totals over a report range
+    units = serializers.IntegerField()
+    revenue_money = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    # Serializer for orders
+
+    class Meta:
+        model = Order
+        exclude = ["items_normalized"]
+
+
+class TransactionSerializer(serializers.ModelSerializer):
+    # Serializer for transactions, related objects are given by id
+
+    class Meta:
+        model = Transaction
+        fields = "__all__"
+
+
+class RefreshedAtMixin(serializers.Serializer):
+    # Adds the views' refresh time, passed in as context["refreshed_at"]
+    refreshed_at = serializers.SerializerMethodField()
+
+    def get_refreshed_at(self, obj):
+        value = self.context.get("refreshed_at")
+        if value is None:
+            return None
+        return serializers.DateTimeField().to_representation(value)
+
+
+class CustomerSegmentSerializer(RefreshedAtMixin, serializers.ModelSerializer):
+    # Serializer for the totals of one RFM segment
+
+    class Meta:
+        model = CustomerSegment
+        fields = "__all__"
+
+
+class CustomerValueSerializer(RefreshedAtMixin, serializers.ModelSerializer):
+    # Serializer for a customer's lifetime value and RFM scores
+
+    class Meta:
+        model = CustomerValue
+        fields = "__all__"
+
+
+class LineItemReportQuerySerializer(serializers.Serializer):
+    # Serializer for the line item report query string
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+
+    def validate(self, attrs):
+        if attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("start must not be after end.")
+        return attrs
+
+
+class LineItemTotalsSerializer(serializers.Serializer):
+    # Serializer for the line item totals of one SKU
+    sku = serializers.CharField()
+    units = serializers.DecimalField(max_digits=18, decimal_places=3)
+    revenue_money = serializers.DecimalField(max_digits=18, decimal_places=2)
+    orders = serializers.IntegerField()
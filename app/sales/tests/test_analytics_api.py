@@ -0,0 +1,76 @@
+# Test for the sales analytics API
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.tests.factories import create_transaction
+
+
+def analytics_url(report):
+    return reverse("sales-analytics", args=[report])
+
+
+class PublicAnalyticsApiTests(TestCase):
+    # Test unauthenticated requests
+
+    def test_auth_required(self):
+        res = APIClient().get(analytics_url("revenue"))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateAnalyticsApiTests(TestCase):
+    # Test the authenticated analytics API
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        create_transaction(
+            amount_money=Decimal("10.00"), tip_money=Decimal("1.50")
+        )
+
+    def test_revenue_report(self):
+        res = self.client.get(analytics_url("revenue"), {"bucket": "day"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["report"], "revenue")
+        self.assertEqual(res.data["results"][0]["amount_money"], "10.00")
+        self.assertEqual(res.data["results"][0]["tip_money"], "1.50")
+
+    def test_tips_report(self):
+        res = self.client.get(analytics_url("tips_by_employee"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["tip_percentage"], 15.0)
+
+    def test_unknown_report(self):
+        res = self.client.get(analytics_url("churn"))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bucket_only_for_revenue(self):
+        res = self.client.get(
+            analytics_url("fees_by_location"), {"bucket": "day"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("bucket", res.data)
+
+    def test_invalid_range(self):
+        params = {"start": "2023-05-02T00:00Z", "end": "2023-05-01T00:00Z"}
+
+        res = self.client.get(analytics_url("revenue"), params)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,170 @@
+# Test for the customer lifetime value API
+
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import customer_value
+from core.models import CustomerValue
+from core.tests.budgets import QueryBudgetMixin
+from core.tests.factories import (
+    create_customer,
+    create_location,
+    create_transaction,
+)
+
+SEGMENTS_URL = reverse("sales:customer-segments")
+VALUE_URL = reverse("sales:customer-value")
+
+
+class PublicCustomerValueApiTests(TestCase):
+    # Test unauthenticated requests
+
+    def test_auth_required(self):
+        client = APIClient()
+
+        for url in [SEGMENTS_URL, VALUE_URL]:
+            res = client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateCustomerValueApiTests(QueryBudgetMixin, TestCase):
+    # Test the authenticated customer value API
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        # Customer n bought n times, most recently 5 - n days ago, so the
+        # scores of customer n are all n
+        now = timezone.now()
+        self.location = create_location()
+        self.customers = []
+        for n in range(1, 6):
+            customer = create_customer(email_address=f"c{n}@example.com")
+            for visit in range(n):
+                create_transaction(
+                    customer=customer,
+                    location=self.location,
+                    created_at=now - datetime.timedelta(days=5 - n + visit),
+                    amount_money=Decimal("10.00"),
+                    tip_money=Decimal("1.00"),
+                )
+            self.customers.append(customer)
+        customer_value.refresh()
+
+    def test_customer_value_and_scores(self):
+        value = CustomerValue.objects.get(customer=self.customers[4])
+
+        self.assertEqual(value.transaction_count, 5)
+        self.assertEqual(value.spend_money, Decimal("50.00"))
+        self.assertEqual(value.tip_money, Decimal("5.00"))
+        self.assertEqual(value.lifetime_value, Decimal("55.00"))
+        self.assertEqual(value.average_money, Decimal("11.00"))
+        self.assertEqual(
+            (
+                value.recency_score,
+                value.frequency_score,
+                value.monetary_score,
+            ),
+            (5, 5, 5),
+        )
+        self.assertEqual(value.segment, "champions")
+
+    def test_list_segments(self):
+        # Reads one precomputed row per segment, and the refresh time
+        with self.assertNumQueries(2):
+            res = self.client.get(SEGMENTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row["segment"], row["customers"]) for row in res.data],
+            [("champions", 2), ("needs_attention", 1), ("hibernating", 2)],
+        )
+        self.assertEqual(res.data[0]["lifetime_value"], "99.00")
+
+    def test_lists_within_query_budget(self):
+        with self.assertQueryBudget("sales:customer-segments"):
+            self.client.get(SEGMENTS_URL)
+        with self.assertQueryBudget("sales:customer-value"):
+            self.client.get(VALUE_URL, {"segment": "champions"})
+        with self.assertQueryBudget("sales:customer-value"):
+            self.client.get(VALUE_URL, {"page_size": 3})
+
+    def test_list_customers_in_segment(self):
+        res = self.client.get(VALUE_URL, {"segment": "champions"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row["customer"] for row in res.data["results"]],
+            [self.customers[4].pk, self.customers[3].pk],
+        )
+
+    def test_list_customers_paginated(self):
+        res = self.client.get(VALUE_URL, {"page_size": 3})
+        following = self.client.get(res.data["next"])
+
+        pages = [res.data["results"], following.data["results"]]
+        self.assertEqual([len(page) for page in pages], [3, 2])
+        values = [row["lifetime_value"] for page in pages for row in page]
+        self.assertEqual(values, ["55.00", "44.00", "33.00", "22.00", "11.00"])
+
+    def test_invalid_segment_rejected(self):
+        res = self.client.get(VALUE_URL, {"segment": "whales"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_values_change_only_on_refresh(self):
+        customer = self.customers[0]
+        create_transaction(
+            customer=customer,
+            location=self.location,
+            amount_money=Decimal("100.00"),
+        )
+        value = CustomerValue.objects.get(customer=customer)
+        self.assertEqual(value.lifetime_value, Decimal("11.00"))
+
+        call_command("refresh_customer_value", stdout=StringIO())
+
+        value = CustomerValue.objects.get(customer=customer)
+        self.assertEqual(value.lifetime_value, Decimal("111.00"))
+        self.assertEqual(value.recency_score, 5)
+
+    def test_refresh_time_kept_outside_the_rows(self):
+        before = timezone.now()
+        customer_value.refresh()
+
+        refreshed_at = customer_value.refreshed_at()
+        res = self.client.get(SEGMENTS_URL)
+
+        self.assertGreaterEqual(refreshed_at, before)
+        self.assertNotIn(
+            "refreshed_at",
+            [field.name for field in CustomerValue._meta.get_fields()],
+        )
+        self.assertEqual(
+            {parse_datetime(row["refreshed_at"]) for row in res.data},
+            {refreshed_at},
+        )
+
+    def test_blocking_refresh(self):
+        create_transaction(customer=create_customer(), location=self.location)
+        out = StringIO()
+
+        call_command("refresh_customer_value", "--blocking", stdout=out)
+
+        self.assertEqual(CustomerValue.objects.count(), 6)
+        self.assertIn("Customer value refreshed", out.getvalue())
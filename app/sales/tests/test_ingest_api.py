@@ -0,0 +1,441 @@
+# Test for the bulk transaction ingestion API
+
+import json
+import threading
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import idempotency
+from core.models import Transaction, TransactionKey
+from core.tests.factories import (
+    create_customer,
+    create_employee,
+    create_location,
+    create_order,
+)
+from sales import ingest
+
+INGEST_URL = reverse("sales:transaction-ingest")
+
+
+class PublicIngestApiTests(TestCase):
+    # Test unauthenticated ingestion requests
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.post(
+            INGEST_URL, "", content_type=ingest.NDJSON_MEDIA_TYPE
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class IngestRowsMixin:
+    # Sale parties and feed rows
+
+    def setUp(self):
+        self.order = create_order()
+        self.location = create_location()
+        self.customer = create_customer()
+        self.employee = create_employee()
+
+    def make_row(self, **params):
+        # Return a valid feed row
+        row = {
+            "order": self.order.pk,
+            "location": self.location.pk,
+            "customer": self.customer.pk,
+            "employee": self.employee.pk,
+            "created_at": "2023-05-01T12:00:00Z",
+            "tender": [{"type": "CARD"}],
+            "amount_money": "10.50",
+            "tip_money": "1.00",
+            "processing_fee_money": "0.30",
+            "client_id": "pos-1",
+            "reference_id": "ref-1",
+            "product": {"name": "Coffee"},
+        }
+        row.update(params)
+        return row
+
+
+class PrivateIngestApiTests(IngestRowsMixin, TestCase):
+    # Test authenticated ingestion requests
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def post_ndjson(self, rows, **extra):
+        body = "\n".join(json.dumps(row) for row in rows)
+        return self.client.post(
+            INGEST_URL, body, content_type=ingest.NDJSON_MEDIA_TYPE, **extra
+        )
+
+    def test_ingest_ndjson(self):
+        rows = [self.make_row(client_id=f"pos-{i}") for i in range(3)]
+
+        res = self.post_ndjson(rows)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["created"], 3)
+        self.assertEqual(res.data["errors"], [])
+        transaction = Transaction.objects.get(client_id="pos-2")
+        self.assertEqual(transaction.order, self.order)
+        self.assertEqual(transaction.amount_money, Decimal("10.50"))
+        self.assertEqual(transaction.tender, [{"type": "CARD"}])
+        self.assertEqual(transaction.refunds, [])
+
+    def test_ingest_csv(self):
+        header = list(self.make_row())
+        lines = [",".join(header)]
+        for i in range(2):
+            row = self.make_row(client_id=f"csv-{i}")
+            cells = []
+            for key in header:
+                value = row[key]
+                if key in ingest.JSON_COLUMNS:
+                    value = '"{}"'.format(json.dumps(value).replace('"', '""'))
+                cells.append(str(value))
+            lines.append(",".join(cells))
+
+        res = self.client.post(
+            INGEST_URL, "\n".join(lines), content_type=ingest.CSV_MEDIA_TYPE
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["created"], 2)
+        transaction = Transaction.objects.get(client_id="csv-1")
+        self.assertEqual(transaction.product, {"name": "Coffee"})
+
+    def test_row_errors_do_not_abort_batch(self):
+        rows = [
+            self.make_row(client_id="good-1"),
+            self.make_row(amount_money="not money"),
+            self.make_row(customer=self.customer.pk + 1000),
+            self.make_row(client_id="good-2"),
+        ]
+
+        res = self.post_ndjson(rows)
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual([e["row"] for e in res.data["errors"]], [2, 3])
+        self.assertIn("amount_money", res.data["errors"][0]["errors"])
+        self.assertIn("customer", res.data["errors"][1]["errors"])
+        self.assertEqual(Transaction.objects.count(), 2)
+
+    def test_malformed_line_reported(self):
+        body = "{not json}\n" + json.dumps(self.make_row())
+
+        res = self.client.post(
+            INGEST_URL, body, content_type=ingest.NDJSON_MEDIA_TYPE
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(res.data["errors"][0]["row"], 1)
+
+    def test_all_rows_invalid(self):
+        res = self.post_ndjson([self.make_row(order=self.order.pk + 1000)])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["created"], 0)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_unsupported_media_type(self):
+        res = self.client.post(INGEST_URL, {}, format="json")
+
+        self.assertEqual(
+            res.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        )
+
+    def test_queries_do_not_grow_with_rows(self):
+        # Foreign keys are resolved once per model, not once per row
+        rows = [self.make_row(client_id=f"pos-{i}") for i in range(50)]
+        records = ((i, row, None) for i, row in enumerate(rows, start=1))
+
+        # 4 lookups, savepoint, key claim, write, rollup check and release
+        with self.assertNumQueries(9):
+            created, duplicates, errors = ingest.load_transactions(records)
+
+        self.assertEqual(created, 50)
+        self.assertEqual(duplicates, [])
+        self.assertEqual(errors, [])
+
+    def test_retried_rows_are_duplicates(self):
+        rows = [self.make_row(client_id=f"pos-{i}") for i in range(2)]
+        self.post_ndjson(rows)
+
+        res = self.post_ndjson(rows + [self.make_row(client_id="pos-2")])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["created"], 1)
+        self.assertEqual(res.data["duplicates"], [1, 2])
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    def test_duplicates_within_upload(self):
+        rows = [
+            self.make_row(),
+            self.make_row(reference_id="ref-2"),
+            self.make_row(),
+        ]
+
+        res = self.post_ndjson(rows)
+
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual(res.data["duplicates"], [3])
+        self.assertEqual(TransactionKey.objects.count(), 2)
+
+    def test_duplicates_across_batches(self):
+        rows = [self.make_row(), self.make_row(), self.make_row()]
+        records = ((i, row, None) for i, row in enumerate(rows, start=1))
+
+        created, duplicates, errors = ingest.load_transactions(
+            records, batch_size=1
+        )
+
+        self.assertEqual(created, 1)
+        self.assertEqual(duplicates, [2, 3])
+
+    def test_rows_without_client_id_are_not_deduplicated(self):
+        rows = [self.make_row(client_id="")] * 2
+
+        res = self.post_ndjson(rows)
+
+        self.assertEqual(res.data["created"], 2)
+        self.assertFalse(TransactionKey.objects.exists())
+
+    def test_rows_without_reference_id_are_not_deduplicated(self):
+        # One client sending no reference ids keeps every transaction
+        rows = [self.make_row(reference_id="")] * 3
+
+        res = self.post_ndjson(rows)
+        retry = self.post_ndjson(rows)
+
+        self.assertEqual(res.data["created"], 3)
+        self.assertEqual(retry.data["created"], 3)
+        self.assertEqual(retry.data["duplicates"], [])
+        self.assertFalse(TransactionKey.objects.exists())
+
+    def test_idempotency_key_replays_response(self):
+        first = self.post_ndjson(
+            [self.make_row()], HTTP_IDEMPOTENCY_KEY="upload-1"
+        )
+        retry = self.post_ndjson(
+            [self.make_row()], HTTP_IDEMPOTENCY_KEY="upload-1"
+        )
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry.data["created"], 1)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertFalse(first.has_header("Idempotent-Replayed"))
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_idempotency_key_reused_for_other_body(self):
+        self.post_ndjson([self.make_row()], HTTP_IDEMPOTENCY_KEY="upload-1")
+
+        res = self.post_ndjson(
+            [self.make_row(client_id="other")],
+            HTTP_IDEMPOTENCY_KEY="upload-1",
+        )
+
+        self.assertEqual(
+            res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_idempotency_key_in_progress(self):
+        rows = [self.make_row()]
+        body = "\n".join(json.dumps(row) for row in rows).encode()
+        body_hash = idempotency.fingerprint(body)
+        idempotency.reserve(self.user, "upload-1", body_hash)
+
+        res = self.post_ndjson(rows, HTTP_IDEMPOTENCY_KEY="upload-1")
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Transaction.objects.exists())
+        # The reservation is left to the request holding it
+        self.assertIsNone(
+            idempotency.reserve(self.user, "upload-1", body_hash)["status"]
+        )
+
+    def test_failed_upload_releases_idempotency_key(self):
+        with patch.object(
+            ingest, "load_transactions", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                self.post_ndjson(
+                    [self.make_row()], HTTP_IDEMPOTENCY_KEY="upload-1"
+                )
+
+        res = self.post_ndjson(
+            [self.make_row()], HTTP_IDEMPOTENCY_KEY="upload-1"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["created"], 1)
+
+    def test_idempotency_keys_are_per_user(self):
+        self.post_ndjson([self.make_row()], HTTP_IDEMPOTENCY_KEY="upload-1")
+        self.client.force_authenticate(
+            user=get_user_model().objects.create_user(
+                email="other@example.com", password="testpass123"
+            )
+        )
+
+        res = self.post_ndjson(
+            [self.make_row(client_id="pos-2")], HTTP_IDEMPOTENCY_KEY="upload-1"
+        )
+
+        self.assertEqual(res.data["created"], 1)
+        self.assertEqual(Transaction.objects.count(), 2)
+
+
+class ConcurrentIngestTests(IngestRowsMixin, TransactionTestCase):
+    # Test simultaneous uploads of the same transactions
+
+    def load(self, rows):
+        records = ((i, row, None) for i, row in enumerate(rows, start=1))
+        return ingest.load_transactions(records)
+
+    def run_in_thread(self, target, results):
+        def run():
+            try:
+                results.append(target())
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def test_simultaneous_retries_with_idempotency_key(self):
+        # One request loads the upload, the others are told it is in
+        # progress or get its response, which is never overwritten
+        user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+        body = "\n".join(
+            json.dumps(self.make_row(client_id=f"pos-{i}")) for i in range(20)
+        )
+        barrier = threading.Barrier(4)
+        results = []
+
+        def upload():
+            client = APIClient()
+            client.force_authenticate(user=user)
+            barrier.wait(10)
+            res = client.post(
+                INGEST_URL,
+                body,
+                content_type=ingest.NDJSON_MEDIA_TYPE,
+                HTTP_IDEMPOTENCY_KEY="upload-1",
+            )
+            return res.status_code, res.data
+
+        threads = [self.run_in_thread(upload, results) for _ in range(4)]
+        for thread in threads:
+            thread.join()
+        retry = APIClient()
+        retry.force_authenticate(user=user)
+        res = retry.post(
+            INGEST_URL,
+            body,
+            content_type=ingest.NDJSON_MEDIA_TYPE,
+            HTTP_IDEMPOTENCY_KEY="upload-1",
+        )
+
+        loaded = [data for code, data in results if code == 201]
+        self.assertTrue(loaded)
+        for data in loaded:
+            self.assertEqual(data["created"], 20)
+        self.assertEqual(
+            [code for code, _ in results if code != 201],
+            [409] * (4 - len(loaded)),
+        )
+        self.assertEqual(res.data["created"], 20)
+        self.assertEqual(Transaction.objects.count(), 20)
+
+    def test_simultaneous_uploads_write_once(self):
+        rows = [self.make_row(client_id=f"pos-{i}") for i in range(20)]
+        barrier = threading.Barrier(4)
+        results = []
+
+        def upload():
+            barrier.wait(10)
+            return self.load(rows)
+
+        threads = [self.run_in_thread(upload, results) for _ in range(4)]
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(
+            sorted(created for created, _, _ in results), [0, 0, 0, 20]
+        )
+        self.assertEqual(
+            sum(len(duplicates) for _, duplicates, _ in results), 60
+        )
+        self.assertEqual(Transaction.objects.count(), 20)
+
+    def upload_behind_open_write(self, commit):
+        # A second upload of rows while the first is written but not
+        # committed, returns the second's result
+        rows = [self.make_row(client_id=f"pos-{i}") for i in range(3)]
+        written = threading.Event()
+        release = threading.Event()
+        first, second = [], []
+
+        def slow_upload():
+            try:
+                with transaction.atomic():
+                    result = self.load(rows)
+                    written.set()
+                    release.wait(10)
+                    if not commit:
+                        raise RuntimeError
+                return result
+            except RuntimeError:
+                return None
+
+        slow = self.run_in_thread(slow_upload, first)
+        written.wait(10)
+        retry = self.run_in_thread(lambda: self.load(rows), second)
+        # The retry waits on the uncommitted keys
+        retry.join(0.5)
+        waited = retry.is_alive()
+        release.set()
+        slow.join()
+        retry.join()
+        self.assertTrue(waited)
+        return second[0]
+
+    def test_retry_waits_for_first_commit(self):
+        created, duplicates, errors = self.upload_behind_open_write(True)
+
+        self.assertEqual(created, 0)
+        self.assertEqual(duplicates, [1, 2, 3])
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    def test_retry_writes_after_first_rolls_back(self):
+        created, duplicates, errors = self.upload_behind_open_write(False)
+
+        self.assertEqual(created, 3)
+        self.assertEqual(duplicates, [])
+        self.assertEqual(Transaction.objects.count(), 3)
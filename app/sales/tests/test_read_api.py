@@ -0,0 +1,174 @@
+# Test for the order and transaction read API
+
+import datetime
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.tests.budgets import QueryBudgetMixin
+from core.tests.factories import (
+    create_customer,
+    create_employee,
+    create_location,
+    create_order,
+    create_transaction,
+)
+
+ORDERS_URL = reverse("sales:order-list")
+ORDERS_EXPORT_URL = reverse("sales:order-export")
+TRANSACTIONS_URL = reverse("sales:transaction-list")
+TRANSACTIONS_EXPORT_URL = reverse("sales:transaction-export")
+
+START = datetime.datetime(2023, 5, 1, tzinfo=datetime.timezone.utc)
+
+
+class PublicReadApiTests(TestCase):
+    # Test unauthenticated read requests
+
+    def test_auth_required(self):
+        client = APIClient()
+
+        for url in [ORDERS_URL, ORDERS_EXPORT_URL, TRANSACTIONS_URL]:
+            res = client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateReadApiTests(QueryBudgetMixin, TestCase):
+    # Test authenticated read requests
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        # Pairs share a timestamp so ties are broken by pk
+        self.orders = [
+            create_order(created_at=START + datetime.timedelta(hours=i // 2))
+            for i in range(7)
+        ]
+
+    def walk(self, url, params):
+        # Follow next links and return every page's ids
+        pages = []
+        while url:
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append([row["order_id"] for row in res.data["results"]])
+            url, params = res.data["next"], None
+        return pages
+
+    def test_list_orders_in_pages(self):
+        pages = self.walk(ORDERS_URL, {"page_size": 3})
+
+        expected = [
+            order.pk
+            for order in sorted(
+                self.orders,
+                key=lambda order: (order.created_at, order.pk),
+                reverse=True,
+            )
+        ]
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_deep_pages_do_not_use_offset(self):
+        first = self.client.get(ORDERS_URL, {"page_size": 2})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first.data["next"])
+
+        self.assertFalse(
+            any("OFFSET" in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_pages_within_query_budget(self):
+        for order in self.orders:
+            create_transaction(order=order)
+
+        with self.assertQueryBudget("sales:order-list"):
+            self.client.get(ORDERS_URL)
+        with self.assertQueryBudget("sales:transaction-list"):
+            self.client.get(TRANSACTIONS_URL)
+
+    def test_count_on_request(self):
+        params = {"page_size": 2, "created_after": "2023-05-01T01:00Z"}
+        first = self.client.get(ORDERS_URL, params)
+        counted = self.client.get(ORDERS_URL, {**params, "count": "true"})
+
+        self.assertNotIn("count", first.data)
+        # Every matching order, not just the page
+        self.assertEqual(counted.data["count"], 5)
+        self.assertEqual(len(counted.data["results"]), 2)
+
+    def test_invalid_cursor(self):
+        res = self.client.get(ORDERS_URL, {"cursor": "garbage"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_created_range_filter(self):
+        hour = datetime.timedelta(hours=1)
+        params = {
+            "created_after": (START + hour).isoformat(),
+            "created_before": (START + 2 * hour).isoformat(),
+        }
+
+        res = self.client.get(ORDERS_URL, params)
+
+        self.assertEqual(
+            sorted(row["order_id"] for row in res.data["results"]),
+            [self.orders[2].pk, self.orders[3].pk],
+        )
+
+    def test_invalid_created_range(self):
+        res = self.client.get(ORDERS_URL, {"created_after": "yesterday"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_orders_streams_ndjson(self):
+        res = self.client.get(ORDERS_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        rows = [
+            json.loads(line)
+            for line in b"".join(res.streaming_content).splitlines()
+        ]
+        self.assertEqual(len(rows), len(self.orders))
+        self.assertEqual(rows[0]["order_id"], self.orders[-1].pk)
+
+    def test_list_and_export_transactions(self):
+        location = create_location()
+        customer = create_customer()
+        employee = create_employee()
+        for order in self.orders[:3]:
+            create_transaction(
+                order=order,
+                location=location,
+                customer=customer,
+                employee=employee,
+                created_at=order.created_at,
+            )
+
+        res = self.client.get(TRANSACTIONS_URL, {"page_size": 2})
+
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNotNone(res.data["next"])
+        self.assertEqual(res.data["results"][0]["location"], location.pk)
+
+        res = self.client.get(TRANSACTIONS_EXPORT_URL)
+
+        lines = b"".join(res.streaming_content).splitlines()
+        self.assertEqual(len(lines), 3)
@@ -0,0 +1,155 @@
+# Test for the sales report API
+
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.tests.budgets import QueryBudgetMixin
+from core.tests.factories import (
+    create_item_sold,
+    create_order,
+    create_variation,
+)
+
+REPORT_URL = reverse("sales:report")
+LINE_ITEM_REPORT_URL = reverse("sales:line-item-report")
+
+SOLD_AT = datetime.datetime(2023, 5, 3, 12, tzinfo=datetime.timezone.utc)
+
+
+class PrivateReportApiTests(QueryBudgetMixin, TestCase):
+    # Test the authenticated sales report
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.variation = create_variation(price_money=Decimal("2.00"))
+        other = create_variation(price_money=Decimal("5.00"))
+        order = create_order(created_at=SOLD_AT)
+        create_item_sold(variation=self.variation, order=order, quantity=3)
+        create_item_sold(variation=other, order=order, quantity=1)
+
+    def test_daily_report(self):
+        params = {"period": "day", "start": "2023-05-01", "end": "2023-05-31"}
+
+        res = self.client.get(REPORT_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertEqual(res.data["totals"]["units"], 4)
+        self.assertEqual(res.data["totals"]["revenue_money"], "11.00")
+
+    def test_report_within_query_budget(self):
+        for day in range(1, 6):
+            create_item_sold(
+                variation=create_variation(),
+                order=create_order(created_at=SOLD_AT.replace(day=day)),
+            )
+        params = {"period": "day", "start": "2023-05-01", "end": "2023-05-31"}
+
+        with self.assertQueryBudget("sales:report"):
+            res = self.client.get(REPORT_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_report_filtered_by_variation(self):
+        params = {
+            "period": "month",
+            "start": "2023-05-01",
+            "end": "2023-05-01",
+            "variation": self.variation.pk,
+        }
+
+        res = self.client.get(REPORT_URL, params)
+
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["units"], 3)
+        self.assertEqual(res.data["totals"]["revenue_money"], "6.00")
+
+    def test_report_reads_rollups_only(self):
+        params = {"period": "week", "start": "2023-01-01", "end": "2023-12-31"}
+
+        # One query for the rows and one for the totals
+        with self.assertNumQueries(2):
+            self.client.get(REPORT_URL, params)
+
+    def test_invalid_period(self):
+        params = {"period": "year", "start": "2023-01-01", "end": "2023-12-31"}
+
+        res = self.client.get(REPORT_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PrivateLineItemReportApiTests(QueryBudgetMixin, TestCase):
+    # Test the authenticated line item report
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        line_items = [
+            {"sku": "COF", "quantity": "2", "total_money": "6.00"},
+            {"sku": "BAG", "quantity": "1", "total_money": "2.50"},
+        ]
+        for day in (3, 4):
+            create_order(
+                created_at=SOLD_AT.replace(day=day), line_items=line_items
+            )
+        # Outside the range
+        create_order(
+            created_at=SOLD_AT.replace(month=6),
+            line_items=[{"sku": "BAG", "quantity": "5"}],
+        )
+        self.params = {
+            "start": "2023-05-01T00:00:00Z",
+            "end": "2023-06-01T00:00:00Z",
+        }
+
+    def test_totals_per_sku(self):
+        res = self.client.get(LINE_ITEM_REPORT_URL, self.params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"],
+            [
+                {
+                    "sku": "COF",
+                    "units": "4.000",
+                    "revenue_money": "12.00",
+                    "orders": 2,
+                },
+                {
+                    "sku": "BAG",
+                    "units": "2.000",
+                    "revenue_money": "5.00",
+                    "orders": 2,
+                },
+            ],
+        )
+
+    def test_line_item_report_within_query_budget(self):
+        with self.assertQueryBudget("sales:line-item-report"):
+            res = self.client.get(LINE_ITEM_REPORT_URL, self.params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_start_after_end(self):
+        params = {"start": self.params["end"], "end": self.params["start"]}
+
+        res = self.client.get(LINE_ITEM_REPORT_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
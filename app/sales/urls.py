@@ -0,0 +1,46 @@
+# URL Mappings for Sales API
+
+from django.urls import path
+from sales import views
+
+app_name = "sales"
+
+urlpatterns = [
+    path("orders/", views.orderListView.as_view(), name="order-list"),
+    path(
+        "orders/export/",
+        views.orderExportView.as_view(),
+        name="order-export",
+    ),
+    path(
+        "transactions/",
+        views.transactionListView.as_view(),
+        name="transaction-list",
+    ),
+    path(
+        "transactions/export/",
+        views.transactionExportView.as_view(),
+        name="transaction-export",
+    ),
+    path(
+        "transactions/ingest/",
+        views.transactionIngestView.as_view(),
+        name="transaction-ingest",
+    ),
+    path("reports/", views.salesReportView.as_view(), name="report"),
+    path(
+        "reports/line-items/",
+        views.lineItemReportView.as_view(),
+        name="line-item-report",
+    ),
+    path(
+        "customers/segments/",
+        views.customerSegmentListView.as_view(),
+        name="customer-segments",
+    ),
+    path(
+        "customers/value/",
+        views.customerValueListView.as_view(),
+        name="customer-value",
+    ),
+]
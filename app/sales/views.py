@@ -0,0 +1,268 @@
+# Views for the sales API
+
+import io
+
+from django.http import StreamingHttpResponse
+from rest_framework import (
+    authentication,
+    exceptions,
+    generics,
+    permissions,
+    serializers,
+    status,
+)
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.views import APIView
+
+from core import customer_value, idempotency, order_items, rollups
+from core.models import CustomerSegment, CustomerValue, Order, Transaction
+from sales import ingest
+from sales.pagination import KeysetPagination, LifetimeValuePagination
+from sales.serializers import (
+    CustomerSegmentSerializer,
+    CustomerValueSerializer,
+    LineItemReportQuerySerializer,
+    LineItemTotalsSerializer,
+    OrderSerializer,
+    SalesReportQuerySerializer,
+    SalesRollupSerializer,
+    SalesTotalsSerializer,
+    TransactionSerializer,
+)
+
+
+class transactionIngestView(APIView):
+    # Bulk load transactions from an NDJSON or CSV upload. Rows already
+    # written (same client_id and reference_id) are reported back as
+    # duplicates; a retry sent with the Idempotency-Key header of an
+    # earlier upload gets its response back
+    authentication_classes = [authentication.TokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        media_type = request.content_type.split(";")[0].strip()
+        parse = ingest.PARSERS.get(media_type)
+        if parse is None:
+            raise exceptions.UnsupportedMediaType(media_type)
+
+        key = request.headers.get(idempotency.HEADER)
+        if not key:
+            response_status, data = self.load(parse(request.stream))
+            return Response(data, status=response_status)
+
+        # Buffered, the body hash is needed before loading it
+        body = request.body
+        body_hash = idempotency.fingerprint(body)
+        entry = idempotency.reserve(request.user, key, body_hash)
+        if entry is not None:
+            return self.replay(entry, body_hash)
+        try:
+            response_status, data = self.load(parse(io.BytesIO(body)))
+        except BaseException:
+            idempotency.release(request.user, key)
+            raise
+        idempotency.complete(
+            request.user, key, body_hash, response_status, data
+        )
+        return Response(data, status=response_status)
+
+    def load(self, records):
+        created, duplicates, errors = ingest.load_transactions(records)
+
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+
+        data = {"created": created, "duplicates": duplicates, "errors": errors}
+        return response_status, data
+
+    def replay(self, entry, body_hash):
+        # Response to a request whose key was reserved by an earlier one
+        if entry["fingerprint"] != body_hash:
+            return Response(
+                {
+                    "detail": f"{idempotency.HEADER} was already used for "
+                    "a different upload."
+                },
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        if entry["status"] is None:
+            return Response(
+                {
+                    "detail": f"An upload with this {idempotency.HEADER} "
+                    "is in progress."
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(
+            entry["data"],
+            status=entry["status"],
+            headers={idempotency.REPLAYED_HEADER: "true"},
+        )
+
+
+class salesReportView(APIView):
+    # Revenue and units sold read from the pre-aggregated rollups
+    authentication_classes = [authentication.TokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = SalesReportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = dict(query.validated_data)
+
+        period = params.pop("period")
+        start = params.pop("start")
+        end = params.pop("end")
+        filters = {f"{key}_id": value for key, value in params.items()}
+
+        rows = (
+            rollups.ROLLUPS_BY_PERIOD[period]
+            .objects.filter(
+                period_start__gte=start, period_start__lte=end, **filters
+            )
+            .order_by("period_start", "product_id", "variation_id")
+        )
+        totals = rollups.sales_totals(period, start, end, **filters)
+
+        return Response(
+            {
+                "totals": SalesTotalsSerializer(totals).data,
+                "results": SalesRollupSerializer(rows, many=True).data,
+            }
+        )
+
+
+class lineItemReportView(APIView):
+    # Units, revenue and orders per SKU for orders created in a range,
+    # aggregated in SQL over the OrderLineItem rows. Orders not yet
+    # normalized (see core.order_items) are not counted
+    authentication_classes = [authentication.TokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = LineItemReportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        totals = order_items.line_item_totals(
+            order__created_at__gte=query.validated_data["start"],
+            order__created_at__lt=query.validated_data["end"],
+        )
+
+        return Response(
+            {"results": LineItemTotalsSerializer(totals, many=True).data}
+        )
+
+
+class CreatedRangeMixin:
+    # Filter the queryset with ?created_after= and ?created_before=
+    authentication_classes = [authentication.TokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    model = None
+
+    def get_queryset(self):
+        queryset = self.model.objects.all()
+        field = serializers.DateTimeField()
+        bounds = {
+            "created_after": "created_at__gte",
+            "created_before": "created_at__lt",
+        }
+        for param, lookup in bounds.items():
+            value = self.request.query_params.get(param)
+            if value:
+                try:
+                    value = field.to_internal_value(value)
+                except serializers.ValidationError as exc:
+                    raise serializers.ValidationError({param: exc.detail})
+                queryset = queryset.filter(**{lookup: value})
+        return queryset
+
+
+class ExportView(CreatedRangeMixin, APIView):
+    # Stream every matching row as NDJSON through a server-side cursor
+    serializer_class = None
+    chunk_size = 2000
+
+    def get(self, request):
+        queryset = self.get_queryset().order_by("-created_at", "-pk")
+        rows = queryset.iterator(chunk_size=self.chunk_size)
+        response = StreamingHttpResponse(
+            self.stream(rows), content_type=ingest.NDJSON_MEDIA_TYPE
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{self.model._meta.model_name}s.ndjson"'
+        )
+        return response
+
+    def stream(self, rows):
+        # One serializer for all rows keeps memory flat
+        serializer = self.serializer_class()
+        encoder = JSONEncoder()
+        for row in rows:
+            yield encoder.encode(serializer.to_representation(row)) + "\n"
+
+
+class orderListView(CreatedRangeMixin, generics.ListAPIView):
+    # List orders newest first, paginated by cursor
+    model = Order
+    serializer_class = OrderSerializer
+    pagination_class = KeysetPagination
+
+
+class orderExportView(ExportView):
+    # Export orders as NDJSON
+    model = Order
+    serializer_class = OrderSerializer
+
+
+class transactionListView(CreatedRangeMixin, generics.ListAPIView):
+    # List transactions newest first, paginated by cursor
+    model = Transaction
+    serializer_class = TransactionSerializer
+    pagination_class = KeysetPagination
+
+
+class transactionExportView(ExportView):
+    # Export transactions as NDJSON
+    model = Transaction
+    serializer_class = TransactionSerializer
+
+
+class CustomerValueContextMixin:
+    # Passes the customer value views' refresh time to the serializer
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["refreshed_at"] = customer_value.refreshed_at()
+        return context
+
+
+class customerSegmentListView(CustomerValueContextMixin, generics.ListAPIView):
+    # Customer count and value per RFM segment, precomputed
+    authentication_classes = [authentication.TokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = CustomerSegmentSerializer
+    queryset = CustomerSegment.objects.order_by("-lifetime_value")
+
+
+class customerValueListView(CustomerValueContextMixin, generics.ListAPIView):
+    # Customers by lifetime value, optionally in one ?segment=
+    authentication_classes = [authentication.TokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = CustomerValueSerializer
+    pagination_class = LifetimeValuePagination
+
+    def get_queryset(self):
+        queryset = CustomerValue.objects.all()
+        segment = self.request.query_params.get("segment")
+        if segment:
+            if segment not in customer_value.SEGMENTS:
+                raise serializers.ValidationError(
+                    {"segment": f"Must be one of {customer_value.SEGMENTS}."}
+                )
+            queryset = queryset.filter(segment=segment)
+        return queryset
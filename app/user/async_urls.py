@@ -0,0 +1,12 @@
+# URL Mappings for the async User API, see app/asgi_urls.py
+
+from django.urls import path
+from user import views
+
+app_name = "user"
+
+urlpatterns = [
+    path("create/", views.createUserAsyncView, name="create"),
+    path("token/", views.createTokenAsyncView, name="token"),
+    path("me/", views.manageUserAsyncView, name="me"),
+]
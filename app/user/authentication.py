@@ -0,0 +1,71 @@
+# Token authentication backed by the Django cache
+#
+# DRF's TokenAuthentication joins Token and User on every request. Here the
+# authenticated user is cached under a hash of the token key for a short
+# TTL, so repeat requests authenticate without touching the database.
+# Entries are dropped when the token is deleted or the user is saved, and
+# again once that commits (see user.signals), the TTL only bounds how long
+# a missed invalidation lasts.
+#
+# Cached users include their password hash, so the cache backend must be
+# as private as the database.
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+DEFAULTS = {
+    "CACHE_ALIAS": "default",
+    "KEY_PREFIX": "auth-token",
+    "TIMEOUT": 60,
+}
+
+# Hit/miss counters for this process
+stats = {"hits": 0, "misses": 0}
+
+
+def _config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "TOKEN_AUTH_CACHE", {}))
+    return config
+
+
+def cache_key(key):
+    # Raw token keys never appear in the cache
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f"{_config()['KEY_PREFIX']}:{digest}"
+
+
+def invalidate_tokens(*keys):
+    # Drop the cached users of the given token keys
+    caches[_config()["CACHE_ALIAS"]].delete_many(
+        [cache_key(key) for key in keys]
+    )
+
+
+def user_token_keys(user):
+    # Keys of every token belonging to user
+    return list(Token.objects.filter(user=user).values_list("key", flat=True))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    # TokenAuthentication that caches the authenticated user
+
+    def authenticate_credentials(self, key):
+        config = _config()
+        cache = caches[config["CACHE_ALIAS"]]
+        user = cache.get(cache_key(key))
+        if user is not None:
+            stats["hits"] += 1
+            # Unsaved, only carries the key for request.auth
+            return user, Token(key=key, user=user)
+
+        stats["misses"] += 1
+        # Raises AuthenticationFailed for unknown keys and inactive users,
+        # those are not cached
+        user, token = super().authenticate_credentials(key)
+        cache.set(cache_key(key), user, config["TIMEOUT"])
+        return user, token
@@ -0,0 +1,25 @@
+# Password hashers with their cost taken from settings
+#
+# The algorithm name is unchanged, so existing pbkdf2_sha256 hashes keep
+# verifying. Django's check_password() flags hashes made with a different
+# iteration count (or a different preferred hasher) for an update, and
+# ModelBackend re-hashes them on the next successful login.
+#
+# During token logins the hashing itself runs in user.login's pool.
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    # PBKDF2-SHA256 using settings.PASSWORD_HASH_ITERATIONS
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
+
+    def encode(self, password, salt, iterations=None):
+        # verify() and make_password() both hash through here
+        from user import login
+
+        return login.run_hasher(super().encode, password, salt, iterations)
@@ -0,0 +1,85 @@
+# Token logins, with password hashing in a bounded pool
+#
+# Password hashing is deliberately slow, so a burst of logins can saturate
+# the CPUs and starve every other request. Token logins go through
+# django.contrib.auth.authenticate() as any login does, but the hashes it
+# computes are handed to a fixed pool of LOGIN_WORKERS threads (see
+# user.hashers), hashlib releases the GIL so they use one core each. At
+# most LOGIN_QUEUE_SIZE more logins may wait for a worker; beyond that
+# logins fail fast with a 503 instead of piling up. Authentication
+# backends, signals and the rehashing of stale hashes run on the calling
+# thread as usual.
+#
+# The pool only caps how many hashes run at once. The calling thread waits
+# for its hash, so under WSGI a login still holds its request thread (or
+# worker process) for the whole hash; it frees none of them.
+#
+# The async token view served under ASGI awaits aauthenticate_user(), which
+# runs authenticate() in the async views' database pool.
+
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.asyncviews import database_sync_to_async
+
+
+class LoginBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many logins in progress, try again shortly."
+    default_code = "login_busy"
+
+
+class LoginPool:
+    # Thread pool refusing work once workers + queue_size are in use
+
+    def __init__(self, workers, queue_size):
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="login"
+        )
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise LoginBusy()
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+
+pool = LoginPool(settings.LOGIN_WORKERS, settings.LOGIN_QUEUE_SIZE)
+
+# Set while a token login authenticates
+_pooled = contextvars.ContextVar("pooled_hashing", default=False)
+
+
+def run_hasher(func, *args):
+    # Run a hasher call in the pool during token logins, inline otherwise
+    if not _pooled.get():
+        return func(*args)
+    return pool.submit(func, *args).result()
+
+
+def authenticate_user(request, email, password):
+    # Return the active user matching the credentials, or None
+    pooled = _pooled.set(True)
+    try:
+        return authenticate(request, email=email, password=password)
+    finally:
+        _pooled.reset(pooled)
+
+
+async def aauthenticate_user(request, email, password):
+    # authenticate_user() for async callers
+    return await database_sync_to_async(authenticate_user)(
+        request, email, password
+    )
@@ -1,13 +1,14 @@
 # Serializers for the user API view
 
-from django.contrib.auth import (
-    get_user_model,
-    authenticate,
-)
-from django.utils.translation import gettext as _
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
 
 from rest_framework import serializers
 
+from user import login
+
+INVALID_CREDENTIALS = _("Unable ot authenticate with provided credentials.")
+
 
 class UserSerializer(serializers.ModelSerializer):
     # Serializer for the user object
@@ -24,37 +25,40 @@ class UserSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         # Update and return user
+        # Saved once by super().update, whose post_save also drops the
+        # user's cached token authentication (see user.signals)
         password = validated_data.pop("password", None)
-        user = super().update(instance, validated_data)
-
         if password:
-            user.set_password(password)
-            user.save()
+            instance.set_password(password)
 
-        return user
+        return super().update(instance, validated_data)
 
 
-class AuthTokenSerializer(serializers.Serializer):
-    # Serializer for the user auth token
+class CredentialsSerializer(serializers.Serializer):
+    # Serializer for login credentials
     email = serializers.EmailField()
     password = serializers.CharField(
         style={"input_type": "password"},
         trim_whitespace=False,
     )
 
+
+class AuthTokenSerializer(CredentialsSerializer):
+    # Serializer for the user auth token
+
     def validate(self, attrs):
         # Validate and auth user
 
         email = attrs.get("email")
         password = attrs.get("password")
-        user = authenticate(
-            request=self.context.get("request"),
-            username=email,
-            password=password,
+        # Hashing runs in the login pool, see user.login
+        user = login.authenticate_user(
+            self.context.get("request"), email, password
         )
         if not user:
-            msg = _("Unable ot authenticate with provided credentials.")
-            raise serializers.ValidationError(msg, code="authorization")
+            raise serializers.ValidationError(
+                INVALID_CREDENTIALS, code="authorization"
+            )
 
         attrs["user"] = user
         return attrs
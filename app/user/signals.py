@@ -0,0 +1,30 @@
+# Signal handlers keeping the token authentication cache in sync
+
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from user.authentication import invalidate_tokens, user_token_keys
+
+
+def invalidate_on_commit(keys):
+    # Invalidate now and again on commit: a request between the write and
+    # the commit could otherwise cache the old row for the whole TTL
+    invalidate_tokens(*keys)
+    transaction.on_commit(partial(invalidate_tokens, *keys))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_on_commit([instance.key])
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_saved_user(sender, instance, created, **kwargs):
+    # Password, is_active or profile changes must not be served stale
+    if not created:
+        invalidate_on_commit(user_token_keys(instance))
@@ -0,0 +1,103 @@
+# Test for the async user API served under ASGI
+#
+# The async views run ORM work in their own thread pool, whose connections
+# cannot see a TestCase transaction, so these tests commit their data.
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from user import login
+
+
+@override_settings(ROOT_URLCONF="app.asgi_urls")
+class AsyncUserApiTests(TransactionTestCase):
+    # Test the async user views
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123", name="Test"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth = {"authorization": f"Token {self.token.key}"}
+
+    async def test_create_user(self):
+        res = await self.async_client.post(
+            reverse("user:create"),
+            {"email": "new@example.com", "password": "newpass1", "name": "N"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.json(), {"email": "new@example.com", "name": "N"})
+
+    async def test_create_user_with_email_exists_error(self):
+        res = await self.async_client.post(
+            reverse("user:create"),
+            {"email": "test@example.com", "password": "testpass123"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("email", res.json())
+
+    async def test_create_token(self):
+        res = await self.async_client.post(
+            reverse("user:token"),
+            {"email": "test@example.com", "password": "testpass123"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), {"token": self.token.key})
+
+    async def test_create_token_bad_credentials(self):
+        res = await self.async_client.post(
+            reverse("user:token"),
+            {"email": "test@example.com", "password": "wrong"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn("token", res.json())
+
+    async def test_async_authenticate(self):
+        user = await login.aauthenticate_user(
+            None, "test@example.com", "testpass123"
+        )
+
+        self.assertEqual(user, self.user)
+
+    async def test_me_requires_token(self):
+        res = await self.async_client.get(reverse("user:me"))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res["WWW-Authenticate"], "Token")
+
+    async def test_get_and_update_me(self):
+        res = await self.async_client.get(reverse("user:me"), **self.auth)
+
+        self.assertEqual(
+            res.json(), {"email": "test@example.com", "name": "Test"}
+        )
+
+        res = await self.async_client.patch(
+            reverse("user:me"),
+            {"name": "Updated"},
+            content_type="application/json",
+            **self.auth,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = await self.async_client.get(reverse("user:me"), **self.auth)
+        self.assertEqual(res.json()["name"], "Updated")
+
+    async def test_post_me_not_allowed(self):
+        res = await self.async_client.post(reverse("user:me"), **self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
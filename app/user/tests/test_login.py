@@ -0,0 +1,126 @@
+# Test token logins hash in the login pool and upgrade stale hashes
+
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model, user_login_failed
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, identify_hasher
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user import login
+
+TOKEN_URL = reverse("user:token")
+
+
+class RejectingBackend:
+    # Authentication backend refusing every login
+
+    def authenticate(self, request, **credentials):
+        return None
+
+
+class LoginTests(TestCase):
+    # Test the login pool and transparent re-hashing
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.payload = {"email": "test@example.com", "password": "testpass123"}
+
+    def iterations(self):
+        self.user.refresh_from_db()
+        return identify_hasher(self.user.password).decode(
+            self.user.password
+        )["iterations"]
+
+    def test_json_login(self):
+        res = self.client.post(TOKEN_URL, self.payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("token", res.data)
+
+    def test_inactive_user_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_changed_cost_rehashes_on_login(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=1000):
+            res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.iterations(), 1000)
+        self.assertTrue(self.user.check_password("testpass123"))
+
+    def test_failed_login_does_not_rehash(self):
+        before = self.iterations()
+
+        with override_settings(PASSWORD_HASH_ITERATIONS=1000):
+            self.client.post(TOKEN_URL, {**self.payload, "password": "bad"})
+
+        self.assertEqual(self.iterations(), before)
+
+    def test_hashing_runs_in_the_pool(self):
+        threads = []
+        encode = PBKDF2PasswordHasher.encode
+
+        def record(*args):
+            threads.append(threading.current_thread().name)
+            return encode(*args)
+
+        with mock.patch.object(PBKDF2PasswordHasher, "encode", record):
+            self.client.post(TOKEN_URL, self.payload)
+            # Other hashing stays inline
+            self.user.set_password("newpass123")
+
+        self.assertEqual(len(threads), 2)
+        self.assertTrue(threads[0].startswith("login"))
+        self.assertFalse(threads[1].startswith("login"))
+
+    def test_authentication_backends_are_used(self):
+        with override_settings(
+            AUTHENTICATION_BACKENDS=["user.tests.test_login.RejectingBackend"]
+        ):
+            res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_failed_login_signal(self):
+        senders = []
+
+        def receiver(sender, credentials, **kwargs):
+            senders.append((sender, credentials["email"]))
+
+        user_login_failed.connect(receiver)
+        try:
+            self.client.post(TOKEN_URL, {**self.payload, "password": "bad"})
+        finally:
+            user_login_failed.disconnect(receiver)
+
+        self.assertEqual(
+            senders, [("django.contrib.auth", "test@example.com")]
+        )
+
+    def test_full_pool_fails_fast(self):
+        busy = threading.Event()
+        full = login.LoginPool(workers=1, queue_size=0)
+        full.submit(busy.wait)
+
+        try:
+            with mock.patch.object(login, "pool", full):
+                res = self.client.post(TOKEN_URL, self.payload)
+        finally:
+            busy.set()
+
+        self.assertEqual(
+            res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
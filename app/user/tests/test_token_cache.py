@@ -0,0 +1,96 @@
+# Test the cached token authentication
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import cache_key, stats
+
+ME_URL = reverse("user:me")
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    # Test token lookups are cached and invalidated
+
+    def setUp(self):
+        cache.clear()
+        stats.update(hits=0, misses=0)
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123", name="Test"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_repeat_requests_skip_the_database(self):
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(stats, {"hits": 1, "misses": 1})
+
+    def test_invalid_token_is_not_cached(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+
+        for _ in range(2):
+            res = self.client.get(ME_URL)
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.assertEqual(stats, {"hits": 0, "misses": 2})
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_reloaded_before_commit_is_dropped_on_commit(self):
+        self.client.get(ME_URL)
+        key = cache_key(self.token.key)
+        stale = cache.get(key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+            # A concurrent request caching the row before the commit
+            cache.set(key, stale)
+
+        self.assertIsNone(cache.get(key))
+
+    def test_token_reloaded_before_commit_is_dropped_on_commit(self):
+        self.client.get(ME_URL)
+        key = cache_key(self.token.key)
+        stale = cache.get(key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+            cache.set(key, stale)
+
+        self.assertIsNone(cache.get(key))
+
+    def test_profile_update_is_not_served_stale(self):
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {"name": "Updated", "password": "newpass1"})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data["name"], "Updated")
+        self.assertEqual(stats["misses"], 2)
@@ -7,6 +7,8 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.tests.budgets import QueryBudgetMixin
+
 # Reverse() allows us to get the url of the view we pass as a param
 CREATE_USER_URL = reverse("user:create")
 
@@ -25,7 +27,7 @@ def create_user(**params):
 # Public Tests (Auth not required)
 
 
-class PublicUserApiTests(TestCase):
+class PublicUserApiTests(QueryBudgetMixin, TestCase):
     # Test the public features of the user API
     def setUp(self):
         # Establishes a client to make requests
@@ -98,6 +100,17 @@ class PublicUserApiTests(TestCase):
         self.assertIn("token", res.data)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_create_user_and_token_within_query_budget(self):
+        # Test signing up and logging in stay within their query budgets
+        payload = {"email": "test@example.com", "password": "testpass123"}
+
+        with self.assertQueryBudget("user:create"):
+            self.client.post(CREATE_USER_URL, {**payload, "name": "Test"})
+        with self.assertQueryBudget("user:token"):
+            res = self.client.post(TOKEN_URL, payload)
+
+        self.assertIn("token", res.data)
+
     def test_error_if_bad_credentials(self):
         user_details = {
             "name": "Test Name",
@@ -132,7 +145,7 @@ class PublicUserApiTests(TestCase):
 
 
 # Private Tests (Auth Req.)
-class PrivateUserApiTests(TestCase):
+class PrivateUserApiTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         self.user = create_user(
             email="test@example.com", password="testpass234", name="Test Name"
@@ -169,3 +182,12 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.name, payload["name"])
         self.assertTrue(self.user.check_password(payload["password"]))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_profile_within_query_budget(self):
+        # Test reading and updating the profile stay within the budget
+        with self.assertQueryBudget("user:me"):
+            self.client.get(ME_URL)
+        with self.assertQueryBudget("user:me"):
+            res = self.client.patch(ME_URL, {"name": "Updated name"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
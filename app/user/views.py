@@ -1,11 +1,42 @@
 # Views for the user API
 
-from rest_framework import generics, authentication, permissions
+from django.http import JsonResponse
+from rest_framework import generics, permissions, status
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
+from core.asyncviews import async_api_view, database_sync_to_async, read_data
+from user.authentication import CachedTokenAuthentication
+from user.serializers import AuthTokenSerializer, UserSerializer
 
-from user.serializers import UserSerializer, AuthTokenSerializer
+
+# The work of each view, shared by the DRF views and their async versions
+
+
+def create_user(data):
+    serializer = UserSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+    return serializer.data
+
+
+def obtain_token(request, data):
+    # Hashing runs in the login pool, see user.login
+    serializer = AuthTokenSerializer(data=data, context={"request": request})
+    serializer.is_valid(raise_exception=True)
+    token, _ = Token.objects.get_or_create(
+        user=serializer.validated_data["user"]
+    )
+    return {"token": token.key}
+
+
+def update_user(user, data, partial):
+    serializer = UserSerializer(user, data=data, partial=partial)
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+    return serializer.data
 
 
 class createUserView(generics.CreateAPIView):
@@ -13,6 +44,11 @@ class createUserView(generics.CreateAPIView):
 
     serializer_class = UserSerializer
 
+    def create(self, request, *args, **kwargs):
+        return Response(
+            create_user(request.data), status=status.HTTP_201_CREATED
+        )
+
 
 class createTokenView(ObtainAuthToken):
     # Create new auth token fro user
@@ -20,13 +56,54 @@ class createTokenView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     render_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
+    def post(self, request, *args, **kwargs):
+        return Response(obtain_token(request, request.data))
+
 
 class manageUserView(generics.RetrieveUpdateAPIView):
     # Manage the auth user
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         # Get and return auth user
         return self.request.user
+
+    def update(self, request, *args, **kwargs):
+        return Response(
+            update_user(
+                request.user, request.data, kwargs.get("partial", False)
+            )
+        )
+
+
+# Async versions of the views above, served under ASGI (app/asgi_urls.py)
+
+
+@async_api_view(["POST"])
+async def createUserAsyncView(request):
+    # Create new user in system
+    data = await database_sync_to_async(create_user)(read_data(request))
+    return JsonResponse(data, status=201)
+
+
+@async_api_view(["POST"])
+async def createTokenAsyncView(request):
+    # Create new auth token for user
+    data = await database_sync_to_async(obtain_token)(
+        request, read_data(request)
+    )
+    return JsonResponse(data)
+
+
+@async_api_view(["GET", "PUT", "PATCH"], authenticated=True)
+async def manageUserAsyncView(request):
+    # Manage the auth user
+    if request.method == "GET":
+        return JsonResponse(UserSerializer(request.user).data)
+
+    data = await database_sync_to_async(update_user)(
+        request.user, read_data(request), request.method == "PATCH"
+    )
+    return JsonResponse(data)